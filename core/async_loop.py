@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+
+def log_display(msg):
+    print(f"[ASYNC_LOOP] {msg}")
+
+
+class AsyncLoopService:
+    """
+    Um único event loop asyncio de longa duração, rodando em uma thread daemon.
+    Motores assíncronos (edge-tts, listagem de vozes...) submetem corrotinas aqui
+    em vez de criar e fechar um loop novo a cada chamada.
+
+    Args:
+        max_concurrent: Máximo de corrotinas executando ao mesmo tempo (limita síntese paralela).
+    """
+    def __init__(self, max_concurrent: int = 2, name: str = "AeonAsyncLoop"):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._ready.is_set()
+
+    def start(self):
+        """Sobe a thread do loop (idempotente)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        with self._lock:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                pendentes = asyncio.all_tasks(loop)
+                for task in pendentes:
+                    task.cancel()
+                if pendentes:
+                    loop.run_until_complete(asyncio.gather(*pendentes, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            except Exception as e:
+                log_display(f"Erro ao finalizar loop: {e}")
+            loop.close()
+            # Um start() novo pode já ter subido outro loop: só limpa se ainda for o desta thread
+            with self._lock:
+                if self._loop is loop:
+                    self._loop = None
+                    self._ready.clear()
+
+    async def _limitado(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro):
+        """Agenda a corrotina no loop. Retorna um concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._limitado(coro), self._loop)
+
+    def run(self, coro, timeout: float = None):
+        """Executa a corrotina no loop e bloqueia a thread chamadora até o resultado."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except Exception:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 2.0):
+        """Para o loop, cancelando o que estiver pendente."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._thread = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
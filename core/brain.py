@@ -4,6 +4,8 @@ import datetime
 import ollama
 from groq import Groq
 
+from core.lru_cache import LRUCache
+
 # Carrega variáveis de ambiente do .env
 def load_env():
     env_file = os.path.join(os.path.dirname(__file__), "..", ".env")
@@ -32,6 +34,10 @@ class AeonBrain:
         # Não verificamos Ollama aqui para não atrasar o boot
         self.local_ready = True
         self.ollama_model = "deepseek-r1:8b"  # Modelo disponível que funciona bem
+        self.groq_model = "llama-3.3-70b-versatile"
+
+        # Memoiza a heurística de intents (frases de voz se repetem muito)
+        self._intent_cache = LRUCache(maxsize=256)
 
     def _conectar(self):
         """Conecta apenas quando necessário"""
@@ -62,7 +68,48 @@ class AeonBrain:
             None: Não conseguiu processar
         """
         self._conectar()  # Conecta agora!
+        system_prompt = self._build_system_prompt(historico_txt)
+
+        # Tenta Nuvem (Groq)
+        if self.online and self.client:
+            try:
+                print(f"[BRAIN] Usando Groq para responder...")
+                chat = self.client.chat.completions.create(
+                    model=self.groq_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7
+                )
+                response = chat.choices[0].message.content
+                return response if response else None
+            except Exception as e:
+                print(f"[BRAIN] Erro Groq: {e}. Tentando Ollama...")
+
+        # Tenta Local (Ollama)
+        if self.local_ready:
+            try:
+                print(f"[BRAIN] Usando Ollama ({self.ollama_model}) para responder...")
+                r = ollama.chat(model=self.ollama_model, messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ])
+                response = r['message']['content']
+                return response if response else None
+            except Exception as e:
+                print(f"[BRAIN] Ollama nao disponivel: {e}")
+
+        # Se chegou aqui e é conversa, usa conversador local simples
+        if modo == "conversa":
+            print(f"[BRAIN] Usando fallback local para responder...")
+            return self._conversar_local(prompt)
         
+        # Fallback para modo auto/comando
+        return None
+
+    def _build_system_prompt(self, historico_txt: str = "") -> str:
+        """Monta o prompt de sistema (identidade + memórias relevantes)."""
         # --- O PROMPT MESTRE (A Alma do Aeon) ---
         dt_now = datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
         
@@ -96,44 +143,83 @@ Mantenha contexto das conversas anteriores. Referenece coisas ditas antes.
         Conversas passadas que podem ser relevantes para o prompt atual:
         {historico_txt if historico_txt else "Nenhuma memória relevante encontrada."}
         """
+        return system_prompt
+
+    def pensar_stream(self, prompt: str, historico_txt: str = "", modo: str = "auto", on_token=None, **kwargs):
+        """
+        Versão em streaming de pensar(): gera a resposta em pedaços conforme o modelo produz.
+
+        Segue a mesma ordem de fallback (Groq -> Ollama -> conversador local). Um provedor
+        só é trocado se falhar antes do primeiro pedaço; depois disso o texto já foi entregue.
+
+        Args:
+            prompt, historico_txt, modo: Mesmos de pensar().
+            on_token: (Opcional) Callback chamado com cada pedaço, além do yield.
+
+        Yields:
+            str: Pedaços (tokens) da resposta, na ordem.
+        """
+        self._conectar()
+        system_prompt = self._build_system_prompt(historico_txt)
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+        def emitir(pedaco):
+            if on_token:
+                try:
+                    on_token(pedaco)
+                except Exception as e:
+                    print(f"[BRAIN] Erro no callback de streaming: {e}")
+            return pedaco
 
         # Tenta Nuvem (Groq)
         if self.online and self.client:
+            emitiu = False
             try:
-                print(f"[BRAIN] Usando Groq para responder...")
-                chat = self.client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7
+                print(f"[BRAIN] Usando Groq (streaming) para responder...")
+                stream = self.client.chat.completions.create(
+                    model=self.groq_model,
+                    messages=messages,
+                    temperature=0.7,
+                    stream=True
                 )
-                response = chat.choices[0].message.content
-                return response if response else None
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    pedaco = chunk.choices[0].delta.content
+                    if pedaco:
+                        emitiu = True
+                        yield emitir(pedaco)
+                if emitiu:
+                    return
             except Exception as e:
-                print(f"[BRAIN] Erro Groq: {e}. Tentando Ollama...")
+                print(f"[BRAIN] Erro Groq (streaming): {e}. Tentando Ollama...")
+                if emitiu:
+                    return
 
         # Tenta Local (Ollama)
         if self.local_ready:
+            emitiu = False
             try:
-                print(f"[BRAIN] Usando Ollama ({self.ollama_model}) para responder...")
-                r = ollama.chat(model=self.ollama_model, messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ])
-                response = r['message']['content']
-                return response if response else None
+                print(f"[BRAIN] Usando Ollama ({self.ollama_model}, streaming) para responder...")
+                for part in ollama.chat(model=self.ollama_model, messages=messages, stream=True):
+                    pedaco = part['message']['content']
+                    if pedaco:
+                        emitiu = True
+                        yield emitir(pedaco)
+                if emitiu:
+                    return
             except Exception as e:
                 print(f"[BRAIN] Ollama nao disponivel: {e}")
+                if emitiu:
+                    return
 
-        # Se chegou aqui e é conversa, usa conversador local simples
+        # Mesmo fallback de pensar(): conversador local, entregue de uma vez
         if modo == "conversa":
             print(f"[BRAIN] Usando fallback local para responder...")
-            return self._conversar_local(prompt)
-        
-        # Fallback para modo auto/comando
-        return None
+            yield emitir(self._conversar_local(prompt))
 
     def _conversar_local(self, prompt: str) -> str:
         """Conversa simples baseada em keywords quando LLM falha."""
@@ -223,29 +309,49 @@ Mantenha contexto das conversas anteriores. Referenece coisas ditas antes.
             return parsed
 
         p = prompt.lower()
+        tool = self._intent_cache.get(p, default=False)
+        if tool is False:
+            tool = self._match_intent_keywords(p)
+            self._intent_cache.put(p, tool)
+
+        if tool is None:
+            return None
+        if tool == "Lembretes.criar_lembrete":
+            return {"tool": tool, "param": {"texto": prompt}}
+        return {"tool": tool, "param": {}}
 
+    def _match_intent_keywords(self, p: str):
+        """Heurísticas de palavras-chave. Retorna o nome da ferramenta ou None."""
         # Heurísticas para lembretes / alarmes
         if any(x in p for x in ["alarme", "timer", "temporizador", "lembre", "lembrete", "lembre-me", "lembra"]):
-            return {"tool": "Lembretes.criar_lembrete", "param": {"texto": prompt}}
+            return "Lembretes.criar_lembrete"
+
+        # Heurística para manutenção da memória de longo prazo (antes de "limpar memória")
+        if any(x in p for x in ["compactar memoria", "compactar memória", "otimizar memoria", "otimizar memória"]):
+            return "Aeon.compactar_memoria"
 
         # Heurística para limpar contexto/histórico
         if any(x in p for x in ["limpar contexto", "expurgar contexto", "limpar historico", "limpar memória", "esquecer", "zeror contexto"]):
-            return {"tool": "Aeon.limpar_contexto", "param": {}}
+            return "Aeon.limpar_contexto"
 
         # Heurística para listar módulos
         if any(x in p for x in ["listar modulos", "quais modulos", "modulos disponiveis", "que modulos"]):
-            return {"tool": "Sistema.listar_modulos_disponiveis", "param": {}}
+            return "Sistema.listar_modulos_disponiveis"
 
         # Heurística para Modo Terminal / Expandir
         if any(x in p for x in ["expandir", "modo terminal", "abrir terminal", "maximizar", "interface completa"]):
-            return {"tool": "Sistema.modo_terminal", "param": {}}
+            return "Sistema.modo_terminal"
 
         # Heurística para Modo Esfera / Minimizar
         if any(x in p for x in ["modo esfera", "minimizar", "fechar terminal", "voltar para esfera", "reduzir"]):
-            return {"tool": "Sistema.modo_esfera", "param": {}}
+            return "Sistema.modo_esfera"
 
         # Fallback: nada detectado
         return None
+
+    def get_cache_stats(self) -> dict:
+        """Contadores do cache de intents (diagnóstico)."""
+        return {"intent": self._intent_cache.stats()}
         
     def ver(self, img_bytes):
         return "Módulo de visão requer ativação manual."
\ No newline at end of file
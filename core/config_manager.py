@@ -1,6 +1,40 @@
 import json
 from pathlib import Path
 import os
+import threading
+
+from core.journal import JournaledStore
+from core.persistence import DebouncedWriter, escrever_atomico
+
+MAX_HISTORY = 100
+MAX_MEMORY = 20
+
+
+def _apply_history(state, rec):
+    op = rec["op"]
+    if op == "append":
+        conversas = state.setdefault("conversations", [])
+        conversas.append(rec["item"])
+        # Mantém apenas as últimas 100 conversas
+        if len(conversas) > MAX_HISTORY:
+            del conversas[:len(conversas) - MAX_HISTORY]
+    elif op == "set_context":
+        state["last_context"] = rec["value"]
+    return state
+
+
+def _apply_list(limite=None):
+    def apply(state, rec):
+        op = rec["op"]
+        if op == "append":
+            state.append(rec["item"])
+            if limite and len(state) > limite:
+                del state[:len(state) - limite]
+        elif op == "replace":
+            # In-place: quem tem referência para a lista (get_tasks) continua vendo o estado
+            state[:] = rec["items"]
+        return state
+    return apply
 
 class ConfigManager:
     """
@@ -29,15 +63,36 @@ class ConfigManager:
         self.history_path = self.storage_path / "historico.json"
 
         self.system_data = self._load_json(self.sys_path, default={"apps": {}, "routines": {}, "triggers": [], "themes": {}})
+        self._system_lock = threading.Lock()
+        # set_system_data só marca o system.json como sujo; a gravação sai em background
+        self._writer = DebouncedWriter(debounce_s=float(self.system_data.get("persist_debounce_s", 0.5)))
         
         # O aviso sobre a chave foi removido para evitar confusão,
         # uma vez que as chaves agora são gerenciadas pelo .env.
         if not self.sys_path.exists():
              self._save_json(self.sys_path, self.system_data)
 
-        self.tasks = self._load_json(self.tasks_path, default=[])
-        self.memory = self._load_json(self.mem_path, default=[])
-        self.history = self._load_json(self.history_path, default={"conversations": [], "last_context": ""})
+        # Tarefas, memória e histórico: journal append-only (um registro por alteração)
+        journal_cfg = self.system_data.get("journal", {}) or {}
+        opcoes = {
+            "fsync": journal_cfg.get("fsync", "batch"),
+            "compact_every": int(journal_cfg.get("compact_every", 500)),
+        }
+        self._tasks_store = JournaledStore(
+            self.storage_path / "tasks", list, _apply_list(),
+            legacy_path=self.tasks_path, **opcoes
+        )
+        self._memory_store = JournaledStore(
+            self.storage_path / "memoria", list, _apply_list(MAX_MEMORY),
+            legacy_path=self.mem_path, **opcoes
+        )
+        self._history_store = JournaledStore(
+            self.storage_path / "historico", lambda: {"conversations": [], "last_context": ""},
+            _apply_history, legacy_path=self.history_path, **opcoes
+        )
+        self.tasks = self._tasks_store.state
+        self.memory = self._memory_store.state
+        self.history = self._history_store.state
         
         # Alias para compatibilidade com componentes legados (como Brain)
         # que esperam um dicionário de configuração direto, em vez de usar
@@ -50,40 +105,45 @@ class ConfigManager:
                 try:
                     return json.load(f)
                 except json.JSONDecodeError:
-                    return default if default is not None else {}
+                    corrompido = file_path.with_name(file_path.name + ".corrupt")
+                    print(f"[CONFIG] {file_path.name} ilegível; cópia mantida em {corrompido.name}.")
+            os.replace(file_path, corrompido)
         return default if default is not None else {}
 
     def _save_json(self, file_path, data):
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
+        escrever_atomico(file_path, json.dumps(data, indent=4))
+
+    def _serializar_sistema(self):
+        with self._system_lock:
+            return json.dumps(self.system_data, indent=4)
 
     # --- Métodos do Sistema ---
     def get_system_data(self, key, default=None):
         return self.system_data.get(key, default)
 
     def set_system_data(self, key, value):
-        self.system_data[key] = value
-        self._save_json(self.sys_path, self.system_data)
+        with self._system_lock:
+            self.system_data[key] = value
+        self._writer.schedule(self.sys_path, self._serializar_sistema)
 
     # --- Métodos de Tarefas (TaskManager) ---
     def get_tasks(self):
         return self.tasks
 
     def add_task(self, task_data):
-        self.tasks.append(task_data)
-        self._save_json(self.tasks_path, self.tasks)
+        self._tasks_store.append("append", item=task_data)
 
     def save_tasks(self):
-        self._save_json(self.tasks_path, self.tasks)
+        """Registra o estado atual da lista (após alterações in-place, ex: tarefa concluída)."""
+        self._tasks_store.append("replace", items=list(self.tasks))
 
     # --- Métodos de Memória (Conversa) ---
     def get_memory(self):
         return self.memory
     
     def add_to_memory(self, user_input, aeon_response, timestamp):
-        self.memory.append({"user": user_input, "aeon": aeon_response, "time": str(timestamp)})
-        # Salva apenas as últimas 20 interações
-        self._save_json(self.mem_path, self.memory[-20:])
+        # Guarda apenas as últimas 20 interações
+        self._memory_store.append("append", item={"user": user_input, "aeon": aeon_response, "time": str(timestamp)})
 
     # --- Métodos de Histórico (Contexto Persistente) ---
     def get_history(self):
@@ -98,11 +158,7 @@ class ConfigManager:
             "user": user_input,
             "aeon": aeon_response
         }
-        self.history["conversations"].append(interaction)
-        # Mantém apenas as últimas 100 conversas
-        if len(self.history["conversations"]) > 100:
-            self.history["conversations"] = self.history["conversations"][-100:]
-        self._save_json(self.history_path, self.history)
+        self._history_store.append("append", item=interaction)
     
     def get_context_summary(self, num_previous=5):
         """
@@ -130,5 +186,17 @@ class ConfigManager:
     
     def save_context(self, context):
         """Salva contexto atual para próximas sessões"""
-        self.history["last_context"] = context
-        self._save_json(self.history_path, self.history)
\ No newline at end of file
+        self._history_store.append("set_context", value=context)
+
+    # --- Persistência ---
+    def flush(self):
+        """Grava o system.json pendente e garante em disco os registros dos journals."""
+        self._writer.flush()
+        for store in (self._tasks_store, self._memory_store, self._history_store):
+            store.sync()
+
+    def close(self):
+        """Grava o que está pendente, compacta os journals e fecha os arquivos (chamado na saída)."""
+        self._writer.close()
+        for store in (self._tasks_store, self._memory_store, self._history_store):
+            store.close()
\ No newline at end of file
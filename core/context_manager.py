@@ -1,18 +1,80 @@
+import copy
+import hashlib
+import heapq
+import itertools
 import json
+import os
+import queue
 import time
 import threading
+from collections import namedtuple
 from pathlib import Path
 
+from core.persistence import escrever_atomico
+from core.rw_lock import RWLock
+
+_BAGAGEM = Path(__file__).resolve().parent.parent / "bagagem"
+SNAPSHOT_DIR_PADRAO = _BAGAGEM / "context"
+SNAPSHOT_LEGADO = _BAGAGEM / "memory_dump.json"
+_SERIALIZAVEIS = (str, int, float, bool, list, dict, type(None))
+
+# Evento entregue aos assinantes. kind: "set", "expired" ou "loaded"; value=None quando a chave saiu.
+ContextEvent = namedtuple("ContextEvent", ["key", "value", "old", "kind"])
+
+
+def log_display(msg):
+    print(f"[CONTEXT] {msg}")
+
+
 class ContextManager:
     """
     O 'Quadro Branco' do Aeon (Thread-Safe).
     Permite que módulos compartilhem dados entre si sem acoplamento.
     Exemplo: Visão salva 'erro_lido', Dev lê 'erro_lido'.
+
+    Expiração (TTL): cada chave com TTL entra em um min-heap de (expira_em, geração, chave).
+    Gravar é O(log n); `get` descarta a chave vencida na hora e `cleanup` só
+    desempilha o que já venceu. Entradas do heap de chaves regravadas ou removidas
+    ficam obsoletas (a geração não bate) e são ignoradas quando chegam ao topo.
+
+    Notificações: `subscribe("stealth_mode", cb)` ou `subscribe("library_*", cb)`
+    entrega um ContextEvent a cada mudança, em uma thread própria (quem grava
+    não espera os callbacks). Assim o consumidor guarda o valor localmente em vez
+    de chamar `get` a cada uso.
+
+    Concorrência: RWLock. `get`, `get_all`, `get_stats` e a cópia do snapshot só
+    pegam o lado de leitura, então as threads de STT, gestos, lembretes e
+    roteamento leem em paralelo; só gravações e expirações são exclusivas.
+
+    Snapshot incremental: em `bagagem/context/`, um index.json compacto guarda os
+    valores pequenos e aponta para um arquivo por valor grande (acima de
+    `large_value_bytes`). Só as chaves alteradas desde o último save são
+    regravadas; no boot os valores grandes ficam no disco até o primeiro `get`.
     """
-    def __init__(self):
+    def __init__(self, clock=time.time, large_value_bytes: int = 4096):
         self.data = {}
         self.metadata = {}  # Para guardar timestamps (TTL)
-        self._lock = threading.Lock()
+        self._lock = RWLock()
+        self._clock = clock
+        self._expiracoes = []  # heap de (expira_em, geração, chave)
+        self._geracao = 0
+        self.stats = {"expired_on_get": 0, "expired_on_sweep": 0}
+
+        # Assinaturas: chave exata -> {token: cb}; prefixos -> [(prefixo, token, cb)]
+        self._assinantes = {}
+        self._assinantes_prefixo = []
+        self._tokens = itertools.count(1)
+        self._eventos = queue.Queue()
+        self._despachante = None
+
+        # Snapshot incremental
+        self.large_value_bytes = large_value_bytes
+        self._sujas = set()        # alteradas desde o último save
+        self._removidas = set()    # saíram desde o último save
+        self._preguicosas = {}     # chave -> arquivo ainda não lido (carga sob demanda)
+        self._indice = {}          # última versão gravada do index: chave -> {"v": valor} | {"file": nome}
+        self._save_lock = threading.Lock()
+        self._autosave_stop = None
 
     def set(self, key: str, value, ttl: int = None):
         """
@@ -22,104 +84,369 @@ class ContextManager:
             value: O valor (pode ser qualquer objeto)
             ttl: (Opcional) Tempo de vida em segundos. Se passar, o dado expira.
         """
-        with self._lock:
+        with self._lock.write():
+            agora = self._clock()
+            self._geracao += 1
+            anterior = self.data.get(key)
+            if self._tem_assinante(key) and (key not in self.data or not _iguais(anterior, value)):
+                self._eventos.put(ContextEvent(key, value, anterior, "set"))
             self.data[key] = value
+            # Sempre suja: o valor pode ser o mesmo objeto alterado in-place
+            self._sujas.add(key)
+            self._removidas.discard(key)
+            self._preguicosas.pop(key, None)
             self.metadata[key] = {
-                "created_at": time.time(),
-                "ttl": ttl
+                "created_at": agora,
+                "ttl": ttl,
+                "expires_at": agora + ttl if ttl else None,
+                "gen": self._geracao,
             }
-        # A limpeza é chamada fora do lock para evitar deadlocks se a limpeza
-        # precisar chamar outro método que também usa o lock.
-        self.cleanup()
+            if ttl:
+                heapq.heappush(self._expiracoes, (agora + ttl, self._geracao, key))
+            # Só desempilha o que já venceu: O(1) quando nada venceu
+            self._expirar_vencidos(agora)
 
-    def get(self, key: str):
+    def get(self, key: str, default=None):
         """
-        Recupera um dado de forma segura. Retorna None se não existir ou tiver expirado.
+        Recupera um dado de forma segura. Retorna `default` se não existir ou tiver expirado.
         """
-        with self._lock:
-            if key not in self.data:
-                return None
-            
+        # Uma única seção de leitura no caso comum (chave presente e válida)
+        with self._lock.read():
+            if key in self.data:
+                meta = self.metadata.get(key)
+                if not (meta and meta.get("expires_at") is not None and self._clock() >= meta["expires_at"]):
+                    return self.data.get(key, default)
+                arquivo = None
+            else:
+                arquivo = self._preguicosas.get(key)
+                if arquivo is None:
+                    return default
+        if arquivo is not None:
+            return self._materializar(key, arquivo, default)
+
+        # Venceu: remove com o lock de escrita (revalida, pode ter sido regravada no meio)
+        with self._lock.write():
             meta = self.metadata.get(key)
-            if meta and meta["ttl"]:
-                if time.time() - meta["created_at"] > meta["ttl"]:
-                    self._cleanup_key(key) # Usa método interno para remover
-                    return None
-            
-            return self.data.get(key)
-
-    def _cleanup_key(self, key: str):
+            if meta and meta.get("expires_at") is not None and self._clock() >= meta["expires_at"]:
+                self._cleanup_key(key, "expired") # Usa método interno para remover
+                self.stats["expired_on_get"] += 1
+                return default
+            return self.data.get(key, default)
+
+    def _cleanup_key(self, key: str, motivo: str = "expired"):
         """Método auxiliar para remover uma chave específica (deve ser chamado dentro de um lock)."""
+        self._preguicosas.pop(key, None)
+        self._sujas.discard(key)
+        self._removidas.add(key)
         if key in self.data:
-            del self.data[key]
+            anterior = self.data.pop(key)
+            if self._tem_assinante(key):
+                self._eventos.put(ContextEvent(key, None, anterior, motivo))
         if key in self.metadata:
             del self.metadata[key]
 
-    def cleanup(self):
-        """Remove todas as chaves expiradas (Garbage Collector)."""
-        now = time.time()
-        expired = []
-        # Primeiro, coleta as chaves a serem removidas sem modificar o dict
-        with self._lock:
-            for key, meta in self.metadata.items():
-                if meta.get("ttl") and now - meta["created_at"] > meta["ttl"]:
-                    expired.append(key)
-        
-        # Depois, remove as chaves encontradas
-        if expired:
-            with self._lock:
-                for key in expired:
-                    self._cleanup_key(key)
-            print(f"[CONTEXT] Limpeza: {len(expired)} itens removidos.")
+    def _expirar_vencidos(self, agora: float) -> int:
+        """Desempilha as expirações vencidas (deve ser chamado dentro de um lock)."""
+        removidas = 0
+        heap = self._expiracoes
+        while heap and heap[0][0] <= agora:
+            _, geracao, key = heapq.heappop(heap)
+            meta = self.metadata.get(key)
+            if meta is None or meta.get("gen") != geracao:
+                continue  # entrada obsoleta: chave regravada ou já removida
+            self._cleanup_key(key)
+            removidas += 1
+        # Muitas regravações deixam entradas obsoletas: reconstrói o heap com as vivas
+        if len(heap) > 64 and len(heap) > 2 * len(self.metadata):
+            self._expiracoes = [
+                (m["expires_at"], m["gen"], k) for k, m in self.metadata.items() if m.get("expires_at") is not None
+            ]
+            heapq.heapify(self._expiracoes)
+        self.stats["expired_on_sweep"] += removidas
+        return removidas
+
+    def cleanup(self) -> int:
+        """Remove as chaves expiradas (Garbage Collector). Retorna quantas saíram."""
+        with self._lock.read():
+            # Nada vencido: não bloqueia os leitores com o lock de escrita
+            heap = self._expiracoes
+            if not heap or heap[0][0] > self._clock():
+                return 0
+        with self._lock.write():
+            return self._expirar_vencidos(self._clock())
+
+    def get_stats(self) -> dict:
+        """Contadores de expiração e tamanho atual (diagnóstico)."""
+        with self._lock.read():
+            return {
+                **self.stats,
+                "keys": len(self.data),
+                "pending_expirations": len(self._expiracoes),
+            }
+
+    # --- Assinaturas ---
+    def subscribe(self, pattern: str, callback) -> int:
+        """
+        Assina mudanças de uma chave ("stealth_mode") ou de um prefixo ("library_*"; "*" = todas).
+        `callback(evento: ContextEvent)` roda na thread de notificações.
+        Retorna um token para `unsubscribe`.
+        """
+        token = next(self._tokens)
+        with self._lock.write():
+            if pattern.endswith("*"):
+                self._assinantes_prefixo.append((pattern[:-1], token, callback))
+            else:
+                self._assinantes.setdefault(pattern, {})[token] = callback
+            if self._despachante is None:
+                self._despachante = threading.Thread(target=self._despachar, name="AeonContextEvents", daemon=True)
+                self._despachante.start()
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock.write():
+            for callbacks in self._assinantes.values():
+                callbacks.pop(token, None)
+            self._assinantes = {k: v for k, v in self._assinantes.items() if v}
+            self._assinantes_prefixo = [a for a in self._assinantes_prefixo if a[1] != token]
+
+    def _tem_assinante(self, key: str) -> bool:
+        """Barato quando ninguém assina (deve ser chamado dentro de um lock)."""
+        return key in self._assinantes or any(key.startswith(p) for p, _, _ in self._assinantes_prefixo)
+
+    def _callbacks_para(self, key: str):
+        with self._lock.read():
+            callbacks = list(self._assinantes.get(key, {}).values())
+            callbacks += [cb for p, _, cb in self._assinantes_prefixo if key.startswith(p)]
+        return callbacks
+
+    def _despachar(self):
+        while True:
+            evento = self._eventos.get()
+            try:
+                for callback in self._callbacks_para(evento.key):
+                    try:
+                        callback(evento)
+                    except Exception as e:
+                        log_display(f"Erro no assinante de '{evento.key}': {e}")
+            finally:
+                self._eventos.task_done()
+
+    def wait_notifications(self):
+        """Bloqueia até todos os eventos já enfileirados serem entregues (testes/diagnóstico)."""
+        self._eventos.join()
 
     def get_all(self):
-        """Retorna uma cópia do contexto atual (útil para debug)."""
+        """Retorna uma cópia do contexto atual (útil para debug). Lê os valores ainda no disco."""
         self.cleanup()
-        with self._lock:
+        with self._lock.read():
+            pendentes = dict(self._preguicosas)
+        for key, arquivo in pendentes.items():
+            self._materializar(key, arquivo)
+        with self._lock.read():
             return self.data.copy()
 
+    # --- Snapshot ---
     def save_snapshot(self, path=None):
-        """Salva o estado atual em JSON para persistência entre reboots."""
+        """
+        Salva o estado para persistência entre reboots.
+        `path` é a pasta do snapshot incremental (padrão bagagem/context); um caminho
+        terminado em .json grava um dump completo em arquivo único.
+        """
         self.cleanup()
-        
-        if path:
-            filepath = Path(path)
-        else:
-            filepath = Path(__file__).resolve().parent.parent / "bagagem" / "memory_dump.json"
-        
-        with self._lock:
+        filepath = Path(path) if path else SNAPSHOT_DIR_PADRAO
+        if filepath.suffix == ".json":
+            return self._salvar_completo(filepath)
+        try:
+            with self._save_lock:
+                return self._salvar_incremental(filepath)
+        except Exception as e:
+            log_display(f"Erro ao salvar snapshot: {e}")
+            return False
+
+    def _salvar_completo(self, filepath: Path) -> bool:
+        # Cópia profunda sob o lock de leitura: os leitores seguem, e a serialização
+        # (lenta) roda fora do lock sobre um estado que ninguém mais altera
+        self.get_all()
+        with self._lock.read():
             # Filtra apenas dados serializáveis
-            serializable_data = {
-                k: v for k, v in self.data.items() 
-                if isinstance(v, (str, int, float, bool, list, dict, type(None)))
-            }
+            serializable_data = {k: v for k, v in self.data.items() if isinstance(v, _SERIALIZAVEIS)}
+            try:
+                serializable_data = copy.deepcopy(serializable_data)
+            except Exception:
+                pass  # objeto não copiável dentro de uma lista: segue com a cópia rasa
 
         try:
             filepath.parent.mkdir(parents=True, exist_ok=True)
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(serializable_data, f, indent=2, ensure_ascii=False)
+            escrever_atomico(filepath, json.dumps(serializable_data, ensure_ascii=False, separators=(",", ":")))
             return True
         except Exception as e:
-            print(f"[CONTEXT] Erro ao salvar snapshot: {e}")
+            log_display(f"Erro ao salvar snapshot: {e}")
             return False
 
+    def _salvar_incremental(self, pasta: Path) -> bool:
+        """Regrava só as chaves sujas. Retorna True também quando não havia nada a gravar."""
+        # Troca os conjuntos de sujas (escrita rápida); as cópias saem sob o lock de escrita
+        # para que uma chave regravada no meio volte a ficar suja para o próximo save
+        with self._lock.write():
+            sujas, self._sujas = self._sujas, set()
+            removidas, self._removidas = self._removidas, set()
+            valores = {}
+            for key in sujas:
+                valor = self.data.get(key)
+                if key in self.data and isinstance(valor, _SERIALIZAVEIS):
+                    try:
+                        valores[key] = copy.deepcopy(valor)
+                    except Exception:
+                        valores[key] = valor
+                else:
+                    removidas.add(key)
+        if not valores and not removidas:
+            return True
+        try:
+            self._gravar_alteracoes(pasta, valores, removidas)
+        except Exception:
+            # Falhou no disco: as chaves voltam a ficar sujas para o próximo save
+            # (sem desfazer o que mudou desde a troca dos conjuntos)
+            with self._lock.write():
+                self._sujas |= sujas - self._removidas
+                self._removidas |= removidas - self._sujas
+            raise
+        return True
+
+    def _gravar_alteracoes(self, pasta: Path, valores: dict, removidas: set):
+        """Grava os valores grandes alterados e o index novo; apaga os arquivos que sobraram."""
+        pasta_valores = pasta / "values"
+        pasta_valores.mkdir(parents=True, exist_ok=True)
+        indice = dict(self._indice)
+        obsoletos = []
+        for key in removidas:
+            entrada = indice.pop(key, None)
+            if entrada and "file" in entrada:
+                obsoletos.append(entrada["file"])
+        for key, valor in valores.items():
+            try:
+                texto = json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+            except (TypeError, ValueError):
+                continue  # lista/dict com objeto não serializável
+            anterior = indice.get(key, {})
+            if len(texto) > self.large_value_bytes:
+                nome = _arquivo_da_chave(key)
+                escrever_atomico(pasta_valores / nome, texto)
+                indice[key] = {"file": nome}
+            else:
+                indice[key] = {"v": valor}
+                if "file" in anterior:
+                    obsoletos.append(anterior["file"])
+
+        escrever_atomico(pasta / "index.json", json.dumps(
+            {"version": 1, "keys": indice}, ensure_ascii=False, separators=(",", ":")
+        ))
+        self._indice = indice
+        # Só depois do index novo: um index antigo nunca aponta para arquivo apagado
+        em_uso = {e["file"] for e in indice.values() if "file" in e}
+        for nome in set(obsoletos) - em_uso:
+            try:
+                os.remove(pasta_valores / nome)
+            except OSError:
+                pass
+
     def load_snapshot(self, path=None):
-        """Carrega estado anterior do JSON."""
-        if path:
-            filepath = Path(path)
-        else:
-            filepath = Path(__file__).resolve().parent.parent / "bagagem" / "memory_dump.json"
+        """
+        Carrega estado anterior. Da pasta incremental só lê o index: valores grandes
+        são lidos no primeiro `get`. Sem pasta, importa o memory_dump.json antigo.
+        """
+        filepath = Path(path) if path else SNAPSHOT_DIR_PADRAO
+        if filepath.suffix != ".json" and not (filepath / "index.json").exists() and not path:
+            filepath = SNAPSHOT_LEGADO
+
+        if filepath.suffix == ".json":
+            if not filepath.exists():
+                return False
+            try:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+            except Exception as e:
+                log_display(f"Erro ao carregar snapshot: {e}")
+                return False
+            with self._lock.write():
+                for key, value in loaded.items():
+                    self._carregar_valor(key, value)
+                    # Ainda não está no formato incremental: entra no próximo save
+                    self._sujas.add(key)
+            return True
 
-        if not filepath.exists():
+        try:
+            with open(filepath / "index.json", "r", encoding="utf-8") as f:
+                indice = json.load(f).get("keys", {})
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            log_display(f"Erro ao carregar snapshot: {e}")
             return False
-            
+
+        with self._lock.write():
+            self._indice = dict(indice)
+            for key, entrada in indice.items():
+                if key in self.data:
+                    continue  # já gravada nesta execução: vale a versão atual
+                if "file" in entrada:
+                    self._preguicosas[key] = str(filepath / "values" / entrada["file"])
+                else:
+                    self._carregar_valor(key, entrada.get("v"))
+        return True
+
+    def _carregar_valor(self, key, value):
+        """Insere um valor vindo do snapshot, sem TTL (deve ser chamado dentro do lock de escrita)."""
+        self._geracao += 1
+        if self._tem_assinante(key):
+            self._eventos.put(ContextEvent(key, value, self.data.get(key), "loaded"))
+        self.data[key] = value
+        self.metadata[key] = {"created_at": self._clock(), "ttl": None, "expires_at": None, "gen": self._geracao}
+
+    def _materializar(self, key, arquivo, default=None):
+        """Lê do disco um valor grande adiado pelo load_snapshot."""
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                loaded = json.load(f)
-            
-            with self._lock:
-                self.data.update(loaded)
-            return True
+            with open(arquivo, "r", encoding="utf-8") as f:
+                value = json.load(f)
         except Exception as e:
-            print(f"[CONTEXT] Erro ao carregar snapshot: {e}")
-            return False
\ No newline at end of file
+            log_display(f"Erro ao ler '{key}' do snapshot: {e}")
+            with self._lock.write():
+                self._preguicosas.pop(key, None)
+            return default
+        with self._lock.write():
+            # Só entra se ninguém gravou/removeu a chave enquanto o arquivo era lido
+            if self._preguicosas.get(key) == arquivo:
+                del self._preguicosas[key]
+                self._carregar_valor(key, value)
+            return self.data.get(key, default)
+
+    def start_autosave(self, interval_s: float = 60.0, path=None):
+        """Salva as chaves sujas periodicamente em background (o save da saída fica pequeno)."""
+        if self._autosave_stop is not None:
+            return
+        self._autosave_stop = threading.Event()
+        parar = self._autosave_stop
+
+        def loop():
+            while not parar.wait(interval_s):
+                self.save_snapshot(path)
+
+        threading.Thread(target=loop, name="AeonContextAutosave", daemon=True).start()
+
+    def stop_autosave(self):
+        if self._autosave_stop is not None:
+            self._autosave_stop.set()
+            self._autosave_stop = None
+
+def _iguais(a, b) -> bool:
+    """Comparação tolerante (objetos sem __eq__ confiável contam como diferentes)."""
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _arquivo_da_chave(key: str) -> str:
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + ".json"
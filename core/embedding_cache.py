@@ -0,0 +1,83 @@
+import os
+
+from core.lru_cache import LRUCache
+
+
+def log_display(msg):
+    print(f"[EMBED_CACHE] {msg}")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Chave do cache: caixa e espaços extras não mudam o embedding que queremos reaproveitar."""
+    return " ".join((texto or "").split()).lower()
+
+
+class EmbeddingCache:
+    """
+    Cache LRU de embeddings por texto normalizado, compartilhado entre gravação
+    e busca da memória vetorial. Em cada chamada só os textos ausentes vão para
+    o modelo, em uma única chamada em lote.
+
+    Args:
+        embed_fn: Função lista de textos -> lista de vetores (ex: a do ChromaDB).
+        maxsize: Quantos embeddings manter.
+        persist_path: Arquivo .npz para guardar o cache entre execuções (None = só em RAM).
+    """
+    def __init__(self, embed_fn, maxsize: int = 1024, persist_path: str = None):
+        self.embed_fn = embed_fn
+        self.persist_path = persist_path
+        self._cache = LRUCache(maxsize=maxsize)
+        self._dirty = False
+        if persist_path:
+            self._carregar()
+
+    def embed(self, textos) -> list:
+        """Embeddings dos textos, na mesma ordem, calculando só os que faltam."""
+        chaves = [normalizar_texto(t) for t in textos]
+        resultado = [self._cache.get(c) for c in chaves]
+        faltando = {}
+        for i, vetor in enumerate(resultado):
+            if vetor is None:
+                faltando.setdefault(chaves[i], []).append(i)
+        if faltando:
+            novos = self.embed_fn([textos[idx[0]] for idx in faltando.values()])
+            for (chave, indices), vetor in zip(faltando.items(), novos):
+                vetor = [float(x) for x in vetor]
+                self._cache.put(chave, vetor)
+                for i in indices:
+                    resultado[i] = vetor
+            self._dirty = True
+        return resultado
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    # --- Persistência (opcional) ---
+    def _carregar(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            import numpy as np
+            with np.load(self.persist_path, allow_pickle=False) as dados:
+                for chave, vetor in zip(dados["keys"].tolist(), dados["vectors"]):
+                    self._cache.put(chave, vetor.tolist())
+            log_display(f"{len(self._cache)} embeddings carregados do disco.")
+        except Exception as e:
+            log_display(f"Erro ao carregar cache de embeddings: {e}")
+
+    def save(self):
+        """Grava o cache em disco (escrita atômica). Sem efeito se nada mudou."""
+        if not self.persist_path or not self._dirty:
+            return
+        itens = self._cache.items()
+        if not itens:
+            return
+        try:
+            import numpy as np
+            tmp = self.persist_path + ".tmp.npz"
+            np.savez(tmp, keys=np.array([k for k, _ in itens]),
+                     vectors=np.array([v for _, v in itens], dtype=np.float32))
+            os.replace(tmp, self.persist_path)
+            self._dirty = False
+        except Exception as e:
+            log_display(f"Erro ao salvar cache de embeddings: {e}")
@@ -0,0 +1,231 @@
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+from core.rw_lock import RWLock
+
+
+def log_display(msg):
+    print(f"[FLAT_INDEX] {msg}")
+
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    Embedder sem modelo (sem torch): feature hashing de palavras e trigramas de
+    caracteres, normalizado em L2. Bem menos semântico que um transformer, mas
+    acha interações com as mesmas palavras e tolera variações de grafia.
+    """
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing{dim}"
+
+    def _features(self, texto: str):
+        palavras = _WORD_RE.findall((texto or "").lower())
+        for palavra in palavras:
+            yield "w:" + palavra, 1.0
+            marcada = f"#{palavra}#"
+            for i in range(len(marcada) - 2):
+                yield "c:" + marcada[i:i + 3], 0.5
+
+    def __call__(self, textos) -> list:
+        matriz = np.zeros((len(textos), self.dim), dtype=np.float32)
+        for linha, texto in enumerate(textos):
+            for feature, peso in self._features(texto):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # O bit alto decide o sinal: colisões tendem a se cancelar
+                matriz[linha, h % self.dim] += peso if (h >> 31) == 0 else -peso
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        return list(matriz / normas)
+
+
+class OnnxEmbedder:
+    """
+    MiniLM (ou similar) exportado para ONNX, rodando no onnxruntime, sem torch.
+    `model_dir` deve conter model.onnx e tokenizer.json. Pooling pela média da máscara.
+    """
+    def __init__(self, model_dir: str, max_length: int = 256):
+        import onnxruntime
+        from tokenizers import Tokenizer
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), providers=["CPUExecutionProvider"]
+        )
+        self._entradas = {i.name for i in self.session.get_inputs()}
+        self.name = "onnx-" + os.path.basename(os.path.normpath(model_dir))
+
+    def __call__(self, textos) -> list:
+        encodings = self.tokenizer.encode_batch(list(textos))
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._entradas:
+            feed["token_type_ids"] = np.zeros_like(ids)
+        saida = self.session.run(None, feed)[0]
+        m = mask[..., None].astype(np.float32)
+        vetores = (saida * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        vetores /= np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+        return list(vetores.astype(np.float32))
+
+
+def criar_embedder(model_dir: str = None):
+    """ONNX se o modelo e o onnxruntime existirem, senão hashing."""
+    if model_dir and os.path.exists(os.path.join(model_dir, "model.onnx")):
+        try:
+            return OnnxEmbedder(model_dir)
+        except Exception as e:
+            log_display(f"Embedder ONNX indisponível ({e}); usando hashing.")
+    return HashingEmbedder()
+
+
+class FlatVectorIndex:
+    """
+    Índice vetorial plano em disco: matriz float32 (vectors.f32) lida por mmap e
+    um sidecar JSONL com documento/id/metadados por linha. A busca é um produto
+    matricial (cosseno, vetores já normalizados) + argpartition para o top-k.
+    Buscas usam o lado de leitura do lock e nenhuma referência ao mmap sai dele:
+    a compactação, com o lock de escrita, pode substituir o arquivo mesmo no Windows.
+
+    Args:
+        path: Pasta do índice.
+        dim: Dimensão dos vetores.
+    """
+    def __init__(self, path: str, dim: int):
+        self.path = str(path)
+        self.dim = dim
+        os.makedirs(self.path, exist_ok=True)
+        self._vec_path = os.path.join(self.path, "vectors.f32")
+        self._meta_path = os.path.join(self.path, "meta.jsonl")
+        self._lock = RWLock()
+        self._mmap = None
+        self._meta = []
+        self._carregar()
+        self._remapear()
+
+    def __len__(self):
+        return len(self._meta)
+
+    def _carregar(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                for linha in f:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+                    try:
+                        self._meta.append(json.loads(linha))
+                    except json.JSONDecodeError:
+                        break  # linha truncada por queda no meio da gravação
+        tamanho = os.path.getsize(self._vec_path) if os.path.exists(self._vec_path) else 0
+        n_vetores = tamanho // (self.dim * 4)
+        # Gravação interrompida: mantém só as linhas que têm vetor e metadado
+        n = min(n_vetores, len(self._meta))
+        if n != n_vetores or n != len(self._meta) or tamanho != n_vetores * self.dim * 4:
+            log_display(f"Índice inconsistente; mantendo {n} entradas.")
+            self._meta = self._meta[:n]
+            with open(self._vec_path, "ab") as f:
+                f.truncate(n * self.dim * 4)
+            self._reescrever_meta()
+
+    def _reescrever_meta(self):
+        tmp = self._meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for m in self._meta:
+                f.write(json.dumps(m, ensure_ascii=False) + "\n")
+        os.replace(tmp, self._meta_path)
+
+    def _remapear(self):
+        """Refaz o mmap com o tamanho atual. Chamar com o lock de escrita (ou no __init__)."""
+        n = len(self._meta)
+        if n == 0:
+            self._mmap = None
+        elif self._mmap is None or self._mmap.shape[0] != n:
+            self._mmap = np.memmap(self._vec_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+
+    def add(self, embeddings, documents, ids, metadatas=None):
+        """Acrescenta vetores (normalizados aqui) e metadados ao fim dos arquivos."""
+        vetores = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        vetores = vetores / np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+        metadatas = metadatas or [{} for _ in documents]
+        linhas = [{"id": i, "document": d, "metadata": m} for i, d, m in zip(ids, documents, metadatas)]
+        with self._lock.write():
+            with open(self._vec_path, "ab") as f:
+                f.write(vetores.astype(np.float32).tobytes())
+            with open(self._meta_path, "a", encoding="utf-8") as f:
+                for linha in linhas:
+                    f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+            self._meta.extend(linhas)
+            self._remapear()
+
+    def query(self, embedding, n_results: int = 3) -> list:
+        """Top-k por cosseno: lista de (score, documento, metadados), do mais parecido ao menos."""
+        q = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        with self._lock.read():
+            if self._mmap is None:
+                return []
+            scores = self._mmap @ q  # resultado em RAM: o mmap não sai do lock
+            meta = self._meta
+        k = min(n_results, scores.shape[0])
+        topo = np.argpartition(-scores, k - 1)[:k]
+        topo = topo[np.argsort(-scores[topo])]
+        return [(float(scores[i]), meta[i]["document"], meta[i].get("metadata", {})) for i in topo]
+
+    def entries(self):
+        """Snapshot para manutenção: (ids, matriz float32 em RAM, timestamps, documentos)."""
+        with self._lock.read():
+            if self._mmap is None:
+                return [], np.zeros((0, self.dim), dtype=np.float32), [], []
+            matriz = np.array(self._mmap)
+            meta = list(self._meta)
+        return (
+            [m["id"] for m in meta],
+            matriz,
+            [m.get("metadata", {}).get("timestamp", 0.0) for m in meta],
+            [m["document"] for m in meta],
+        )
+
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in (self._vec_path, self._meta_path) if os.path.exists(p))
+
+    def compact(self, remove_ids) -> int:
+        """Reescreve os arquivos sem as entradas removidas (troca atômica). Retorna bytes liberados."""
+        remove_ids = set(remove_ids)
+        with self._lock.write():
+            antes = self.size_bytes()
+            manter = [i for i, m in enumerate(self._meta) if m["id"] not in remove_ids]
+            if len(manter) == len(self._meta):
+                return 0
+            if self._mmap is not None and manter:
+                vetores = np.array(self._mmap[manter])
+            else:
+                vetores = np.zeros((0, self.dim), np.float32)
+            novos_meta = [self._meta[i] for i in manter]
+            # Fecha o mmap antes de substituir o arquivo: no Windows o os.replace
+            # falha com PermissionError enquanto houver um mapeamento aberto
+            self._fechar_mmap()
+            tmp = self._vec_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(vetores.astype(np.float32).tobytes())
+            os.replace(tmp, self._vec_path)
+            self._meta = novos_meta
+            self._reescrever_meta()
+            self._remapear()
+            return antes - self.size_bytes()
+
+    def _fechar_mmap(self):
+        mapa = getattr(self._mmap, "_mmap", None)
+        self._mmap = None
+        if mapa is not None:
+            try:
+                mapa.close()
+            except (BufferError, ValueError):
+                pass  # ainda exportado por alguma view: o GC solta ao perder a referência
@@ -12,6 +12,7 @@ from core.gui_app import AeonTerminal
 class SphereUI(QWidget):
     # Sinal para atualizar a GUI de forma segura (Thread-Safe)
     update_signal = pyqtSignal(str, str)
+    caption_signal = pyqtSignal(str, str)
     status_signal = pyqtSignal(str)
     hotkey_signal = pyqtSignal()
 
@@ -72,6 +73,7 @@ class SphereUI(QWidget):
         
         # Conecta sinais
         self.update_signal.connect(self._update_gui_thread)
+        self.caption_signal.connect(self._show_caption)
         self.status_signal.connect(self._update_status_thread)
 
         # Configura Hotkey Global (Restauração)
@@ -171,7 +173,20 @@ class SphereUI(QWidget):
     def add_message(self, text, sender="SISTEMA"):
         self.update_signal.emit(text, sender)
 
+    def set_caption(self, text, sender="AEON"):
+        """Atualiza apenas a legenda (texto parcial/streaming), sem disparar a animação de fala."""
+        self.caption_signal.emit(text, sender)
+
     def _update_gui_thread(self, text, sender):
+        self._show_caption(text, sender)
+        
+        if sender == "AEON":
+            self.is_speaking = True
+            # Para de "falar" visualmente após um tempo estimado (baseado no tamanho do texto)
+            tempo_leitura = max(2000, len(text) * 80)
+            QTimer.singleShot(tempo_leitura, lambda: setattr(self, 'is_speaking', False))
+
+    def _show_caption(self, text, sender):
         prefix = f"{sender}: " if sender != "SISTEMA" else ""
         self.lbl_caption.setText(f"{prefix}{text}")
         self.lbl_caption.adjustSize()
@@ -184,12 +199,6 @@ class SphereUI(QWidget):
         # Move para ficar centrado e acima da esfera
         self.lbl_caption.move(center_x - lbl_w // 2, center_y - base_radius - lbl_h - 12)
         self.lbl_caption.show()
-        
-        if sender == "AEON":
-            self.is_speaking = True
-            # Para de "falar" visualmente após um tempo estimado (baseado no tamanho do texto)
-            tempo_leitura = max(2000, len(text) * 80)
-            QTimer.singleShot(tempo_leitura, lambda: setattr(self, 'is_speaking', False))
 
     def animate(self):
         self.pulse_phase += 0.05
@@ -1,14 +1,18 @@
+import io
 import os
 import re
-import asyncio
-import random
+import queue
 import threading
+import uuid
 import time
 import pygame
 import edge_tts
 import pyttsx3
 import soundfile as sf
 
+from core.async_loop import AsyncLoopService
+from core.tts_cache import TTSCache
+
 # Para converter MP3 para WAV
 try:
     from pydub import AudioSegment
@@ -22,11 +26,36 @@ except ImportError:
 def log_display(msg):
     print(f"[IO_HANDLER] {msg}")
 
+# Quebra de frase: pontuação final seguida de espaço, ou quebra de linha
+_FIM_DE_FRASE = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+def _limpar_texto(texto: str) -> str:
+    """Remove marcações de markdown que o TTS leria em voz alta."""
+    return re.sub(r'[*_#`]', '', texto).strip()
+
+class AudioEmMemoria:
+    """Áudio já codificado (WAV/MP3) mantido em RAM, sem passar pelo disco."""
+    __slots__ = ("dados", "formato")
+
+    def __init__(self, dados: bytes, formato: str = "wav"):
+        self.dados = dados
+        self.formato = formato
+
+# Respostas fixas mais comuns, pré-sintetizadas no boot se ainda não estiverem no cache
+FRASES_FREQUENTES = [
+    "Estou pronto.", "Ok.", "Próxima.", "Sistema Online.",
+    "Audição pausada.", "Já estou ouvindo.",
+]
+
+def _dividir_frases(texto: str) -> list:
+    """Quebra o texto em frases para sintetizar uma enquanto a anterior toca."""
+    return [f.strip() for f in _FIM_DE_FRASE.split(texto) if f.strip()]
+
 class IOHandler:
     """
     Gerencia áudio com proteção contra falhas de DLL e Threads.
     """
-    def __init__(self, config: dict, context_manager, installer=None):
+    def __init__(self, config: dict, context_manager, installer=None, prewarm_kokoro=None, on_timing=None):
         self.config = config if config else {}
         self.installer = installer
         self.context_manager = context_manager
@@ -38,6 +67,31 @@ class IOHandler:
         self.kokoro = None
         self.kokoro_loaded = False
         self.kokoro_failed = False
+        self._kokoro_lock = threading.Lock()
+        self._kokoro_sintetizou = False
+        # Sinalizado quando a tentativa de carregar o Kokoro termina (sucesso ou falha)
+        self.kokoro_pronto = threading.Event()
+        self._kokoro_carregando = False
+
+        # Hook de tempos: on_timing(nome, segundos). Também guardado em self.timings.
+        self.on_timing = on_timing
+        self.timings = {}
+
+        # Vozes/velocidade (fazem parte da chave do cache de frases)
+        self.kokoro_voice = "bm_lewis"
+        self.velocidade = 1.0
+
+        # Pipeline de fala: frases -> síntese (worker) -> reprodução (worker), sempre em ordem.
+        # A frase N+1 é sintetizada enquanto a frase N toca. calar_boca() avança a geração
+        # e tudo que foi enfileirado antes é descartado.
+        self._fila_sintese = queue.Queue()
+        self._fila_reproducao = queue.Queue(maxsize=1)
+        self._geracao = 0
+        self._fala_lock = threading.Lock()
+        self._pipeline_iniciado = False
+
+        # Loop asyncio único para motores assíncronos (edge-tts), criado sob demanda
+        self.async_loop = AsyncLoopService(max_concurrent=self.config.get("tts_max_concurrent", 2))
 
         # Caminhos
         base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -46,6 +100,17 @@ class IOHandler:
         self.voices_path = os.path.join(base_path, "bagagem", "kokoro", "voices.json")
         
         os.makedirs(self.temp_audio_path, exist_ok=True)
+
+        # Cache persistente de frases sintetizadas (hits tocam sem carregar o Kokoro)
+        try:
+            self.tts_cache = TTSCache(
+                os.path.join(base_path, "bagagem", "tts_cache"),
+                max_bytes=int(self.config.get("tts_cache_mb", 50)) * 1024 * 1024,
+                fixas=FRASES_FREQUENTES
+            )
+        except Exception as e:
+            log_display(f"Cache de TTS desabilitado: {e}")
+            self.tts_cache = None
         
         # Inicializa Pygame Mixer
         try: 
@@ -53,11 +118,86 @@ class IOHandler:
         except Exception as e: 
             log_display(f"Erro mixer: {e}")
 
+        # Aquecimento opcional do Kokoro em background (opt-in: 'kokoro_prewarm' no system.json)
+        if prewarm_kokoro is None:
+            prewarm_kokoro = bool(self.config.get("kokoro_prewarm", False))
+        self.kokoro_prewarm = prewarm_kokoro
+        if prewarm_kokoro:
+            self.warmup_kokoro()
+
+    def _reportar_tempo(self, nome: str, segundos: float):
+        self.timings[nome] = segundos
+        log_display(f"[TEMPO] {nome}: {segundos:.2f}s")
+        if self.on_timing:
+            try:
+                self.on_timing(nome, segundos)
+            except Exception as e:
+                log_display(f"Erro no hook de tempos: {e}")
+
+    def warmup_kokoro(self):
+        """Carrega o Kokoro e roda uma síntese mínima em uma thread, sem bloquear o boot."""
+        if self.kokoro_loaded or self.kokoro_failed:
+            return
+        self._kokoro_carregando = True
+        threading.Thread(target=self._aquecer_kokoro, daemon=True).start()
+
+    def _aquecer_kokoro(self):
+        self._lazy_load_kokoro()
+        if not self.kokoro or self._kokoro_sintetizou:
+            return
+        try:
+            # Primeira execução do grafo ONNX é a mais lenta; paga aqui, fora da fala
+            self._kokoro_create("Ok.")
+        except Exception as e:
+            log_display(f"[AVISO] Aquecimento do Kokoro falhou: {e}")
+
+    def aguardar_kokoro(self, timeout: float = None) -> bool:
+        """Espera a carga do Kokoro terminar. Retorna True se ele está pronto para uso."""
+        if not self.kokoro_pronto.is_set() and not self._kokoro_carregando:
+            # Nenhuma carga em andamento (aquecimento desligado): esperar seria para sempre
+            return self.kokoro_loaded
+        self.kokoro_pronto.wait(timeout)
+        return self.kokoro_loaded
+
+    @property
+    def edge_voice(self) -> str:
+        """Voz do Edge-TTS; lida do config a cada uso para refletir 'mudar a voz para'."""
+        return self.config.get("VOICE", "pt-BR-AntonioNeural")
+
     def _lazy_load_kokoro(self):
         """Carrega o motor Kokoro apenas quando chamado pela primeira vez."""
         if self.kokoro_loaded or self.kokoro_failed:
             return
+        # Se o aquecimento em background estiver no meio da carga, espera por ele aqui
+        with self._kokoro_lock:
+            if self.kokoro_loaded or self.kokoro_failed:
+                return
+            inicio = time.perf_counter()
+            self._kokoro_carregando = True
+            try:
+                self._carregar_kokoro()
+            finally:
+                self.kokoro_pronto.set()
+                self._kokoro_carregando = False
+            if self.kokoro_loaded:
+                self._reportar_tempo("kokoro_load", time.perf_counter() - inicio)
+
+    def _kokoro_create(self, texto: str):
+        """Chama o Kokoro, medindo a primeira síntese da sessão (inclui o warm-up do grafo)."""
+        inicio = time.perf_counter()
+        resultado = self.kokoro.create(
+            texto, 
+            voice=self.kokoro_voice, 
+            speed=self.velocidade, 
+            lang="pt-br"
+        )
+        if not self._kokoro_sintetizou:
+            self._kokoro_sintetizou = True
+            self._reportar_tempo("kokoro_first_synthesis", time.perf_counter() - inicio)
+        return resultado
 
+    def _carregar_kokoro(self):
+        """Carregamento efetivo do Kokoro (chamar com _kokoro_lock)."""
         if os.path.exists(self.kokoro_path):
             try:
                 log_display("Tentando carregar motor neural (Kokoro) - Lazy Load...")
@@ -75,7 +215,63 @@ class IOHandler:
             log_display("Arquivo do Kokoro não encontrado. Usando fallback.")
             self.kokoro_failed = True
 
-    def _tocar_audio(self, arquivo: str):
+    def _esperar_canal(self, canal):
+        """Espera um canal do mixer terminar, respeitando parar_fala."""
+        while canal is not None and canal.get_busy():
+            if self.parar_fala:
+                canal.stop()
+                break
+            time.sleep(0.05)
+
+    def _tocar_memoria(self, audio: AudioEmMemoria):
+        """Toca áudio direto da RAM. Se o mixer recusar o buffer, cai para o caminho com arquivo."""
+        with self.audio_lock:
+            # 1. Sound a partir de um buffer (decodifica WAV/MP3/OGG e converte para o formato do mixer)
+            try:
+                som = pygame.mixer.Sound(file=io.BytesIO(audio.dados))
+                self._esperar_canal(som.play())
+                return
+            except Exception as e:
+                log_display(f"Sound(buffer) falhou ({audio.formato}): {e}. Tentando mixer.music...")
+
+            # 2. mixer.music aceita objetos file-like com dica de formato
+            try:
+                if pygame.mixer.music.get_busy():
+                    pygame.mixer.music.stop()
+                pygame.mixer.music.load(io.BytesIO(audio.dados), audio.formato)
+                pygame.mixer.music.play()
+                while pygame.mixer.music.get_busy():
+                    if self.parar_fala:
+                        pygame.mixer.music.stop()
+                        break
+                    time.sleep(0.05)
+                try: pygame.mixer.music.unload()
+                except Exception: pass
+                return
+            except Exception as e:
+                log_display(f"mixer.music em memória falhou: {e}. Usando arquivo temporário...")
+
+        # 3. Último recurso: grava em disco e usa o caminho antigo
+        arquivo = self._novo_arquivo_temp(audio.formato)
+        try:
+            with open(arquivo, "wb") as f:
+                f.write(audio.dados)
+        except OSError as e:
+            log_display(f"Erro ao gravar áudio temporário: {e}")
+            return
+        self._tocar_arquivo(arquivo)
+
+    def _tocar_audio(self, audio):
+        """Toca um áudio sintetizado: em memória (preferencial) ou caminho de arquivo."""
+        if isinstance(audio, AudioEmMemoria):
+            self._tocar_memoria(audio)
+        else:
+            self._tocar_arquivo(audio)
+
+    def _novo_arquivo_temp(self, extensao: str = "wav") -> str:
+        return os.path.join(self.temp_audio_path, f"fala_{uuid.uuid4().hex}.{extensao}")
+
+    def _tocar_arquivo(self, arquivo: str):
         # Se for MP3, tenta converter para WAV primeiro
         if arquivo.endswith('.mp3'):
             arquivo_wav = arquivo.replace('.mp3', '.wav')
@@ -133,12 +329,12 @@ class IOHandler:
             if os.path.exists(arquivo): os.remove(arquivo)
         except: pass
 
-    def falar(self, texto: str):
-        """Inicia a geração e reprodução da fala em uma nova thread."""
-        if self.muted: return
-        if not texto: return
+    def _registrar_fala(self, texto: str):
+        """Registra a fala no console e no log de conversa (respeita o modo oculto)."""
         try:
             # Apenas registra no log se o modo oculto NÃO estiver ativo
+            # Leitura síncrona (lado de leitura do RWLock): uma cópia atualizada por
+            # evento assíncrono poderia gravar a primeira fala depois de ativar o modo oculto
             if self.context_manager and not self.context_manager.get('stealth_mode'):
                 print(f"[AEON_TTS] {texto}")
                 with open("bagagem/temp/conversation.log", "a", encoding="utf-8") as f:
@@ -148,73 +344,250 @@ class IOHandler:
                 print(f"[AEON_TTS_STEALTH] {texto}")
         except Exception:
             pass
-        
-        # Roda o processo de fala em background para não travar
-        thread_fala = threading.Thread(target=self._falar_worker, args=(texto,), daemon=True)
-        thread_fala.start()
 
-    def _falar_worker(self, texto: str):
-        """Lógica de geração de áudio que roda em background."""
-        self.parar_fala = False
-        
-        clean_text = re.sub(r'[*_#`]', '', texto).strip()
+    def falar(self, texto: str):
+        """Enfileira a fala no pipeline (frase a frase) e retorna imediatamente."""
+        if self.muted: return
+        if not texto: return
+        self._registrar_fala(texto)
+
+        clean_text = _limpar_texto(texto)
         if len(clean_text) > 800: clean_text = clean_text[:800] + "..."
         if not clean_text: return
 
-        temp_file = os.path.join(self.temp_audio_path, f"fala_{random.randint(1000, 9999)}.wav")
+        self._garantir_pipeline()
+        geracao = self._geracao
+        for frase in _dividir_frases(clean_text):
+            self._fila_sintese.put((geracao, frase))
+
+    def falar_stream(self, fragmentos):
+        """
+        Fala um texto que chega aos pedaços (ex: tokens do Brain), frase a frase.
+        `fragmentos` é um iterável consumido em uma thread própria: cada frase completa
+        entra no pipeline assim que termina de chegar, sem esperar a resposta inteira.
+        """
+        if self.muted: return
+        self._garantir_pipeline()
+        thread_fala = threading.Thread(target=self._falar_stream_worker, args=(fragmentos, self._geracao), daemon=True)
+        thread_fala.start()
+
+    def _falar_stream_worker(self, fragmentos, geracao):
+        buffer = ""
+        for pedaco in fragmentos:
+            if geracao != self._geracao:
+                return
+            buffer += pedaco
+            frases = _FIM_DE_FRASE.split(buffer)
+            # O último pedaço ainda pode estar incompleto
+            buffer = frases.pop()
+            for frase in frases:
+                self._enfileirar_frase(frase, geracao)
+        if geracao == self._geracao:
+            self._enfileirar_frase(buffer, geracao)
+
+    def _enfileirar_frase(self, frase: str, geracao: int):
+        clean_text = _limpar_texto(frase)
+        if not clean_text: return
+        self._registrar_fala(clean_text)
+        self._fila_sintese.put((geracao, clean_text))
+
+    def _garantir_pipeline(self):
+        """Sobe os workers de síntese e reprodução na primeira fala."""
+        with self._fala_lock:
+            if self._pipeline_iniciado:
+                return
+            self._pipeline_iniciado = True
+        threading.Thread(target=self._sintese_worker, daemon=True).start()
+        threading.Thread(target=self._reproducao_worker, daemon=True).start()
+
+    def _sintese_worker(self):
+        """Sintetiza as frases em ordem e entrega ao worker de reprodução."""
+        while True:
+            geracao, frase = self._fila_sintese.get()
+            if geracao != self._geracao:
+                continue
+            try:
+                arquivo = self._sintetizar(frase)
+            except Exception as e:
+                log_display(f"Erro na síntese: {e}")
+                continue
+            if not arquivo:
+                continue
+            if geracao != self._geracao:
+                self._descartar_audio(arquivo)
+                continue
+            # Bloqueia enquanto a frase anterior ainda espera para tocar (no máx. uma à frente)
+            self._fila_reproducao.put((geracao, arquivo))
+
+    def _reproducao_worker(self):
+        """Toca os áudios prontos, um por vez, na ordem em que foram enfileirados."""
+        while True:
+            geracao, arquivo = self._fila_reproducao.get()
+            with self._fala_lock:
+                atual = geracao == self._geracao
+                if atual:
+                    self.parar_fala = False
+            if not atual:
+                self._descartar_audio(arquivo)
+                continue
+            try:
+                self._tocar_audio(arquivo)
+            except Exception as e:
+                log_display(f"Erro na reprodução: {e}")
+
+    def _descartar_audio(self, arquivo):
+        if isinstance(arquivo, AudioEmMemoria):
+            return
+        try:
+            if os.path.exists(arquivo): os.remove(arquivo)
+        except OSError: pass
+
+    def _esvaziar_filas(self):
+        """Remove o que ainda estava pendente no pipeline (após calar_boca)."""
+        while True:
+            try:
+                self._fila_sintese.get_nowait()
+            except queue.Empty:
+                break
+        while True:
+            try:
+                _, arquivo = self._fila_reproducao.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar_audio(arquivo)
+
+    def _sintetizar(self, clean_text: str):
+        """
+        Gera o áudio da fala (Kokoro -> Edge-TTS -> pyttsx3).
+        Retorna AudioEmMemoria (Kokoro/Edge), o caminho de um arquivo (pyttsx3) ou None.
+        """
+        # 0. Cache de frases: um hit toca na hora, sem carregar nenhum motor
+        if self.tts_cache:
+            encontrado = self.tts_cache.get_first(self._configs_tts(), clean_text)
+            if encontrado:
+                return AudioEmMemoria(*encontrado)
 
         # Garante que o Kokoro seja carregado antes de usar
         self._lazy_load_kokoro()
 
-        # 1. Tenta KOKORO
+        # 1. Tenta KOKORO (amostras NumPy -> WAV em memória)
         if self.kokoro:
             try:
-                samples, sample_rate = self.kokoro.create(
-                    clean_text, 
-                    voice="bm_lewis", 
-                    speed=1.0, 
-                    lang="pt-br"
-                )
-                sf.write(temp_file, samples, sample_rate)
-                self._tocar_audio(temp_file)
-                return
+                samples, sample_rate = self._kokoro_create(clean_text)
+                buffer = io.BytesIO()
+                sf.write(buffer, samples, sample_rate, format="WAV", subtype="PCM_16")
+                audio = AudioEmMemoria(buffer.getvalue(), "wav")
+                self._guardar_cache("kokoro", self.kokoro_voice, clean_text, audio)
+                return audio
             except Exception as e:
                 log_display(f"Erro ao gerar fala Kokoro: {e}")
 
-        # 2. Fallback EDGE-TTS (Se Kokoro falhar ou não existir)
+        # 2. Fallback EDGE-TTS (Se Kokoro falhar ou não existir): bytes MP3 do stream
         try:
-            # edge-tts precisa de um loop de evento asyncio
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            async def save_edge():
-                com = edge_tts.Communicate(clean_text, "pt-BR-AntonioNeural")
-                await com.save(temp_file)
+            async def coletar_edge():
+                com = edge_tts.Communicate(clean_text, self.edge_voice)
+                dados = bytearray()
+                async for chunk in com.stream():
+                    if chunk["type"] == "audio":
+                        dados.extend(chunk["data"])
+                return bytes(dados)
             
-            loop.run_until_complete(save_edge())
-            loop.close()
+            # Roda no loop persistente (sem criar/fechar um loop por frase)
+            dados = self.run_async(coletar_edge(), timeout=30)
 
-            self._tocar_audio(temp_file)
-            return
+            if dados:
+                audio = AudioEmMemoria(dados, "mp3")
+                self._guardar_cache("edge", self.edge_voice, clean_text, audio)
+                return audio
         except Exception as e:
             log_display(f"Erro no Edge-TTS: {e}")
 
-        # 3. Fallback PYTTSX3 (Último recurso)
+        # 3. Fallback PYTTSX3 (Último recurso): só sabe gravar em arquivo
         try:
+            temp_file = self._novo_arquivo_temp("wav")
             engine = pyttsx3.init()
             engine.save_to_file(clean_text, temp_file)
             engine.runAndWait()
-            self._tocar_audio(temp_file)
+            return temp_file
         except Exception as e: 
             log_display(f"Todos os métodos de fala falharam. Erro final: {e}")
+        return None
+
+    def _configs_tts(self) -> list:
+        """(motor, voz, velocidade) na ordem de preferência, para consultar o cache."""
+        configs = []
+        if not self.kokoro_failed:
+            configs.append(("kokoro", self.kokoro_voice, self.velocidade))
+        configs.append(("edge", self.edge_voice, self.velocidade))
+        return configs
+
+    def _guardar_cache(self, motor: str, voz: str, texto: str, audio: AudioEmMemoria):
+        if not self.tts_cache:
+            return
+        try:
+            self.tts_cache.put(motor, voz, self.velocidade, texto, audio.dados, audio.formato)
+        except Exception as e:
+            log_display(f"Erro ao guardar no cache de TTS: {e}")
+
+    def prewarm_cache(self, frases=None, top_n: int = 20):
+        """
+        Pré-aquece o cache de TTS em background: sobe para a RAM as frases mais
+        tocadas e sintetiza as respostas fixas que ainda não estão no cache.
+        A síntese só acontece se o Kokoro foi aquecido por opção ('kokoro_prewarm')
+        ou se sintetizar não exige carregá-lo; senão o boot não paga o Kokoro.
+        """
+        if not self.tts_cache:
+            return
+        frases = FRASES_FREQUENTES if frases is None else frases
+        self.tts_cache.fixar(frases)
+
+        def aquecer():
+            try:
+                chaves = [chave for chave, _ in self.tts_cache.mais_frequentes(top_n)]
+                carregadas = self.tts_cache.carregar_em_memoria(chaves)
+                faltando = [f for f in frases if not self.tts_cache.contem(self._configs_tts(), f)]
+                if faltando and self.kokoro_prewarm:
+                    self.aguardar_kokoro(timeout=120)
+                elif faltando and not self._sintese_barata():
+                    log_display(f"Cache de TTS: {carregadas} em RAM; {len(faltando)} frases ficam para a primeira fala.")
+                    return
+                for frase in faltando:
+                    self._sintetizar(_limpar_texto(frase))
+                log_display(f"Cache de TTS aquecido: {carregadas} em RAM, {len(faltando)} sintetizadas.")
+            except Exception as e:
+                log_display(f"Erro no pré-aquecimento do cache de TTS: {e}")
+
+        threading.Thread(target=aquecer, daemon=True).start()
+
+    def _sintese_barata(self) -> bool:
+        """Sintetizar agora não carrega o Kokoro (já carregado, já falhou ou sem modelo: vai de Edge)."""
+        return self.kokoro_loaded or self.kokoro_failed or not os.path.exists(self.kokoro_path)
+
+    def run_async(self, coro, timeout: float = None):
+        """Executa uma corrotina no loop asyncio compartilhado e retorna o resultado."""
+        return self.async_loop.run(coro, timeout=timeout)
+
+    def shutdown(self):
+        """Encerra os serviços em background (chamado na saída)."""
+        self.calar_boca()
+        self.async_loop.stop()
+        if self.tts_cache:
+            self.tts_cache.flush()
 
     def play_feedback_sound(self, tipo):
         pass
 
     def calar_boca(self):
-        self.parar_fala = True
+        """Interrompe a fala atual e cancela tudo que estava na fila (síntese e reprodução)."""
+        with self._fala_lock:
+            self._geracao += 1
+            self.parar_fala = True
+        self._esvaziar_filas()
         try: pygame.mixer.music.stop()
         except: pass
+        # Áudios em memória tocam em canais de Sound, não no mixer.music
+        try: pygame.mixer.stop()
+        except: pass
 
     def cleanup_temp_files(self):
         """Limpa arquivos de áudio (.wav, .mp3) temporários."""
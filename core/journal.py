@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+
+
+def log_display(msg):
+    print(f"[JOURNAL] {msg}")
+
+
+def _fsync(f):
+    f.flush()
+    try:
+        os.fsync(f.fileno())
+    except OSError:
+        pass
+
+
+class JournaledStore:
+    """
+    Estado persistido como snapshot + journal JSONL append-only.
+
+    Cada alteração vira uma linha {"seq": n, "op": ...} no fim do journal (custo
+    do tamanho do registro, não do arquivo). Ao carregar, o snapshot é lido e os
+    registros com seq maior que o dele são reaplicados com `apply_fn(state, rec)`.
+    A cada `compact_every` registros o estado vira um snapshot novo (troca
+    atômica) e o journal é zerado; uma queda entre os dois passos é segura porque
+    registros já contidos no snapshot são ignorados pelo seq.
+
+    Args:
+        base_path: Caminho base (sem extensão): gera .snapshot.json e .journal.jsonl.
+        default: Função que cria o estado vazio.
+        apply_fn: Função (state, registro) -> novo state (pode alterar in-place e retornar o mesmo).
+        legacy_path: JSON antigo (formato sem journal) importado no primeiro boot.
+        fsync: "always" (a cada registro), "batch" (no máximo um fsync por `fsync_interval_s`) ou "never".
+    """
+    def __init__(self, base_path, default, apply_fn, legacy_path=None, fsync: str = "batch",
+                 fsync_interval_s: float = 1.0, compact_every: int = 500):
+        base_path = str(base_path)
+        self.snapshot_path = base_path + ".snapshot.json"
+        self.journal_path = base_path + ".journal.jsonl"
+        self.legacy_path = str(legacy_path) if legacy_path else None
+        self.apply_fn = apply_fn
+        self.fsync = fsync
+        self.fsync_interval_s = fsync_interval_s
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._default = default
+        self._ultimo_fsync = 0.0
+        self._pendente_fsync = False
+        self._desde_snapshot = 0
+        self.seq = 0
+        self.state = self._carregar()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if not os.path.exists(self.snapshot_path):
+            # Primeiro boot (ou migração do JSON antigo): fixa o ponto de partida
+            self.compact()
+
+    # --- Carga ---
+    def _carregar(self):
+        state, self.seq = self._ler_snapshot()
+        if not os.path.exists(self.journal_path):
+            return state
+
+        valido = 0
+        with open(self.journal_path, "rb") as f:
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break  # última linha cortada por queda no meio da escrita
+                try:
+                    rec = json.loads(linha.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                valido += len(linha)
+                if rec.get("seq", 0) <= self.seq:
+                    continue  # já está no snapshot
+                state = self.apply_fn(state, rec)
+                self.seq = rec["seq"]
+                self._desde_snapshot += 1
+
+        if valido < os.path.getsize(self.journal_path):
+            log_display(f"Journal {os.path.basename(self.journal_path)} tinha um registro incompleto; descartado.")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(valido)
+        return state
+
+    def _ler_snapshot(self):
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snap = json.load(f)
+                return snap["data"], int(snap.get("seq", 0))
+            except (OSError, ValueError, KeyError) as e:
+                log_display(f"Snapshot ilegível ({self.snapshot_path}): {e}")
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r", encoding="utf-8") as f:
+                    return json.load(f), 0
+            except (OSError, ValueError):
+                pass
+        return self._default(), 0
+
+    # --- Escrita ---
+    def append(self, op: str, **dados):
+        """Aplica e registra uma operação. Retorna o estado atualizado."""
+        with self._lock:
+            rec = {"seq": self.seq + 1, "op": op, **dados}
+            self.state = self.apply_fn(self.state, rec)
+            self.seq = rec["seq"]
+            self._journal.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._pos_escrita()
+            self._desde_snapshot += 1
+            if self._desde_snapshot >= self.compact_every:
+                self.compact()
+            return self.state
+
+    def _pos_escrita(self):
+        if self.fsync == "always":
+            _fsync(self._journal)
+            return
+        self._journal.flush()
+        if self.fsync == "batch":
+            agora = time.monotonic()
+            if agora - self._ultimo_fsync >= self.fsync_interval_s:
+                _fsync(self._journal)
+                self._ultimo_fsync = agora
+                self._pendente_fsync = False
+            else:
+                self._pendente_fsync = True
+
+    def sync(self):
+        """Garante em disco o que foi escrito (fsync pendente do modo batch)."""
+        with self._lock:
+            if self._pendente_fsync:
+                _fsync(self._journal)
+                self._pendente_fsync = False
+
+    def compact(self):
+        """Grava o estado como snapshot (atômico) e zera o journal."""
+        with self._lock:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"seq": self.seq, "data": self.state}, f, ensure_ascii=False)
+                _fsync(f)
+            os.replace(tmp, self.snapshot_path)
+            self._journal.close()
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+            self._desde_snapshot = 0
+            self._pendente_fsync = False
+
+    def close(self):
+        """Compacta e fecha o journal (saída do programa)."""
+        with self._lock:
+            if self._journal.closed:
+                return
+            if self._desde_snapshot:
+                self.compact()
+            self._journal.close()
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Cache LRU limitado e thread-safe, com contadores de acerto/erro para diagnóstico.
+    Usado para memoizar trabalho repetido (comandos de voz curtos se repetem muito).
+
+    Com `ttl` (segundos), cada valor expira após esse tempo: leitura de item
+    vencido conta como miss e o remove.
+    """
+    def __init__(self, maxsize: int = 256, ttl: float = None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._lookup(key) is not _MISSING
+
+    def _lookup(self, key):
+        """Valor vivo da chave ou _MISSING (remove o item se expirou). Chamar com o lock."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        value, expires = entry
+        if expires is not None and self._clock() >= expires:
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def get(self, key, default=None):
+        """Retorna o valor (marcando como recente) ou `default`. Conta hit/miss."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Insere/atualiza o valor, descartando o menos recente se passar do limite."""
+        expires = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                return default
+            del self._data[key]
+            return value
+
+    def items(self) -> list:
+        """Cópia dos pares (chave, valor) vivos, do menos ao mais recente."""
+        with self._lock:
+            agora = self._clock() if self.ttl is not None else None
+            return [(k, v) for k, (v, exp) in self._data.items() if exp is None or agora < exp]
+
+    def clear(self):
+        """Esvazia o cache (os contadores são mantidos)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Resumo para diagnóstico: tamanho, hits, misses e taxa de acerto."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
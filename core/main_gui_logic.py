@@ -1,4 +1,6 @@
+import queue
 import threading
+import time
 
 class MainLogic:
     def __init__(self, gui):
@@ -67,8 +69,13 @@ class MainLogic:
                  # Aqui o Brain entraria, mas para simplificar o exemplo, vamos assumir que o route_command
                  # já lidou com isso ou retornou None. Se retornou None, o Brain processa.
                  # (Assumindo que o Brain está conectado no module_manager ou aqui)
-                 if self.module_manager.core_context.get('brain'):
-                     final_response_text = self.module_manager.core_context['brain'].pensar(text)
+                 brain = self.module_manager.core_context.get('brain')
+                 if brain and hasattr(brain, 'pensar_stream'):
+                     final_response_text = self._pensar_streaming(brain, text)
+                     if final_response_text:
+                         self.gui.add_message(final_response_text, "AEON")
+                 elif brain:
+                     final_response_text = brain.pensar(text)
                      self.gui.add_message(final_response_text, "AEON")
                      if self.io: self.io.falar(final_response_text)
 
@@ -84,4 +91,28 @@ class MainLogic:
             self.gui.add_message(f"Erro: {e}", "ERRO")
             print(f"ERRO LOGIC: {e}")
         
-        self.gui.set_status("ONLINE")
\ No newline at end of file
+        self.gui.set_status("ONLINE")
+
+    def _pensar_streaming(self, brain, text):
+        """Consome a resposta do Brain em streaming: legenda incremental e fala frase a frase."""
+        fala = None
+        if self.io and hasattr(self.io, 'falar_stream'):
+            fala = queue.Queue()
+            self.io.falar_stream(iter(fala.get, None))
+
+        partes = []
+        ultimo_update = 0.0
+        try:
+            for pedaco in brain.pensar_stream(text):
+                partes.append(pedaco)
+                if fala is not None:
+                    fala.put(pedaco)
+                # Limita a ~20 atualizações/s para não inundar a fila de sinais da GUI
+                agora = time.monotonic()
+                if hasattr(self.gui, 'set_caption') and agora - ultimo_update > 0.05:
+                    self.gui.set_caption("".join(partes), "AEON")
+                    ultimo_update = agora
+        finally:
+            if fala is not None:
+                fala.put(None)
+        return "".join(partes)
\ No newline at end of file
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import numpy as np
+
+
+def log_display(msg):
+    print(f"[MEM_MAINT] {msg}")
+
+
+# Política padrão (sobrescrita pela chave "vector_retention" do system.json)
+RETENCAO_PADRAO = {
+    "dedup_threshold": 0.97,       # cosseno a partir do qual duas interações são "a mesma"
+    "dedup_max_entries": 20000,    # só as N mais recentes entram na deduplicação (custo O(N²))
+    "low_value_max_chars": 80,     # interações curtas ("Volume aumentado")...
+    "low_value_days": None,        # ...descartadas após N dias. Opt-in: None = nunca
+                                   # (o tamanho não distingue "Ok." de "meu aniversário é 3/5")
+    "max_age_days": None,          # None = sem limite de idade para o resto
+    "max_entries": 50000,          # acima disso, descarta as mais antigas
+}
+
+
+def politica_retencao(config: dict = None) -> dict:
+    politica = dict(RETENCAO_PADRAO)
+    for chave, valor in (config or {}).items():
+        if chave in politica:
+            politica[chave] = valor
+    return politica
+
+
+def planejar_compactacao(ids, embeddings, timestamps, documents, politica: dict, agora: float = None, bloco: int = 1024):
+    """
+    Decide o que remover do store vetorial. Não altera nada.
+
+    Args:
+        ids: Lista de ids.
+        embeddings: Matriz (n, dim) normalizada em L2.
+        timestamps: Lista de timestamps (segundos).
+        documents: Lista de textos.
+        politica: Ver RETENCAO_PADRAO.
+
+    Returns:
+        (set de ids a remover, {"duplicates": n, "low_value": n, "expired": n, "over_limit": n})
+    """
+    agora = time.time() if agora is None else agora
+    n = len(ids)
+    motivos = {"duplicates": 0, "low_value": 0, "expired": 0, "over_limit": 0}
+    if n == 0:
+        return set(), motivos
+
+    remover = np.zeros(n, dtype=bool)
+    ts = np.asarray([t or 0.0 for t in timestamps], dtype=np.float64)
+    ordem = np.argsort(-ts, kind="stable")  # mais recentes primeiro
+    dia = 86400.0
+
+    # 1. Retenção por valor e idade
+    for i in range(n):
+        idade = agora - ts[i]
+        max_age = politica.get("max_age_days")
+        if max_age is not None and idade > max_age * dia:
+            remover[i] = True
+            motivos["expired"] += 1
+        elif (politica.get("low_value_days") is not None and idade > politica["low_value_days"] * dia
+              and len(documents[i] or "") <= politica["low_value_max_chars"]):
+            remover[i] = True
+            motivos["low_value"] += 1
+
+    # 2. Deduplicação: mantém a mais recente de cada grupo de quase-iguais
+    candidatos = [i for i in ordem[:politica["dedup_max_entries"]] if not remover[i]]
+    if candidatos:
+        matriz = np.asarray(embeddings, dtype=np.float32)[candidatos]
+        limiar = politica["dedup_threshold"]
+        mantidos = np.zeros(len(candidatos), dtype=bool)
+        for inicio in range(0, len(candidatos), bloco):
+            fim = min(inicio + bloco, len(candidatos))
+            sub = matriz[inicio:fim]
+            # Contra os já mantidos dos blocos anteriores
+            anteriores = np.flatnonzero(mantidos[:inicio])
+            dup = np.zeros(fim - inicio, dtype=bool)
+            if anteriores.size:
+                dup |= (sub @ matriz[anteriores].T).max(axis=1) >= limiar
+            # Dentro do bloco, na ordem (mais recente primeiro)
+            sims = sub @ sub.T
+            for k in range(fim - inicio):
+                if dup[k]:
+                    continue
+                mantidos[inicio + k] = True
+                dup[k + 1:] |= sims[k, k + 1:] >= limiar
+            for k in np.flatnonzero(dup):
+                remover[candidatos[inicio + k]] = True
+                motivos["duplicates"] += 1
+
+    # 3. Limite de quantidade: descarta as mais antigas que sobraram
+    restantes = [i for i in ordem if not remover[i]]
+    excesso = len(restantes) - politica["max_entries"]
+    if excesso > 0:
+        for i in restantes[-excesso:]:
+            remover[i] = True
+            motivos["over_limit"] += 1
+
+    return {ids[i] for i in np.flatnonzero(remover)}, motivos
+
+
+class MaintenanceScheduler:
+    """
+    Roda a compactação da memória quando o sistema está ocioso: sem interação
+    há `idle_minutes` e a última compactação foi há mais de `interval_hours`.
+
+    Args:
+        job: Função sem argumentos que executa a compactação.
+        last_activity: Função que retorna o time.time() da última interação.
+        last_run: Timestamp da última execução (persistido por quem chama).
+        on_done: Callback(stats) ao terminar.
+    """
+    def __init__(self, job, last_activity, idle_minutes: float = 10, interval_hours: float = 24,
+                 check_every_s: float = 60, last_run: float = 0.0, on_done=None):
+        self.job = job
+        self.last_activity = last_activity
+        self.idle_s = idle_minutes * 60
+        self.interval_s = interval_hours * 3600
+        self.check_every_s = check_every_s
+        self.last_run = last_run or 0.0
+        self.on_done = on_done
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due(self, agora: float = None) -> bool:
+        agora = time.time() if agora is None else agora
+        return agora - self.last_run >= self.interval_s and agora - self.last_activity() >= self.idle_s
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="AeonMemMaintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_every_s):
+            if not self.due():
+                continue
+            try:
+                stats = self.job()
+            except Exception as e:
+                log_display(f"Erro na compactação agendada: {e}")
+                continue
+            # Só conta como feita se compactou (memória ainda carregando devolve {})
+            if stats:
+                self.last_run = time.time()
+                if self.on_done:
+                    self.on_done(stats)
@@ -1,65 +1,437 @@
 import os
-import chromadb
-from chromadb.utils import embedding_functions
+import threading
+import sqlite3
 import uuid
 import time
 
+import numpy as np
+
+
+from core.write_behind import WriteBehindQueue
+from core.embedding_cache import EmbeddingCache, normalizar_texto
+from core.lru_cache import LRUCache
+from core.memory_maintenance import planejar_compactacao, politica_retencao
+
+COLECAO = "aeon_long_term_memory"
+# Coleção temporária da reconstrução (compactação física do ChromaDB)
+COLECAO_NOVA = COLECAO + "_rebuild"
+
 class VectorMemory:
     """
     Memória de Longo Prazo usando ChromaDB.
     Transforma conversas em vetores para busca semântica.
+
+    Backends (`backend`):
+        "chroma": ChromaDB + SentenceTransformer.
+        "flat": índice plano embutido (mmap float32 + JSONL), embedder ONNX ou hashing, sem torch.
+        "auto": tenta chroma e cai para flat se ele não subir.
     """
-    def __init__(self, storage_path):
-        self.db_path = os.path.join(storage_path, "vector_db")
-        os.makedirs(self.db_path, exist_ok=True)
-        self.client = chromadb.PersistentClient(path=self.db_path)
-        
+    def __init__(self, storage_path, batch_size: int = 16, flush_interval_s: float = 2.0,
+                 embedding_cache_size: int = 1024, persist_embeddings: bool = True,
+                 result_cache_size: int = 128, result_ttl_s: float = 30.0,
+                 backend: str = "auto", onnx_model_dir: str = None):
+        self.storage_path = str(storage_path)
+        self.db_path = os.path.join(self.storage_path, "vector_db")
+
+        self.backend = None
+        self.client = None
         self.collection = None
+        self.index = None
         self.available = False
-        
+        self.embedding_cache = None
+        self._embedding_cache_size = embedding_cache_size
+        self._persist_embeddings = persist_embeddings
+        # Resultados de busca recentes; limpos sempre que um lote novo é gravado
+        self._result_cache = LRUCache(maxsize=result_cache_size, ttl=result_ttl_s)
+        self._lotes_gravados = 0
+        # Gravação de lotes e compactação não podem se cruzar
+        self._store_lock = threading.Lock()
+
+        if backend in ("auto", "chroma"):
+            self._init_chroma()
+        if not self.available and backend in ("auto", "flat"):
+            self._init_flat(onnx_model_dir or os.path.join(self.storage_path, "models", "minilm-onnx"))
+        if not self.available:
+            print("[VECTOR_MEM] Sistema continua funcionando sem memoria de longo prazo.")
+
+        # Gravação write-behind: quem chama store_interaction não espera embedding nem disco
+        self._fila_escrita = WriteBehindQueue(
+            self._gravar_lote, max_batch=batch_size, max_delay_s=flush_interval_s,
+            name="AeonVectorWriter"
+        )
+
+    def _init_chroma(self):
+        # Import pesado (segundos): só acontece aqui, na thread de inicialização
+        # ChromaDB + SentenceTransformer (torch) são opcionais: sem eles usamos o índice plano embutido
+        try:
+            import chromadb
+            from chromadb.utils import embedding_functions
+        except ImportError:
+            print("[VECTOR_MEM] AVISO - chromadb não instalado.")
+            return
         # Tenta inicializar com SentenceTransformer (pode falhar se PyTorch estiver quebrado)
         try:
+            os.makedirs(self.db_path, exist_ok=True)
+            self.client = chromadb.PersistentClient(path=self.db_path)
             self.embed_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
                 model_name="all-MiniLM-L6-v2"
             )
+            self._recuperar_reconstrucao()
             self.collection = self.client.get_or_create_collection(
-                name="aeon_long_term_memory",
+                name=COLECAO,
                 embedding_function=self.embed_fn
             )
+            self._criar_embedding_cache(self.db_path)
+            self.backend = "chroma"
             self.available = True
             print("[VECTOR_MEM] OK - VectorMemory inicializado com sucesso.")
+        except Exception as e:
+            print(f"[VECTOR_MEM] AVISO - ChromaDB/SentenceTransformer indisponível: {e}")
+            self.collection = None
+
+    def _init_flat(self, onnx_model_dir: str):
+        try:
+            from core.flat_index import FlatVectorIndex, criar_embedder
+            self.embed_fn = criar_embedder(onnx_model_dir)
+            dim = len(self.embed_fn(["dimensao"])[0])
+            # Uma pasta por embedder: vetores de modelos diferentes não se misturam
+            pasta = os.path.join(self.storage_path, "vector_flat", self.embed_fn.name)
+            self.index = FlatVectorIndex(pasta, dim)
+            self._criar_embedding_cache(pasta)
+            self.backend = "flat"
+            self.available = True
+            print(f"[VECTOR_MEM] OK - Índice plano ({self.embed_fn.name}, {len(self.index)} memórias).")
         except Exception as e:
             print(f"[VECTOR_MEM] AVISO - VectorMemory desabilitado: {e}")
-            print("[VECTOR_MEM] Sistema continua funcionando sem memoria de longo prazo.")
-            self.available = False
+            self.index = None
+
+    def _criar_embedding_cache(self, pasta: str):
+        self.embedding_cache = EmbeddingCache(
+            self.embed_fn, maxsize=self._embedding_cache_size,
+            persist_path=os.path.join(pasta, "embedding_cache.npz") if self._persist_embeddings else None
+        )
 
     def store_interaction(self, user_input, aeon_response):
-        """Guarda uma interação no banco vetorial."""
-        if not self.available or not self.collection:
+        """Enfileira uma interação para o banco vetorial (gravada em lote, em background)."""
+        if not self.available:
             return
-        
+        self._fila_escrita.put({
+            "document": f"Usuário: {user_input} | Aeon: {aeon_response}",
+            "id": str(uuid.uuid4()),
+            "metadata": {"timestamp": time.time()},
+        })
+
+    def _gravar_lote(self, itens):
+        """Uma única escrita por lote, com os embeddings calculados em uma chamada (via cache)."""
+        documentos = [i["document"] for i in itens]
         try:
-            text_to_embed = f"Usuário: {user_input} | Aeon: {aeon_response}"
-            self.collection.add(
-                documents=[text_to_embed],
-                ids=[str(uuid.uuid4())],
-                metadatas=[{"timestamp": time.time()}]
-            )
+            embeddings = self.embedding_cache.embed(documentos)
+            ids = [i["id"] for i in itens]
+            metadatas = [i["metadata"] for i in itens]
+            with self._store_lock:
+                if self.backend == "flat":
+                    self.index.add(embeddings, documentos, ids, metadatas)
+                else:
+                    self.collection.add(
+                        documents=documentos,
+                        embeddings=embeddings,
+                        ids=ids,
+                        metadatas=metadatas
+                    )
         except Exception as e:
-            print(f"[VECTOR_MEM] Erro ao armazenar: {e}")
+            print(f"[VECTOR_MEM] Erro ao armazenar lote de {len(itens)}: {e}")
+            raise
+        finally:
+            # Memórias novas podem mudar qualquer busca recente
+            self._lotes_gravados += 1
+            self._result_cache.clear()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Grava as interações pendentes e espera terminar."""
+        return self._fila_escrita.flush(timeout)
+
+    def close(self, timeout: float = 10.0):
+        """Grava o que falta e encerra a thread de escrita (chamado na saída)."""
+        ok = self._fila_escrita.stop(timeout)
+        if not ok:
+            print(f"[VECTOR_MEM] AVISO - {self._fila_escrita.pending()} interações não foram gravadas a tempo.")
+        if self.embedding_cache is not None:
+            self.embedding_cache.save()
+        return ok
+
+    def get_write_stats(self) -> dict:
+        return self._fila_escrita.stats()
+
+    # --- Manutenção ---
+    def _tamanho_em_disco(self) -> int:
+        if self.backend == "flat":
+            return self.index.size_bytes()
+        total = 0
+        for raiz, _, arquivos in os.walk(self.db_path):
+            for nome in arquivos:
+                try:
+                    total += os.path.getsize(os.path.join(raiz, nome))
+                except OSError:
+                    pass
+        return total
+
+    def _snapshot(self):
+        """(ids, embeddings, timestamps, documentos) de todo o store."""
+        if self.backend == "flat":
+            return self.index.entries()
+        dados = self.collection.get(include=["embeddings", "metadatas", "documents"])
+        ids = dados.get("ids") or []
+        if not ids:
+            return [], np.zeros((0, 1), dtype=np.float32), [], []
+        matriz = np.asarray(dados["embeddings"], dtype=np.float32)
+        matriz /= np.maximum(np.linalg.norm(matriz, axis=1, keepdims=True), 1e-12)
+        metadatas = dados.get("metadatas") or [{}] * len(ids)
+        return ids, matriz, [(m or {}).get("timestamp", 0.0) for m in metadatas], dados.get("documents") or [""] * len(ids)
+
+    def compact(self, politica: dict = None) -> dict:
+        """
+        Deduplica interações quase idênticas, aplica a política de retenção e
+        compacta o store. Retorna estatísticas (entradas removidas, bytes liberados).
+        """
+        if not self.available:
+            return {}
+        politica = politica_retencao(politica)
+        inicio = time.perf_counter()
+        self.flush()
+        with self._store_lock:
+            bytes_antes = self._tamanho_em_disco()
+            ids, matriz, timestamps, documentos = self._snapshot()
+            remover, motivos = planejar_compactacao(ids, matriz, timestamps, documentos, politica)
+            if remover:
+                if self.backend == "flat":
+                    self.index.compact(remover)
+                else:
+                    lista = list(remover)
+                    for i in range(0, len(lista), 500):
+                        self.collection.delete(ids=lista[i:i + 500])
+                    # delete é só lógico no ChromaDB: reconstrói para o disco encolher
+                    self._reconstruir_chroma()
+            bytes_depois = self._tamanho_em_disco()
+            self._lotes_gravados += 1
+            self._result_cache.clear()
+
+        stats = {
+            "entries_before": len(ids),
+            "entries_after": len(ids) - len(remover),
+            "removed": len(remover),
+            **motivos,
+            "bytes_reclaimed": max(0, bytes_antes - bytes_depois),
+            "seconds": round(time.perf_counter() - inicio, 2),
+        }
+        print(f"[VECTOR_MEM] Compactação: {stats}")
+        return stats
+
+    def _recuperar_reconstrucao(self):
+        """Queda no meio de uma reconstrução: fica com a coleção que estiver completa."""
+        try:
+            nomes = {getattr(c, "name", c) for c in self.client.list_collections()}
+        except Exception:
+            return
+        if COLECAO_NOVA not in nomes:
+            return
+        if COLECAO in nomes:
+            # A original ainda existe: a nova estava incompleta
+            self.client.delete_collection(COLECAO_NOVA)
+        else:
+            # A original já tinha sido apagada: a nova está completa, só falta o nome
+            self.client.get_collection(COLECAO_NOVA, embedding_function=self.embed_fn).modify(name=COLECAO)
+
+    def _reconstruir_chroma(self):
+        """
+        Copia o que sobrou para uma coleção nova, troca as duas e roda VACUUM no
+        sqlite, liberando o espaço das entradas apagadas (índice HNSW e tabelas).
+        Chamar com _store_lock.
+        """
+        if self.client is None:
+            return
+        dados = self.collection.get(include=["embeddings", "metadatas", "documents"])
+        ids = dados.get("ids") or []
+        try:
+            self.client.delete_collection(COLECAO_NOVA)
+        except Exception:
+            pass
+        nova = self.client.create_collection(name=COLECAO_NOVA, embedding_function=self.embed_fn)
+        for i in range(0, len(ids), 500):
+            nova.add(
+                ids=ids[i:i + 500],
+                embeddings=[list(map(float, e)) for e in dados["embeddings"][i:i + 500]],
+                metadatas=(dados.get("metadatas") or [None] * len(ids))[i:i + 500],
+                documents=(dados.get("documents") or [""] * len(ids))[i:i + 500],
+            )
+        self.client.delete_collection(COLECAO)
+        nova.modify(name=COLECAO)
+        self.collection = nova
+
+        banco = os.path.join(self.db_path, "chroma.sqlite3")
+        if os.path.exists(banco):
+            try:
+                conexao = sqlite3.connect(banco)
+                try:
+                    conexao.execute("VACUUM")
+                finally:
+                    conexao.close()
+            except sqlite3.Error as e:
+                print(f"[VECTOR_MEM] VACUUM do ChromaDB falhou: {e}")
+
+    def get_cache_stats(self) -> dict:
+        """Taxas de acerto dos caches de embedding e de resultados (para dimensionar)."""
+        return {
+            "embeddings": self.embedding_cache.stats() if self.embedding_cache else None,
+            "results": self._result_cache.stats(),
+        }
 
     def retrieve_relevant(self, query, n_results=3):
         """Busca as memórias mais parecidas com a pergunta atual."""
-        if not self.available or not self.collection:
+        if not self.available:
             return ""
-        
+
+        chave = (normalizar_texto(query), n_results)
+        cached = self._result_cache.get(chave)
+        if cached is not None:
+            return cached
+
+        lotes_antes = self._lotes_gravados
         try:
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            if results and results['documents'] and results['documents'][0]:
-                return "\n---\n".join(results['documents'][0])
+            embedding = self.embedding_cache.embed([query])
+            texto = ""
+            if self.backend == "flat":
+                documentos = [doc for _, doc, _ in self.index.query(embedding[0], n_results)]
+                texto = "\n---\n".join(documentos)
+            else:
+                results = self.collection.query(
+                    query_embeddings=embedding,
+                    n_results=n_results
+                )
+                if results and results['documents'] and results['documents'][0]:
+                    texto = "\n---\n".join(results['documents'][0])
+            # Não guarda resultado de uma busca que cruzou com uma gravação
+            if self._lotes_gravados == lotes_antes:
+                self._result_cache.put(chave, texto)
+            return texto
         except Exception as e:
             print(f"[VECTOR_MEM] Erro na busca: {e}")
         return ""
+
+
+class LazyVectorMemory:
+    """
+    Serviço de memória vetorial com inicialização preguiçosa: o VectorMemory
+    (chromadb, modelo de embedding...) é construído numa thread em background,
+    iniciada por start() depois que a GUI sobe ou no primeiro uso. Até ficar
+    pronto, as interações ficam num buffer e as buscas retornam vazio.
+
+    Args:
+        factory: Função sem argumentos que cria o VectorMemory.
+        on_status: Callback(status) com "loading", "online" ou "off".
+        max_buffer: Interações guardadas enquanto carrega (as mais antigas são descartadas).
+    """
+    def __init__(self, factory, on_status=None, max_buffer: int = 500):
+        self._factory = factory
+        self.on_status = on_status
+        self.max_buffer = max_buffer
+        self._memory = None
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._failed = False
+        self.ready = threading.Event()
+        self.load_time = None
+
+    @property
+    def available(self) -> bool:
+        """True enquanto carrega (as gravações vão para o buffer) ou se carregou com sucesso."""
+        if self._failed:
+            return False
+        return self._memory is None or self._memory.available
+
+    @property
+    def memory(self):
+        """O VectorMemory real (None enquanto carrega)."""
+        return self._memory
+
+    def start(self):
+        """Dispara o carregamento em background (idempotente)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._carregar, name="AeonVectorInit", daemon=True)
+            self._thread.start()
+        self._notificar("loading")
+
+    def _notificar(self, status: str):
+        if self.on_status:
+            try:
+                self.on_status(status)
+            except Exception as e:
+                print(f"[VECTOR_MEM] Erro no callback de status: {e}")
+
+    def _carregar(self):
+        inicio = time.perf_counter()
+        try:
+            memory = self._factory()
+        except Exception as e:
+            print(f"[VECTOR_MEM] AVISO - Falha ao inicializar VectorMemory: {e}")
+            memory = None
+        self.load_time = time.perf_counter() - inicio
+
+        with self._lock:
+            self._memory = memory
+            self._failed = memory is None or not memory.available
+            pendentes, self._buffer = self._buffer, []
+        if not self._failed:
+            for user_input, aeon_response in pendentes:
+                memory.store_interaction(user_input, aeon_response)
+            print(f"[VECTOR_MEM] Pronto em {self.load_time:.1f}s ({len(pendentes)} interações do buffer).")
+        self.ready.set()
+        self._notificar("off" if self._failed else "online")
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        self.start()
+        return self.ready.wait(timeout)
+
+    def store_interaction(self, user_input, aeon_response):
+        with self._lock:
+            memory = self._memory
+            if memory is None and not self._failed:
+                self._buffer.append((user_input, aeon_response))
+                if len(self._buffer) > self.max_buffer:
+                    del self._buffer[0]
+        if memory is None:
+            self.start()
+            return
+        memory.store_interaction(user_input, aeon_response)
+
+    def retrieve_relevant(self, query, n_results=3):
+        memory = self._memory
+        if memory is None:
+            self.start()
+            return ""
+        return memory.retrieve_relevant(query, n_results)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        memory = self._memory
+        return memory.flush(timeout) if memory is not None else not self._buffer
+
+    def close(self, timeout: float = 10.0):
+        """Na saída: espera o carregamento em andamento (para não perder o buffer) e fecha."""
+        if self._thread is not None:
+            self.ready.wait(timeout)
+        memory = self._memory
+        if memory is not None:
+            return memory.close(timeout)
+        if self._buffer:
+            print(f"[VECTOR_MEM] AVISO - {len(self._buffer)} interações no buffer não foram gravadas.")
+        return False
+
+    def get_cache_stats(self) -> dict:
+        memory = self._memory
+        return memory.get_cache_stats() if memory is not None else {}
+
+    def compact(self, politica: dict = None) -> dict:
+        memory = self._memory
+        return memory.compact(politica) if memory is not None and memory.available else {}
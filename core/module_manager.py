@@ -1,12 +1,31 @@
 import importlib
 import inspect
+import re
 import sys
 import threading
+import time
 from pathlib import Path
 import unicodedata
 
 from modules.base_module import AeonModule
-from core.memory_vector import VectorMemory
+from core.memory_vector import VectorMemory, LazyVectorMemory
+from core.memory_maintenance import MaintenanceScheduler
+from core.trigger_index import TriggerAutomaton, FuzzyTokenIndex, overlap_ratio
+from core.lru_cache import LRUCache
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9\s]')
+_SPACES_RE = re.compile(r'\s+')
+
+# Compartilhado entre instâncias: a normalização não depende dos módulos carregados
+_normalize_cache = LRUCache(maxsize=512)
+
+# Meta-comandos do próprio Aeon (não pertencem a nenhum módulo): gatilho normalizado -> ferramenta
+_META_GATILHOS = {
+    "compactar memoria": "Aeon.compactar_memoria",
+    "compactar a memoria": "Aeon.compactar_memoria",
+    "otimizar memoria": "Aeon.compactar_memoria",
+    "otimizar a memoria": "Aeon.compactar_memoria",
+}
 
 def log_display(msg):
     print(f"[MOD_MANAGER] {msg}")
@@ -29,6 +48,23 @@ class ModuleManager:
         self.trigger_orig_map = {}
         self.module_map = {}
         self.failed_modules = []
+
+        # Autômato de gatilhos (recompilado apenas quando os módulos mudam)
+        self._trigger_automaton = None
+        self._trigger_automaton_source = None
+
+        # Índice invertido para o matching difuso (scorer plugável)
+        self._fuzzy_index = None
+        # Decisões de roteamento por comando normalizado (limpo quando os gatilhos mudam)
+        self._route_cache = LRUCache(maxsize=256)
+        self.fuzzy_scorer = overlap_ratio
+        self.fuzzy_max_edits = 0
+        config_mgr = self.core_context.get("config_manager")
+        if config_mgr and hasattr(config_mgr, "get_system_data"):
+            try:
+                self.fuzzy_max_edits = int(config_mgr.get_system_data("fuzzy_max_edits", 0) or 0)
+            except (TypeError, ValueError):
+                self.fuzzy_max_edits = 0
         
         self.focused_module = None
         self.focus_timeout = None
@@ -37,28 +73,37 @@ class ModuleManager:
         self.chat_history = []
         self.max_history = 10
         self.history_lock = threading.Lock()
+        self.last_interaction = time.time()
+        self._maintenance = None
         
-        # Inicializa Memória Vetorial
+        # Memória Vetorial: carregada em background (start_vector_memory), nunca no boot
         self.vector_memory = None
         config_mgr = self.core_context.get("config_manager")
         if config_mgr:
-            try:
-                self.vector_memory = VectorMemory(str(config_mgr.storage_path))
-            except Exception as e:
-                log_display(f"AVISO - Falha ao inicializar VectorMemory: {e}")
-                self.vector_memory = None
+            backend = "auto"
+            if hasattr(config_mgr, "get_system_data"):
+                backend = config_mgr.get_system_data("vector_backend", "auto") or "auto"
+            storage_path = str(config_mgr.storage_path)
+            status_manager = self.core_context.get("status_manager")
+            self.vector_memory = LazyVectorMemory(
+                lambda: VectorMemory(storage_path, backend=backend),
+                on_status=getattr(status_manager, "update_memory_status", None)
+            )
 
     def _normalize(self, s: str) -> str:
         """Remove acentos e normaliza texto para matching insensível a diacríticos."""
-        import re
         if not s:
             return ""
-        s = unicodedata.normalize('NFD', s)
-        s = ''.join(ch for ch in s if not unicodedata.combining(ch))
-        s = s.lower()
-        s = re.sub(r'[^a-z0-9\s]', ' ', s)
-        s = re.sub(r'\s+', ' ', s).strip()
-        return s
+        cached = _normalize_cache.get(s)
+        if cached is not None:
+            return cached
+        norm = unicodedata.normalize('NFD', s)
+        norm = ''.join(ch for ch in norm if not unicodedata.combining(ch))
+        norm = norm.lower()
+        norm = _NON_ALNUM_RE.sub(' ', norm)
+        norm = _SPACES_RE.sub(' ', norm).strip()
+        _normalize_cache.put(s, norm)
+        return norm
 
     def load_modules(self):
         """Escaneia /modules e carrega tudo."""
@@ -75,6 +120,7 @@ class ModuleManager:
                 except Exception as e:
                     log_display(f"  ERRO Erro ao carregar '{item.name}': {e}")
 
+        self._rebuild_trigger_index()
         log_display(f"Módulos carregados: {len(self.modules)}")
 
     def _import_and_register(self, module_name):
@@ -100,11 +146,53 @@ class ModuleManager:
                             key = self._normalize(trigger)
                             self.trigger_map[key] = module_instance
                             self.trigger_orig_map[key] = trigger
+                        # Invalida o autômato; é recompilado no próximo roteamento
+                        self._trigger_automaton = None
                         log_display(f"  OK {module_instance.name} registrado.")
                     break
         except Exception as e:
             log_display(f"Erro importando {module_name}: {e}")
 
+    def _rebuild_trigger_index(self):
+        """Compila o autômato e o índice difuso a partir do trigger_map atual."""
+        triggers = list(self.trigger_map.keys())
+        self._trigger_automaton = TriggerAutomaton(triggers)
+        self._fuzzy_index = FuzzyTokenIndex(
+            triggers, scorer=self.fuzzy_scorer, max_edits=self.fuzzy_max_edits
+        )
+        self._trigger_automaton_source = self.trigger_map
+        self._route_cache.clear()
+
+    def _ensure_trigger_index(self):
+        """Recompila os índices se os gatilhos mudaram desde a última compilação."""
+        if self._trigger_automaton is None or self._trigger_automaton_source is not self.trigger_map:
+            self._rebuild_trigger_index()
+
+    def set_fuzzy_scorer(self, scorer=None, max_edits=None):
+        """Troca o scorer do matching difuso e/ou a tolerância de edição (ex: 'aion' -> 'aeon')."""
+        if scorer is not None:
+            self.fuzzy_scorer = scorer
+        if max_edits is not None:
+            self.fuzzy_max_edits = max_edits
+        self._trigger_automaton = None
+
+    def _match_triggers(self, command_norm: str) -> list:
+        """Todos os gatilhos presentes no comando, do mais longo para o mais curto."""
+        self._ensure_trigger_index()
+        key = ("exact", command_norm)
+        matches = self._route_cache.get(key)
+        if matches is None:
+            matches = tuple(self._trigger_automaton.find_all(command_norm))
+            self._route_cache.put(key, matches)
+        return matches
+
+    def get_cache_stats(self) -> dict:
+        """Contadores de hit/miss dos caches de normalização e roteamento (diagnóstico)."""
+        return {
+            "normalize": _normalize_cache.stats(),
+            "routing": self._route_cache.stats(),
+        }
+
     def scan_new_modules(self):
         """Re-escaneia módulos (usado pela Singularidade)."""
         log_display("Re-escaneando novos módulos...")
@@ -122,6 +210,71 @@ class ModuleManager:
                 history_text += f"{role}: {msg['content']}\n"
             return history_text
 
+    def _save_interaction(self, command: str, response: str):
+        """Guarda a interação no histórico curto e enfileira na memória vetorial (sem esperar)."""
+        self.last_interaction = time.time()
+        with self.history_lock:
+            self.chat_history.append({"role": "user", "content": command})
+            self.chat_history.append({"role": "assistant", "content": response})
+            # Trim history to keep recent items only
+            history_len = len(self.chat_history)
+            if history_len > self.max_history * 2:
+                self.chat_history = self.chat_history[history_len - self.max_history * 2:]
+        # Fora do lock: a gravação vetorial é write-behind e não segura o roteamento
+        try:
+            if self.vector_memory and getattr(self.vector_memory, 'available', False):
+                self.vector_memory.store_interaction(command, response)
+        except Exception:
+            pass
+
+    def start_vector_memory(self):
+        """Começa a carregar a memória vetorial em background (chamado depois que a GUI sobe)."""
+        if self.vector_memory is not None and hasattr(self.vector_memory, 'start'):
+            self.vector_memory.start()
+            self._start_memory_maintenance()
+
+    def _start_memory_maintenance(self):
+        """Agenda a compactação da memória vetorial para quando o sistema estiver ocioso."""
+        config_mgr = self.core_context.get("config_manager")
+        config = {}
+        if config_mgr and hasattr(config_mgr, "get_system_data"):
+            config = config_mgr.get_system_data("vector_maintenance", {}) or {}
+        if not config.get("enabled", True) or self._maintenance is not None:
+            return
+
+        def concluido(stats):
+            if config_mgr and hasattr(config_mgr, "set_system_data"):
+                config_mgr.set_system_data("vector_maintenance_last", time.time())
+
+        self._maintenance = MaintenanceScheduler(
+            self.compact_memory, lambda: self.last_interaction,
+            idle_minutes=float(config.get("idle_minutes", 10)),
+            interval_hours=float(config.get("interval_hours", 24)),
+            last_run=float(config_mgr.get_system_data("vector_maintenance_last", 0) or 0) if config_mgr else 0.0,
+            on_done=concluido
+        )
+        self._maintenance.start()
+
+    def compact_memory(self) -> dict:
+        """Deduplica, aplica a retenção e compacta a memória vetorial. Retorna as estatísticas."""
+        if self.vector_memory is None or not hasattr(self.vector_memory, 'compact'):
+            return {}
+        politica = None
+        config_mgr = self.core_context.get("config_manager")
+        if config_mgr and hasattr(config_mgr, "get_system_data"):
+            politica = config_mgr.get_system_data("vector_retention", None)
+        return self.vector_memory.compact(politica)
+
+    def shutdown(self):
+        """Grava as interações pendentes da memória vetorial (chamado na saída)."""
+        if self._maintenance is not None:
+            self._maintenance.stop()
+        if self.vector_memory is not None and hasattr(self.vector_memory, 'close'):
+            try:
+                self.vector_memory.close()
+            except Exception as e:
+                log_display(f"Erro ao fechar VectorMemory: {e}")
+
     def get_capabilities_summary(self) -> str:
         """Retorna uma lista de todos os módulos e o que eles fazem para o Brain."""
         summary = "Você tem acesso aos seguintes módulos técnicos:\n"
@@ -149,26 +302,22 @@ class ModuleManager:
                 return None
             # Salva na história
             if response:
-                with self.history_lock:
-                    self.chat_history.append({"role": "user", "content": command})
-                    self.chat_history.append({"role": "assistant", "content": response})
-                    # Persist to vector memory if available
-                    try:
-                        if self.vector_memory and getattr(self.vector_memory, 'available', False):
-                            self.vector_memory.store_interaction(command, response)
-                    except Exception:
-                        pass
-                    # Trim history to keep recent items only
-                    history_len = len(self.chat_history)
-                    if history_len > self.max_history * 2:
-                        self.chat_history = self.chat_history[history_len - self.max_history * 2:]
+                self._save_interaction(command, response)
             return response
         
-        # 2. MODO LIVRE (Ordenado por comprimento de trigger)
-        sorted_triggers = sorted(self.trigger_map.items(), key=lambda x: len(x[0]), reverse=True)
+        # 2. META-COMANDOS do Aeon
+        comando_pad = f" {command_norm} "
+        for gatilho, ferramenta in _META_GATILHOS.items():
+            if f" {gatilho} " in comando_pad:
+                log_display(f"Meta-comando '{gatilho}' -> {ferramenta}")
+                response = self.executar_ferramenta(ferramenta)
+                self._save_interaction(command, response)
+                return response
 
-        for trigger, module in sorted_triggers:
-            if trigger in command_norm:
+        # 3. MODO LIVRE (Autômato de gatilhos, mais longos primeiro)
+        for trigger in self._match_triggers(command_norm):
+            module = self.trigger_map.get(trigger)
+            if module is not None:
                 if not module.check_dependencies():
                     response = f"Erro: Dependencia de {module.name} falhou."
                     return response
@@ -182,21 +331,11 @@ class ModuleManager:
 
                 # Salva na história
                 if response:
-                    with self.history_lock:
-                        self.chat_history.append({"role": "user", "content": command})
-                        self.chat_history.append({"role": "assistant", "content": response})
-                        try:
-                            if self.vector_memory and getattr(self.vector_memory, 'available', False):
-                                self.vector_memory.store_interaction(command, response)
-                        except Exception:
-                            pass
-                        history_len = len(self.chat_history)
-                        if history_len > self.max_history * 2:
-                            self.chat_history = self.chat_history[history_len - self.max_history * 2:]
+                    self._save_interaction(command, response)
 
                 return response
         
-        # 3. Se nenhum trigger foi disparado, tenta matching difuso (token-based)
+        # 4. Se nenhum trigger foi disparado, tenta matching difuso (token-based)
         fuzzy_mod, fuzzy_trigger, fuzzy_ratio = self._best_fuzzy_match(command_norm, min_ratio=0.70)
         if fuzzy_mod:
             if not fuzzy_mod.check_dependencies():
@@ -207,20 +346,10 @@ class ModuleManager:
             if response is None:
                 return None
             if response:
-                with self.history_lock:
-                    self.chat_history.append({"role": "user", "content": command})
-                    self.chat_history.append({"role": "assistant", "content": response})
-                    try:
-                        if self.vector_memory and getattr(self.vector_memory, 'available', False):
-                            self.vector_memory.store_interaction(command, response)
-                    except Exception:
-                        pass
-                    history_len = len(self.chat_history)
-                    if history_len > self.max_history * 2:
-                        self.chat_history = self.chat_history[history_len - self.max_history * 2:]
+                self._save_interaction(command, response)
             return response
 
-        # 4. Se nenhum trigger foi disparado, RETORNA NONE
+        # 5. Se nenhum trigger foi disparado, RETORNA NONE
         # MainLogic decidirá se manda pro Brain para conversa natural
         return None
 
@@ -244,6 +373,17 @@ class ModuleManager:
                 with self.history_lock:
                     self.chat_history = []
                 return "Contexto e histórico de conversa foram limpos. Começando do zero!"
+            if func_name == "compactar_memoria":
+                try:
+                    stats = self.compact_memory()
+                except Exception as e:
+                    log_display(f"Erro na compactação da memória: {e}")
+                    return f"Não consegui compactar a memória: {e}"
+                if not stats:
+                    return "Memória de longo prazo indisponível no momento."
+                kb = stats["bytes_reclaimed"] / 1024
+                return (f"Memória compactada: {stats['removed']} de {stats['entries_before']} interações removidas "
+                        f"({stats['duplicates']} duplicadas), {kb:.0f} KB liberados.")
             return f"Comando Aeon desconhecido: {func_name}"
         
         # Procura modulo pelo nome (case-insensitive)
@@ -273,27 +413,18 @@ class ModuleManager:
 
     def _best_fuzzy_match(self, command_lower: str, min_ratio: float = 0.5):
         """Retorna (module, trigger, ratio) do melhor match token-based, ou (None, None, 0)."""
-        import re
-        def tokens(s):
-            return [t for t in re.findall(r"[a-zA-Z0-9]+", s)]
-
-        best = (None, None, 0.0)
-        cmd_tokens = set(tokens(command_lower))
-        if not cmd_tokens:
-            return best
-
-        for trigger, module in self.trigger_map.items():
-            trg_tokens = set(tokens(trigger))
-            if not trg_tokens:
-                continue
-            inter = cmd_tokens.intersection(trg_tokens)
-            ratio = len(inter) / len(trg_tokens)
-            if ratio > best[2]:
-                best = (module, trigger, ratio)
-
-        if best[2] >= min_ratio:
-            return best
-        return (None, None, 0.0)
+        self._ensure_trigger_index()
+
+        key = ("fuzzy", command_lower, min_ratio)
+        decision = self._route_cache.get(key)
+        if decision is None:
+            decision = self._fuzzy_index.best_match(command_lower, min_ratio=min_ratio)
+            self._route_cache.put(key, decision)
+        trigger, ratio = decision
+        module = self.trigger_map.get(trigger) if trigger else None
+        if module is None:
+            return (None, None, 0.0)
+        return (module, trigger, ratio)
 
     # Métodos de Foco
     def lock_focus(self, module, timeout=None, timeout_seconds=None):
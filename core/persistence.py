@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+
+def log_display(msg):
+    print(f"[PERSIST] {msg}")
+
+
+def escrever_atomico(path, texto: str):
+    """Grava em um .tmp na mesma pasta e troca com os.replace: o arquivo nunca fica pela metade."""
+    path = str(path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(texto)
+        f.flush()
+        try:
+            os.fsync(f.fileno())
+        except OSError:
+            pass
+    os.replace(tmp, path)
+
+
+class DebouncedWriter:
+    """
+    Persistência em background com debounce: `schedule(path, serializar)` só marca
+    o arquivo como sujo e retorna. Uma thread daemon espera `debounce_s` sem novas
+    marcações (no máximo `max_delay_s` desde a primeira) e grava cada arquivo sujo
+    uma única vez, com escrita atômica. Uma rajada de N alterações vira uma gravação.
+
+    Args:
+        debounce_s: Silêncio necessário antes de gravar.
+        max_delay_s: Espera máxima de uma alteração, mesmo com marcações contínuas.
+        name: Nome da thread (diagnóstico).
+    """
+    def __init__(self, debounce_s: float = 0.5, max_delay_s: float = 5.0, name: str = "AeonPersist"):
+        self.debounce_s = debounce_s
+        self.max_delay_s = max(max_delay_s, debounce_s)
+        self.name = name
+
+        self._sujos = {}          # path -> função que devolve o texto a gravar
+        self._primeiro_em = None
+        self._ultimo_em = None
+        self._cond = threading.Condition()
+        self._escrita_lock = threading.Lock()
+        self._parar = False
+        self._thread = None
+
+        self.agendados = 0
+        self.gravados = 0
+        self.erros = 0
+
+    def start(self):
+        """Sobe a thread de gravação (idempotente)."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def schedule(self, path, serializar):
+        """Marca `path` como sujo. `serializar()` é chamada na hora da gravação, com o estado mais recente."""
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            agora = time.monotonic()
+            if not self._sujos:
+                self._primeiro_em = agora
+            self._ultimo_em = agora
+            self._sujos[str(path)] = serializar
+            self.agendados += 1
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._sujos)
+
+    def _pegar_sujos(self):
+        """Espera o debounce vencer. Retorna o dict de sujos, ou None ao parar."""
+        with self._cond:
+            while True:
+                if self._parar:
+                    return None
+                if not self._sujos:
+                    self._cond.wait()
+                    continue
+                agora = time.monotonic()
+                prazo = min(self._ultimo_em + self.debounce_s, self._primeiro_em + self.max_delay_s)
+                if agora >= prazo:
+                    sujos, self._sujos = self._sujos, {}
+                    return sujos
+                self._cond.wait(prazo - agora)
+
+    def _gravar(self, sujos: dict):
+        with self._escrita_lock:
+            for path, serializar in sujos.items():
+                try:
+                    escrever_atomico(path, serializar())
+                    self.gravados += 1
+                except Exception as e:
+                    self.erros += 1
+                    log_display(f"Erro ao gravar {os.path.basename(path)}: {e}")
+
+    def _run(self):
+        while True:
+            sujos = self._pegar_sujos()
+            if sujos is None:
+                break
+            self._gravar(sujos)
+
+    def flush(self):
+        """Grava agora, na thread de quem chama, tudo que está pendente."""
+        with self._cond:
+            sujos, self._sujos = self._sujos, {}
+        # O lock de escrita também espera uma gravação da thread que esteja em andamento
+        self._gravar(sujos)
+
+    def close(self, timeout: float = 5.0):
+        """Grava o que falta e encerra a thread (saída do programa)."""
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._sujos),
+                "scheduled": self.agendados,
+                "written": self.gravados,
+                "errors": self.erros,
+            }
@@ -0,0 +1,59 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Lock leitor/escritor: vários leitores ao mesmo tempo, escritor exclusivo.
+    Preferência ao escritor: quando há um esperando, leitores novos aguardam,
+    para que um fluxo contínuo de leituras não o deixe esperando para sempre.
+    Não é reentrante (não adquira de novo dentro do mesmo bloco).
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escrevendo = False
+        self._escritores_esperando = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._escrevendo or self._escritores_esperando:
+                self._cond.wait()
+            self._leitores += 1
+
+    def release_read(self):
+        with self._cond:
+            self._leitores -= 1
+            if self._leitores == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._escritores_esperando += 1
+            try:
+                while self._escrevendo or self._leitores:
+                    self._cond.wait()
+            finally:
+                self._escritores_esperando -= 1
+            self._escrevendo = True
+
+    def release_write(self):
+        with self._cond:
+            self._escrevendo = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -9,6 +9,7 @@ class StatusManager:
         self.operation_mode = "DIRETO"  # DIRETO ou CHAMAR
         self.cloud_online = False
         self.local_online = False
+        self.memory_status = "off"  # off, loading, online (memória vetorial)
         self.triggers = ["aeon", "aion", "iron", "filho", "assistente", "computador"]
         
         # Callbacks para atualização da UI
@@ -53,12 +54,23 @@ class StatusManager:
         if self.on_status_change:
             self.on_status_change()
 
+    def update_memory_status(self, status: str):
+        """Atualiza o status da memória vetorial (off, loading, online)."""
+        self.memory_status = status
+        if self.on_status_change:
+            self.on_status_change()
+
+    def is_memory_ready(self) -> bool:
+        """Verifica se a memória de longo prazo já terminou de carregar."""
+        return self.memory_status == "online"
+
     def get_status(self) -> dict:
         """Retorna o status atual como dicionário."""
         return {
             "cloud": self.cloud_online,
             "local": self.local_online,
-            "mode": self.operation_mode
+            "mode": self.operation_mode,
+            "memory": self.memory_status
         }
 
     def get_led_status(self) -> dict:
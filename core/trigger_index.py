@@ -0,0 +1,193 @@
+import re
+from collections import deque
+
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9]+")
+
+
+def tokenize(text: str) -> list:
+    """Quebra texto normalizado em tokens alfanuméricos."""
+    return _TOKEN_RE.findall(text) if text else []
+
+
+class TriggerAutomaton:
+    """
+    Autômato Aho-Corasick para os gatilhos dos módulos.
+    Compilado uma vez a partir do trigger_map e reutilizado em cada comando:
+    encontra todos os gatilhos contidos no texto em uma única passada.
+    """
+    def __init__(self, triggers=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._patterns = []
+        self._seen = set()
+
+        for trigger in triggers:
+            self._add(trigger)
+        self._build()
+
+        # Ordem de prioridade: maior gatilho primeiro, empate pela ordem de registro
+        order = sorted(range(len(self._patterns)), key=lambda i: (-len(self._patterns[i]), i))
+        self._rank = [0] * len(self._patterns)
+        for pos, idx in enumerate(order):
+            self._rank[idx] = pos
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _add(self, pattern: str):
+        if not pattern or pattern in self._seen:
+            return
+        self._seen.add(pattern)
+        idx = len(self._patterns)
+        self._patterns.append(pattern)
+
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._out[node].append(idx)
+
+    def _build(self):
+        """Calcula os links de falha (BFS) e propaga as saídas."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list:
+        """Retorna os gatilhos presentes em `text`, do mais longo para o mais curto."""
+        if not text or not self._patterns:
+            return []
+
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+
+        return [self._patterns[i] for i in sorted(found, key=self._rank.__getitem__)]
+
+
+def overlap_ratio(hits: float, token_count: int) -> float:
+    """Scorer padrão: fração dos tokens do gatilho presentes no comando."""
+    return hits / token_count if token_count else 0.0
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein com corte: retorna `limit + 1` assim que a distância passa do limite."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            val = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur.append(val)
+            row_min = min(row_min, val)
+        if row_min > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class FuzzyTokenIndex:
+    """
+    Índice invertido token -> [(gatilho, nº de tokens)] para o matching difuso.
+    Só pontua gatilhos que compartilham ao menos um token com o comando.
+
+    Args:
+        triggers: Gatilhos normalizados, na ordem de registro.
+        scorer: Função (hits, token_count) -> ratio. Padrão: overlap_ratio.
+        max_edits: Tolerância de edição por token (ex: 1 aceita "aion" por "aeon"). 0 desliga.
+        min_typo_len: Tamanho mínimo do token para aplicar a tolerância.
+        typo_weight: Peso de um token aceito por tolerância (1.0 = igual a um match exato).
+    """
+    def __init__(self, triggers=(), scorer=None, max_edits=0, min_typo_len=4, typo_weight=1.0):
+        self.scorer = scorer or overlap_ratio
+        self.max_edits = max_edits
+        self.min_typo_len = min_typo_len
+        self.typo_weight = typo_weight
+
+        self._postings = {}
+        self._order = {}
+        self._by_length = {}
+
+        for trigger in triggers:
+            if trigger in self._order:
+                continue
+            tokens = set(tokenize(trigger))
+            if not tokens:
+                continue
+            self._order[trigger] = len(self._order)
+            for token in tokens:
+                self._postings.setdefault(token, []).append((trigger, len(tokens)))
+
+        for token in self._postings:
+            self._by_length.setdefault(len(token), []).append(token)
+
+    def __len__(self):
+        return len(self._order)
+
+    def _typo_candidates(self, token: str):
+        """Tokens do índice a até `max_edits` edições de `token`."""
+        if not self.max_edits or len(token) < self.min_typo_len:
+            return []
+        found = []
+        for size in range(len(token) - self.max_edits, len(token) + self.max_edits + 1):
+            for candidate in self._by_length.get(size, ()):
+                if candidate != token and edit_distance(token, candidate, self.max_edits) <= self.max_edits:
+                    found.append(candidate)
+        return found
+
+    def best_match(self, command_norm: str, min_ratio: float = 0.5):
+        """Retorna (gatilho, ratio) do melhor match acima de `min_ratio`, ou (None, 0.0)."""
+        cmd_tokens = set(tokenize(command_norm))
+        if not cmd_tokens:
+            return (None, 0.0)
+
+        # gatilho -> {token do gatilho: peso}; um token do gatilho conta uma única vez
+        hits = {}
+        counts = {}
+        for token in cmd_tokens:
+            matches = [(token, 1.0)] if token in self._postings else []
+            if not matches:
+                matches = [(c, self.typo_weight) for c in self._typo_candidates(token)]
+            for index_token, weight in matches:
+                for trigger, token_count in self._postings[index_token]:
+                    seen = hits.setdefault(trigger, {})
+                    if weight > seen.get(index_token, 0.0):
+                        seen[index_token] = weight
+                    counts[trigger] = token_count
+
+        best = (None, 0.0)
+        best_order = None
+        for trigger, seen in hits.items():
+            ratio = self.scorer(sum(seen.values()), counts[trigger])
+            order = self._order[trigger]
+            # Empate: vence o gatilho registrado primeiro (mesma regra do scan linear antigo)
+            if ratio > best[1] or (ratio == best[1] and best_order is not None and order < best_order):
+                best = (trigger, ratio)
+                best_order = order
+
+        if best[0] is not None and best[1] >= min_ratio:
+            return best
+        return (None, 0.0)
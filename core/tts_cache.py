@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from core.lru_cache import LRUCache
+
+
+def log_display(msg):
+    print(f"[TTS_CACHE] {msg}")
+
+
+def normalizar_frase(texto: str) -> str:
+    """Normaliza a frase para a chave do cache (caixa e espaços não mudam o áudio)."""
+    return " ".join((texto or "").split()).lower()
+
+
+class TTSCache:
+    """
+    Cache persistente de áudio sintetizado, por frase.
+    Chave: (motor, voz, velocidade, texto normalizado). Os áudios ficam em arquivos
+    dentro de `cache_dir` e um index.json guarda tamanho, último uso e contagem de
+    acertos, usado na evicção LRU (por bytes) e no pré-aquecimento do boot.
+
+    Admissão: só entram as frases fixas (`fixas`, ex: FRASES_FREQUENTES) e as que
+    se repetem (`min_vistas` consultas sem acerto). Respostas únicas do LLM não
+    custam gravação em disco. O index é gravado por timer (`flush_interval_s`) e
+    na saída, não a cada inserção.
+
+    Args:
+        cache_dir: Pasta do cache (ex: bagagem/tts_cache).
+        max_bytes: Tamanho máximo em disco antes de descartar os menos usados.
+        max_text_len: Frases maiores que isso não são cacheadas (respostas únicas do LLM).
+        memory_entries: Quantos áudios manter também em RAM.
+        fixas: Frases sempre admitidas.
+        min_vistas: Quantas vezes uma frase comum precisa ser pedida para entrar.
+        flush_interval_s: Atraso da gravação do index após uma mudança (None = só no flush()).
+    """
+    def __init__(self, cache_dir, max_bytes: int = 50 * 1024 * 1024, max_text_len: int = 200, memory_entries: int = 64,
+                 fixas=(), min_vistas: int = 2, flush_interval_s: float = 30.0):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_text_len = max_text_len
+        self.min_vistas = min_vistas
+        self.flush_interval_s = flush_interval_s
+        self.hits = 0
+        self.misses = 0
+        self._memoria = LRUCache(maxsize=memory_entries)
+        self._fixas = set()
+        self.fixar(fixas)
+        # Quantas vezes cada frase (normalizada) foi pedida sem estar no cache
+        self._vistas = LRUCache(maxsize=512)
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._dirty = False
+        self._timer_flush = None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._index = self._carregar_index()
+        self._total_bytes = sum(m.get("size", 0) for m in self._index.values())
+
+    # --- Index ---
+    def _carregar_index(self) -> dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        # Remove entradas cujo arquivo sumiu
+        return {k: v for k, v in index.items() if os.path.exists(self._arquivo(k, v.get("formato", "wav")))}
+
+    def _marcar_sujo(self):
+        """Agenda a gravação do index (deve ser chamado dentro do lock)."""
+        self._dirty = True
+        if self.flush_interval_s is None or self._timer_flush is not None:
+            return
+        self._timer_flush = threading.Timer(self.flush_interval_s, self._flush_agendado)
+        self._timer_flush.daemon = True
+        self._timer_flush.start()
+
+    def _flush_agendado(self):
+        with self._lock:
+            self._timer_flush = None
+        self.flush()
+
+    def flush(self):
+        """Grava o index em disco (uso/acertos). Chamado pelo timer e na saída."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._index)
+            self._dirty = False
+        tmp = self._index_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp, self._index_path)
+        except OSError as e:
+            log_display(f"Erro ao salvar index: {e}")
+
+    # --- Chaves ---
+    @staticmethod
+    def chave(motor: str, voz: str, velocidade: float, texto: str) -> str:
+        bruto = f"{motor}|{voz}|{float(velocidade):.2f}|{normalizar_frase(texto)}"
+        return hashlib.sha1(bruto.encode("utf-8")).hexdigest()
+
+    def _arquivo(self, chave: str, formato: str) -> str:
+        return os.path.join(self.cache_dir, f"{chave}.{formato}")
+
+    def cacheavel(self, texto: str) -> bool:
+        return bool(texto) and len(texto) <= self.max_text_len
+
+    def fixar(self, frases):
+        """Marca frases como sempre admitidas no cache (respostas fixas)."""
+        self._fixas.update(normalizar_frase(f) for f in frases)
+
+    def admite(self, texto: str) -> bool:
+        """Frase fixa ou já pedida `min_vistas` vezes: vale gravar em disco."""
+        if not self.cacheavel(texto):
+            return False
+        norm = normalizar_frase(texto)
+        return norm in self._fixas or (self._vistas.get(norm) or 0) >= self.min_vistas
+
+    # --- API ---
+    def get(self, motor: str, voz: str, velocidade: float, texto: str):
+        """Retorna (dados, formato) se a frase estiver no cache, senão None."""
+        return self.get_first([(motor, voz, velocidade)], texto)
+
+    def get_first(self, configuracoes, texto: str):
+        """
+        Procura a frase para cada (motor, voz, velocidade), na ordem de preferência.
+        Conta um único hit/miss por chamada. Retorna (dados, formato) ou None.
+        """
+        if not self.cacheavel(texto):
+            return None
+        for motor, voz, velocidade in configuracoes:
+            chave = self.chave(motor, voz, velocidade, texto)
+            encontrado = self._ler(chave)
+            if encontrado is not None:
+                with self._lock:
+                    self.hits += 1
+                return encontrado
+        with self._lock:
+            self.misses += 1
+        norm = normalizar_frase(texto)
+        self._vistas.put(norm, (self._vistas.get(norm) or 0) + 1)
+        return None
+
+    def contem(self, configuracoes, texto: str) -> bool:
+        """Verifica se a frase já está no cache (sem contar hit/miss nem mexer no LRU)."""
+        if not self.cacheavel(texto):
+            return False
+        with self._lock:
+            return any(self.chave(m, v, vel, texto) in self._index for m, v, vel in configuracoes)
+
+    def _ler(self, chave: str):
+        em_ram = self._memoria.get(chave)
+        with self._lock:
+            meta = self._index.get(chave)
+            if meta is None:
+                return None
+            meta["last_used"] = time.time()
+            meta["hits"] = meta.get("hits", 0) + 1
+            self._marcar_sujo()
+            formato = meta.get("formato", "wav")
+
+        if em_ram is not None:
+            return em_ram
+        try:
+            with open(self._arquivo(chave, formato), "rb") as f:
+                dados = f.read()
+        except OSError:
+            with self._lock:
+                removido = self._index.pop(chave, None)
+                if removido:
+                    self._total_bytes -= removido.get("size", 0)
+                    self._marcar_sujo()
+            return None
+        self._memoria.put(chave, (dados, formato))
+        return (dados, formato)
+
+    def put(self, motor: str, voz: str, velocidade: float, texto: str, dados: bytes, formato: str = "wav",
+            fixa: bool = False):
+        """Guarda o áudio de uma frase admitida (fixa ou repetida) e aplica a evicção por tamanho."""
+        if not dados or not (self.admite(texto) or (fixa and self.cacheavel(texto))):
+            return
+        chave = self.chave(motor, voz, velocidade, texto)
+        try:
+            with open(self._arquivo(chave, formato), "wb") as f:
+                f.write(dados)
+        except OSError as e:
+            log_display(f"Erro ao gravar áudio no cache: {e}")
+            return
+
+        with self._lock:
+            anterior = self._index.get(chave, {})
+            self._total_bytes += len(dados) - anterior.get("size", 0)
+            self._index[chave] = {
+                "formato": formato,
+                "size": len(dados),
+                "last_used": time.time(),
+                "hits": anterior.get("hits", 0),
+                "texto": normalizar_frase(texto),
+                "motor": motor,
+                "voz": voz,
+                "velocidade": float(velocidade),
+            }
+            self._marcar_sujo()
+        self._memoria.put(chave, (dados, formato))
+        self._evict()
+
+    def _evict(self):
+        """Descarta os áudios menos recentemente usados até caber em max_bytes."""
+        removidos = []
+        with self._lock:
+            # Total mantido incrementalmente: o caso comum (cabe) é O(1)
+            if self._total_bytes <= self.max_bytes:
+                return
+            for chave, meta in sorted(self._index.items(), key=lambda kv: kv[1].get("last_used", 0)):
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._total_bytes -= meta.get("size", 0)
+                removidos.append((chave, meta.get("formato", "wav")))
+            for chave, _ in removidos:
+                del self._index[chave]
+            self._marcar_sujo()
+
+        for chave, formato in removidos:
+            self._memoria.pop(chave)
+            try:
+                os.remove(self._arquivo(chave, formato))
+            except OSError:
+                pass
+
+    def mais_frequentes(self, n: int = 20) -> list:
+        """Metadados das `n` frases com mais acertos (para pré-aquecer no boot)."""
+        with self._lock:
+            itens = sorted(self._index.items(), key=lambda kv: kv[1].get("hits", 0), reverse=True)
+        return [(chave, dict(meta)) for chave, meta in itens[:n]]
+
+    def carregar_em_memoria(self, chaves) -> int:
+        """Lê do disco para a RAM os áudios indicados. Retorna quantos foram carregados."""
+        carregados = 0
+        for chave in chaves:
+            with self._lock:
+                meta = self._index.get(chave)
+            if meta is None or chave in self._memoria:
+                continue
+            formato = meta.get("formato", "wav")
+            try:
+                with open(self._arquivo(chave, formato), "rb") as f:
+                    self._memoria.put(chave, (f.read(), formato))
+                carregados += 1
+            except OSError:
+                continue
+        return carregados
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
@@ -0,0 +1,153 @@
+import threading
+import time
+
+
+def log_display(msg):
+    print(f"[WRITE_BEHIND] {msg}")
+
+
+class WriteBehindQueue:
+    """
+    Fila write-behind: quem grava só enfileira e segue; uma thread daemon junta
+    os itens e chama `flush_fn(lote)` quando o lote enche (`max_batch`) ou quando
+    o item mais antigo espera mais que `max_delay_s`.
+
+    Args:
+        flush_fn: Função que persiste uma lista de itens de uma vez.
+        max_batch: Tamanho máximo do lote.
+        max_delay_s: Espera máxima de um item antes de ser gravado.
+        max_pending: Limite de itens pendentes; acima disso os mais antigos são descartados.
+        name: Nome da thread (diagnóstico).
+    """
+    def __init__(self, flush_fn, max_batch: int = 16, max_delay_s: float = 2.0,
+                 max_pending: int = 1000, name: str = "AeonWriteBehind"):
+        self.flush_fn = flush_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay_s = max_delay_s
+        self.max_pending = max_pending
+        self.name = name
+
+        self._pendentes = []
+        self._primeiro_em = None
+        self._cond = threading.Condition()
+        self._gravando = False
+        self._forcar = False
+        self._parar = False
+        self._thread = None
+
+        self.enfileirados = 0
+        self.gravados = 0
+        self.lotes = 0
+        self.descartados = 0
+        self.erros = 0
+
+    def start(self):
+        """Sobe a thread de gravação (idempotente)."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar = False
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def put(self, item):
+        """Enfileira um item sem bloquear."""
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            if not self._pendentes:
+                self._primeiro_em = time.monotonic()
+            self._pendentes.append(item)
+            self.enfileirados += 1
+            if len(self._pendentes) > self.max_pending:
+                excesso = len(self._pendentes) - self.max_pending
+                del self._pendentes[:excesso]
+                self.descartados += excesso
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pendentes)
+
+    def _pegar_lote(self):
+        """Espera até ter um lote pronto (cheio ou vencido). Retorna None ao parar."""
+        with self._cond:
+            while True:
+                if self._pendentes:
+                    espera = self._primeiro_em + self.max_delay_s - time.monotonic()
+                    if len(self._pendentes) >= self.max_batch or espera <= 0 or self._forcar or self._parar:
+                        lote = self._pendentes[:self.max_batch]
+                        del self._pendentes[:self.max_batch]
+                        if self._pendentes:
+                            self._primeiro_em = time.monotonic()
+                        else:
+                            self._primeiro_em = None
+                            self._forcar = False
+                        self._gravando = True
+                        return lote
+                    self._cond.wait(espera)
+                elif self._parar:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            lote = self._pegar_lote()
+            if lote is None:
+                break
+            ok = False
+            try:
+                self.flush_fn(lote)
+                ok = True
+            except Exception as e:
+                log_display(f"Erro ao gravar lote de {len(lote)}: {e}")
+            finally:
+                with self._cond:
+                    if ok:
+                        self.gravados += len(lote)
+                        self.lotes += 1
+                    else:
+                        self.erros += 1
+                    self._gravando = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Força a gravação de tudo que está pendente e espera. Retorna False se estourar o tempo."""
+        limite = time.monotonic() + timeout
+        with self._cond:
+            if self._thread is None and self._pendentes:
+                self.start()
+            # Grava os pendentes já, sem esperar o prazo
+            if self._pendentes:
+                self._forcar = True
+            self._cond.notify_all()
+            while self._pendentes or self._gravando:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._cond.wait(restante)
+        return True
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Grava o que falta e encerra a thread."""
+        ok = self.flush(timeout)
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            thread.join(timeout)
+        return ok
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._pendentes),
+                "enqueued": self.enfileirados,
+                "written": self.gravados,
+                "batches": self.lotes,
+                "dropped": self.descartados,
+                "errors": self.erros,
+            }
@@ -39,6 +39,10 @@ if __name__ == "__main__":
     from core.context_manager import ContextManager
     log("Importou ContextManager.")
 
+    log("Importando StatusManager...")
+    from core.status_manager import StatusManager
+    log("Importou StatusManager.")
+
     log("Importando MainLogic...")
     from core.main_gui_logic import MainLogic
     log("Importou MainLogic.")
@@ -53,6 +57,8 @@ if __name__ == "__main__":
         try:
             log("Carregando snapshot de contexto...")
             context_manager.load_snapshot()
+            # Grava só as chaves alteradas, de tempos em tempos (a saída fica rápida)
+            context_manager.start_autosave()
             log("Snapshot carregado.")
 
             log("Carregando ConfigManager...")
@@ -63,6 +69,7 @@ if __name__ == "__main__":
             log("Carregando IOHandler...")
             io = IOHandler(config.system_data, context_manager)
             io.cleanup_temp_files() # LIMPEZA NO BOOT
+            io.prewarm_cache()
             log("IOHandler Carregado.")
             
             log("Carregando AeonBrain...")
@@ -71,12 +78,16 @@ if __name__ == "__main__":
             esfera_ui.add_message("Conectando Neural...", "BOOT")
             
             log("Carregando ModuleManager...")
+            status_manager = StatusManager()
+            # Modo de operação persistido ('modo chamar' / 'modo direto' ou 'operation_mode' no system.json)
+            status_manager.set_mode(config.get_system_data("operation_mode", "DIRETO"))
             context = {
                 "config_manager": config,
                 "io_handler": io,
                 "brain": brain,
                 "gui": esfera_ui,
-                "context": context_manager 
+                "context": context_manager,
+                "status_manager": status_manager
             }
             mods = ModuleManager(context)
             mods.load_modules()
@@ -136,13 +147,24 @@ if __name__ == "__main__":
 
     # Mostra a esfera agora que tudo está carregado
     esfera.show()
+
+    # Com a GUI no ar, a memória vetorial (chromadb + modelo) carrega em background
+    if getattr(logic, 'module_manager', None):
+        logic.module_manager.start_vector_memory()
     
     # Cria uma função de limpeza para ser chamada no final
     def cleanup_routine():
         log("Iniciando rotina de limpeza ao sair...")
+        if getattr(logic, 'module_manager', None):
+            logic.module_manager.shutdown()
         if hasattr(logic, 'io') and logic.io:
+            logic.io.shutdown()
             logic.io.cleanup_temp_files()
+        context_manager.stop_autosave()
         context_manager.save_snapshot()
+        config_manager = logic.module_manager.core_context.get("config_manager") if getattr(logic, 'module_manager', None) else None
+        if config_manager:
+            config_manager.close()
 
     log("Conectando o sinal aboutToQuit para a rotina de limpeza.")
     app.aboutToQuit.connect(cleanup_routine)
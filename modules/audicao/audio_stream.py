@@ -0,0 +1,309 @@
+import math
+import threading
+import numpy as np
+
+# VAD neural leve é opcional; sem ele usamos energia (RMS) calibrada pelo SpeechRecognition
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+
+def frame_rms(frame: bytes) -> float:
+    """RMS (escala int16) de um quadro PCM16."""
+    samples = np.frombuffer(frame, dtype=np.int16)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+
+
+class EnergyVAD:
+    """VAD por energia: um quadro é fala se o RMS (int16) passa do limiar."""
+    def __init__(self, threshold: float = 300.0):
+        self.threshold = threshold
+
+    def is_speech(self, frame: bytes, sample_rate: int, rms: float = None) -> bool:
+        if rms is None:
+            rms = frame_rms(frame)
+        return rms > self.threshold
+
+
+class WebRtcVAD:
+    """Wrapper do webrtcvad (quadros de 10/20/30 ms), com piso de energia contra ruído baixo."""
+    def __init__(self, aggressiveness: int = 2, energy_floor: float = 0.0):
+        self._vad = webrtcvad.Vad(aggressiveness)
+        self._energia = EnergyVAD(energy_floor) if energy_floor else None
+
+    def is_speech(self, frame: bytes, sample_rate: int, rms: float = None) -> bool:
+        if self._energia is not None and not self._energia.is_speech(frame, sample_rate, rms):
+            return False
+        try:
+            return self._vad.is_speech(frame, sample_rate)
+        except Exception:
+            return False
+
+
+def criar_vad(energy_threshold: float = 300.0, preferir_webrtc: bool = True):
+    """Escolhe o melhor VAD disponível."""
+    if preferir_webrtc and WEBRTCVAD_AVAILABLE:
+        # Piso baixo: o webrtcvad decide, a energia só corta o silêncio absoluto
+        return WebRtcVAD(aggressiveness=2, energy_floor=energy_threshold * 0.5)
+    return EnergyVAD(energy_threshold)
+
+
+class _Slot:
+    __slots__ = ("pcm", "f32", "refs")
+
+    def __init__(self, samples: int):
+        self.pcm = np.zeros(samples, dtype=np.int16)
+        self.f32 = None
+        self.refs = 0
+
+
+class BufferPool:
+    """
+    Buffers PCM16 pré-alocados, um por fala em andamento ou na fila de transcrição.
+    Cada buffer volta ao pool quando o último usuário (segmentador, parcial,
+    transcrição) chama release; o pool só cresce se houver mais falas em voo.
+    """
+    def __init__(self, samples: int, inicial: int = 4):
+        self.samples = samples
+        self._livres = [_Slot(samples) for _ in range(inicial)]
+        self.alocados = inicial
+        self._lock = threading.Lock()
+
+    def acquire(self) -> _Slot:
+        with self._lock:
+            slot = self._livres.pop() if self._livres else None
+            if slot is None:
+                slot = _Slot(self.samples)
+                self.alocados += 1
+            slot.refs = 1
+        return slot
+
+    def retain(self, slot: _Slot):
+        with self._lock:
+            slot.refs += 1
+
+    def release(self, slot: _Slot):
+        with self._lock:
+            slot.refs -= 1
+            if slot.refs == 0:
+                self._livres.append(slot)
+
+
+class Fala:
+    """
+    Áudio de uma fala: view PCM16 sobre um buffer do pool (sem cópia).
+    Quem recebe a fala deve chamar release() ao terminar de usá-la.
+    """
+    __slots__ = ("utterance_id", "pcm", "_pool", "_slot")
+
+    def __init__(self, pool: BufferPool, slot: _Slot, n: int, utterance_id: int):
+        self.utterance_id = utterance_id
+        self.pcm = slot.pcm[:n]
+        self._pool = pool
+        self._slot = slot
+
+    def __len__(self):
+        return self.pcm.size
+
+    def float32(self, out=None):
+        """View float32 (-1..1) para o Whisper, convertida dentro de um buffer reutilizado."""
+        if out is None:
+            if self._slot.f32 is None:
+                self._slot.f32 = np.empty(self._pool.samples, dtype=np.float32)
+            out = self._slot.f32
+        view = out[:self.pcm.size]
+        np.multiply(self.pcm, 1.0 / 32768.0, out=view)
+        return view
+
+    def tobytes(self) -> bytes:
+        """Cópia em bytes (Google/Vosk precisam de bytes)."""
+        return self.pcm.tobytes()
+
+    def release(self):
+        if self._slot is not None:
+            self._pool.release(self._slot)
+            self._slot = None
+
+
+class MicLevelMeter:
+    """
+    Nível do microfone para a GUI a uma taxa fixa: pega o pico de RMS do
+    intervalo e sobe na hora, descendo suave (medidor estável, sem piscar).
+    """
+    def __init__(self, intervalo_ms: int = 50, ganho: float = 10.0, decaimento: float = 0.6):
+        self.intervalo_ms = intervalo_ms
+        self.ganho = ganho
+        self.decaimento = decaimento
+        self.nivel = 0.0
+        self._pico = 0.0
+        self._proximo_ms = 0
+
+    def update(self, rms: float, agora_ms: int):
+        """Registra o RMS de um quadro. Retorna o nível novo quando é hora de publicar, senão None."""
+        if rms > self._pico:
+            self._pico = rms
+        if agora_ms < self._proximo_ms:
+            return None
+        alvo = min(1.0, self._pico / 32768.0 * self.ganho)
+        if alvo >= self.nivel:
+            self.nivel = alvo
+        else:
+            self.nivel = self.nivel * self.decaimento + alvo * (1.0 - self.decaimento)
+        self._pico = 0.0
+        self._proximo_ms = agora_ms + self.intervalo_ms
+        return self.nivel
+
+
+class UtteranceSegmenter:
+    """
+    Corta um fluxo contínuo de quadros PCM16 em falas.
+
+    Mantém um ring buffer de pré-roll (o início da fala não é perdido), copia
+    os quadros para um buffer pré-alocado do pool enquanto o VAD indica fala e
+    fecha a fala após `silence_ms` de silêncio ou ao atingir `max_utterance_s`.
+    O RMS de cada quadro é calculado uma vez (`last_rms`) e reaproveitado pelo
+    VAD de energia e pelo medidor do microfone.
+    """
+    def __init__(self, vad, sample_rate: int = 16000, frame_ms: int = 30,
+                 pre_roll_ms: int = 300, silence_ms: int = 600,
+                 min_speech_ms: int = 250, max_utterance_s: float = 15.0):
+        self.vad = vad
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self._silence_frames = max(1, silence_ms // frame_ms)
+        self._min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self._max_frames = max(1, int(max_utterance_s * 1000 // frame_ms))
+
+        # Pré-roll: ring de quadros de tamanho fixo
+        self._pre_frames = max(1, pre_roll_ms // frame_ms)
+        self._pre_roll = np.zeros((self._pre_frames, self.frame_samples), dtype=np.int16)
+        self._pre_len = [0] * self._pre_frames
+        self._pre_idx = 0
+        self._pre_count = 0
+
+        self.pool = BufferPool(self._max_frames * self.frame_samples)
+        self._scratch = np.empty(self.frame_samples, dtype=np.float32)
+        self.last_rms = 0.0
+
+        self._slot = None
+        self._n = 0
+        self._n_frames = 0
+        self._speech_frames = 0
+        self._silence_run = 0
+        self.in_speech = False
+        # Identifica a fala atual (parciais e final da mesma fala compartilham o id)
+        self.utterance_id = 0
+
+    @property
+    def speech_ms(self) -> int:
+        """Duração acumulada da fala em andamento."""
+        return self._n_frames * self.frame_ms if self.in_speech else 0
+
+    def snapshot(self):
+        """
+        Fala em andamento (para transcrição parcial), ou None. Compartilha o buffer:
+        o trecho já escrito não muda, e o buffer só volta ao pool após o release.
+        """
+        if not self.in_speech or self._n == 0:
+            return None
+        self.pool.retain(self._slot)
+        return Fala(self.pool, self._slot, self._n, self.utterance_id)
+
+    def reset(self):
+        if self._slot is not None:
+            self.pool.release(self._slot)
+            self._slot = None
+        self._pre_idx = 0
+        self._pre_count = 0
+        self._n = 0
+        self._n_frames = 0
+        self._speech_frames = 0
+        self._silence_run = 0
+        self.in_speech = False
+
+    def _medir(self, samples) -> float:
+        n = samples.size
+        if n == 0:
+            return 0.0
+        if n > self._scratch.size:
+            self._scratch = np.empty(n, dtype=np.float32)
+        buf = self._scratch[:n]
+        np.copyto(buf, samples, casting="unsafe")
+        return math.sqrt(float(np.dot(buf, buf)) / n)
+
+    def _guardar_pre_roll(self, samples):
+        n = min(samples.size, self.frame_samples)
+        self._pre_roll[self._pre_idx, :n] = samples[:n]
+        self._pre_len[self._pre_idx] = n
+        self._pre_idx = (self._pre_idx + 1) % self._pre_frames
+        self._pre_count = min(self._pre_count + 1, self._pre_frames)
+
+    def _anexar(self, samples):
+        n = min(samples.size, self.pool.samples - self._n)
+        self._slot.pcm[self._n:self._n + n] = samples[:n]
+        self._n += n
+        self._n_frames += 1
+
+    def _iniciar_fala(self):
+        self.in_speech = True
+        self.utterance_id += 1
+        self._slot = self.pool.acquire()
+        self._n = 0
+        self._n_frames = 0
+        # Desenrola o ring do pré-roll (do mais antigo ao mais novo)
+        inicio = (self._pre_idx - self._pre_count) % self._pre_frames
+        for k in range(self._pre_count):
+            i = (inicio + k) % self._pre_frames
+            self._anexar(self._pre_roll[i, :self._pre_len[i]])
+        self._pre_count = 0
+        self._speech_frames = 1
+        self._silence_run = 0
+
+    def push(self, frame: bytes):
+        """Alimenta um quadro. Retorna a Fala quando ela termina, senão None."""
+        samples = np.frombuffer(frame, dtype=np.int16)  # view, sem cópia
+        self.last_rms = self._medir(samples)
+        speech = self.vad.is_speech(frame, self.sample_rate, rms=self.last_rms)
+
+        if not self.in_speech:
+            self._guardar_pre_roll(samples)
+            if speech:
+                self._iniciar_fala()
+            return None
+
+        self._anexar(samples)
+        if speech:
+            self._speech_frames += 1
+            self._silence_run = 0
+        else:
+            self._silence_run += 1
+
+        if self._silence_run >= self._silence_frames or self._n_frames >= self._max_frames:
+            return self._finalizar()
+        return None
+
+    def _finalizar(self):
+        slot, n, falou = self._slot, self._n, self._speech_frames
+        self._slot = None
+        self._n = 0
+        self._n_frames = 0
+        self._speech_frames = 0
+        self._silence_run = 0
+        self.in_speech = False
+        if falou < self._min_speech_frames:
+            # Estalo/ruído curto: descarta
+            self.pool.release(slot)
+            return None
+        # A referência do segmentador passa para a Fala
+        return Fala(self.pool, slot, n, self.utterance_id)
+
+    def flush(self):
+        """Fecha a fala em andamento (ex: ao parar de ouvir)."""
+        if not self.in_speech:
+            return None
+        return self._finalizar()
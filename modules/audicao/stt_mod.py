@@ -1,8 +1,22 @@
+import os
+import queue
 import threading
+import unicodedata
 import speech_recognition as sr
 import numpy as np
 import time
 from modules.base_module import AeonModule
+from .audio_stream import UtteranceSegmenter, MicLevelMeter, criar_vad
+from .whisper_tuning import config_whisper, gerar_candidatos, escolher_configuracao
+from .wake_word import WakeWordGate, criar_spotter
+
+# Comandos curtos que podem ser roteados já pela transcrição parcial
+COMANDOS_RAPIDOS = ["parar", "proxima", "anterior", "pausar", "continuar", "volta", "chega"]
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize('NFD', texto or "")
+    texto = ''.join(ch for ch in texto if not unicodedata.combining(ch)).lower()
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in texto).split())
 
 # NENHUMA importação pesada aqui para garantir o boot rápido.
 
@@ -10,7 +24,7 @@ class STTModule(AeonModule):
     def __init__(self, core_context):
         super().__init__(core_context)
         self.name = "Audicao"
-        self.triggers = ["escuta", "escutar", "ativar", "parar", "dormir"]
+        self.triggers = ["escuta", "escutar", "ativar", "parar", "dormir", "calibrar whisper", "modo chamar", "modo direto"]
         self.listening = False
         self.recognizer = None 
         self.model = None
@@ -19,6 +33,27 @@ class STTModule(AeonModule):
         self.mic_device_index = None  # Índice do microfone selecionado
         self._calibrated = False
 
+        # Captura contínua: um stream aberto, VAD corta as falas, transcrição em outra thread
+        self.sample_rate = 16000
+        self.frame_ms = 30
+        self._fila_transcricao = queue.Queue(maxsize=8)
+        # Parciais: no máximo um pedido pendente; se o worker estiver ocupado, o pedido é trocado
+        self._fila_parcial = queue.Queue(maxsize=1)
+        # utterance_id -> comando rápido (normalizado) já entregue pela parcial
+        self._entregue_cedo = {}
+        # Falas já na transcrição final: parciais atrasadas delas são descartadas
+        self._finalizadas = set()
+        self._parciais_lock = threading.Lock()
+        # Última fala capturada (usada como amostra na calibração se não houver arquivo)
+        self._ultima_fala = None
+        self._ultima_buf = None
+        # Buffer float32 reaproveitado pelas parciais
+        self._buf_parcial = None
+        self._calibrando_whisper = False
+        # Wake word do modo CHAMAR (criado sob demanda; False = indisponível)
+        self._wake_gate = None
+        self._wake_lock = threading.Lock()
+
     def on_load(self) -> bool:
         """Inicia o sistema de audição assim que o módulo carrega."""
         print("[AUDICAO] Iniciando sistema de audição...")
@@ -30,7 +65,17 @@ class STTModule(AeonModule):
 
     def process(self, command: str) -> str:
         cmd = command.lower()
+
+        # Modo CHAMAR: só responde depois da wake word ("Aeon, ...")
+        if "modo chamar" in cmd or "modo direto" in cmd:
+            return self._definir_modo("CHAMAR" if "modo chamar" in cmd else "DIRETO")
         
+        if "calibrar whisper" in cmd or "calibrar audicao" in cmd:
+            if self._calibrando_whisper:
+                return "Calibração do Whisper já está em andamento."
+            threading.Thread(target=self._calibrar_whisper, daemon=True).start()
+            return "Calibrando o Whisper para esta máquina. Isso pode levar alguns minutos."
+
         if "calibrar" in cmd:
             return "Calibrando microfone..."
 
@@ -50,6 +95,19 @@ class STTModule(AeonModule):
             
         return None 
 
+    def _definir_modo(self, modo: str) -> str:
+        """Troca o modo de operação e guarda no system.json (lido de novo no boot)."""
+        status_manager = self.core_context.get("status_manager")
+        if status_manager is None:
+            return "Gerenciador de status indisponível; não consigo trocar o modo."
+        status_manager.set_mode(modo)
+        config_manager = self.core_context.get("config_manager")
+        if config_manager and hasattr(config_manager, "set_system_data"):
+            config_manager.set_system_data("operation_mode", modo)
+        if modo == "CHAMAR":
+            return "Modo chamar ativado. Diga meu nome antes de cada comando."
+        return "Modo direto ativado. Respondo a tudo que ouvir."
+
     def _check_drivers(self):
         """Verifica os drivers de áudio pesados apenas uma vez."""
         if self.drivers_ok is not None:
@@ -115,8 +173,7 @@ class STTModule(AeonModule):
         if advanced:
             try:
                 if gui: gui.add_message("Carregando Whisper AI...", "SISTEMA")
-                from faster_whisper import WhisperModel
-                self.model = WhisperModel("small", device="cpu", compute_type="int8")
+                self.model = self._carregar_whisper(self._whisper_config())
                 if gui: gui.add_message("Audição Neural: ONLINE", "SISTEMA")
                 # Inicia loop com modelo avançado
                 self._listen_loop(fallback=False)
@@ -128,15 +185,171 @@ class STTModule(AeonModule):
         # Se chegou até aqui, usa fallback baseado em SpeechRecognition (Google/Sphinx)
         self._listen_loop(fallback=True)
 
-    def _listen_loop(self, fallback=False):
+    def _stt_config(self) -> dict:
+        """Configuração da audição ('stt' no system.json)."""
+        config_manager = self.core_context.get("config_manager")
+        if config_manager and hasattr(config_manager, "get_system_data"):
+            return config_manager.get_system_data("stt", {}) or {}
+        return {}
+
+    def _whisper_config(self) -> dict:
+        """Tamanho do modelo, compute_type, threads, workers e beam (com padrões)."""
+        return config_whisper(self._stt_config())
+
+    def _carregar_whisper(self, cfg: dict):
+        from faster_whisper import WhisperModel
+        print(f"[AUDICAO] Whisper: {cfg['model_size']} / {cfg['compute_type']} / "
+              f"threads={cfg['cpu_threads']} / workers={cfg['num_workers']} / beam={cfg['beam_size']}")
+        return WhisperModel(
+            cfg["model_size"], device="cpu", compute_type=cfg["compute_type"],
+            cpu_threads=cfg["cpu_threads"], num_workers=cfg["num_workers"]
+        )
+
+    def _amostra_calibracao(self):
+        """
+        Áudio para a calibração (float32, 16 kHz): bagagem/stt_calibracao.wav se existir,
+        senão a última fala capturada, senão um sinal sintético (menos representativo).
+        """
+        config_manager = self.core_context.get("config_manager")
+        if config_manager is not None:
+            caminho = os.path.join(str(config_manager.storage_path), "stt_calibracao.wav")
+            if os.path.exists(caminho):
+                try:
+                    import soundfile as sf
+                    dados, taxa = sf.read(caminho, dtype="float32", always_2d=True)
+                    dados = dados.mean(axis=1)
+                    if taxa != self.sample_rate:
+                        # Reamostragem linear simples: suficiente para medir tempo
+                        n = int(len(dados) * self.sample_rate / taxa)
+                        dados = np.interp(np.linspace(0, len(dados) - 1, n), np.arange(len(dados)), dados).astype(np.float32)
+                    return dados, "arquivo"
+                except Exception as e:
+                    print(f"[AUDICAO] Erro lendo amostra de calibração: {e}")
+
+        if self._ultima_fala is not None and len(self._ultima_fala) >= self.sample_rate:
+            return self._ultima_fala.copy(), "ultima fala"
+
+        rng = np.random.default_rng(0)
+        return (rng.standard_normal(self.sample_rate * 5) * 0.02).astype(np.float32), "sintetico"
+
+    def _calibrar_whisper(self):
+        """Mede o real-time factor de cada configuração e salva a escolhida no system.json."""
         gui = self.core_context.get("gui")
-        if gui: gui.set_status("OUVINDO...")
-        
-        print(f"[AUDICAO] Iniciando loop de escuta (fallback={fallback})")
-        
-        # Faz calibração de ruido ambiente uma vez antes do loop principal
+        config_manager = self.core_context.get("config_manager")
+        if not self._check_drivers():
+            if gui: gui.add_message("Calibração indisponível: faster-whisper não carregou.", "AVISO")
+            return
+
+        self._calibrando_whisper = True
         try:
-            with sr.Microphone(device_index=self.mic_device_index, sample_rate=16000) as source:
+            from faster_whisper import WhisperModel
+            stt_config = dict(self._stt_config())
+            cfg = config_whisper(stt_config)
+            amostra, origem = self._amostra_calibracao()
+            duracao = len(amostra) / self.sample_rate
+            modelos = stt_config.get("calibration_models") or ["small", "base", "tiny"]
+            candidatos = gerar_candidatos(modelos=modelos)
+            if gui: gui.add_message(f"Calibrando Whisper ({len(candidatos)} configurações, amostra: {origem})...", "SISTEMA")
+
+            resultados = []
+            carregado, modelo = None, None
+            for candidato in candidatos:
+                chave = (candidato["model_size"], candidato["compute_type"], candidato["cpu_threads"])
+                try:
+                    if chave != carregado:
+                        modelo = None
+                        modelo = WhisperModel(
+                            candidato["model_size"], device="cpu",
+                            compute_type=candidato["compute_type"], cpu_threads=candidato["cpu_threads"]
+                        )
+                        carregado = chave
+                        # Aquecimento: a primeira execução paga inicializações que não contam
+                        list(modelo.transcribe(amostra[:self.sample_rate], language="pt", beam_size=1)[0])
+                    inicio = time.perf_counter()
+                    segments, _ = modelo.transcribe(amostra, language="pt", beam_size=candidato["beam_size"], vad_filter=False)
+                    list(segments)  # os segmentos são gerados sob demanda
+                    rtf = (time.perf_counter() - inicio) / duracao
+                except Exception as e:
+                    print(f"[AUDICAO] Calibração: {candidato} falhou: {e}")
+                    carregado, modelo, rtf = None, None, None
+                print(f"[AUDICAO] Calibração: {candidato} -> RTF {rtf}")
+                resultados.append((candidato, rtf))
+            modelo = None
+
+            escolhido, rtf = escolher_configuracao(resultados, cfg["rtf_target"], modelos)
+            if escolhido is None:
+                if gui: gui.add_message("Calibração falhou: nenhuma configuração funcionou.", "ERRO")
+                return
+
+            stt_config.update(escolhido)
+            if config_manager:
+                config_manager.set_system_data("stt", stt_config)
+            self.model = self._carregar_whisper(config_whisper(stt_config))
+
+            status = "dentro" if rtf <= cfg["rtf_target"] else "fora"
+            msg = (f"Whisper calibrado: {escolhido['model_size']} / {escolhido['compute_type']} / "
+                   f"{escolhido['cpu_threads']} threads / beam {escolhido['beam_size']} "
+                   f"(RTF {rtf:.2f}, {status} do alvo {cfg['rtf_target']}).")
+            print(f"[AUDICAO] {msg}")
+            if gui: gui.add_message(msg, "SISTEMA")
+        except Exception as e:
+            print(f"[AUDICAO] Erro na calibração do Whisper: {e}")
+            if gui: gui.add_message(f"Erro na calibração do Whisper: {e}", "ERRO")
+        finally:
+            self._calibrando_whisper = False
+
+    def _porteiro_wake_word(self):
+        """Retorna o WakeWordGate se o modo CHAMAR estiver ativo e houver detector, senão None."""
+        status_manager = self.core_context.get("status_manager")
+        if status_manager is None or not status_manager.is_chamar_mode():
+            return None
+        with self._wake_lock:
+            if self._wake_gate is None:
+                config = self._stt_config()
+                model_path = config.get("wake_model_path")
+                config_manager = self.core_context.get("config_manager")
+                if not model_path and config_manager is not None:
+                    model_path = os.path.join(str(config_manager.storage_path), "vosk-model-small-pt")
+                spotter = criar_spotter(config.get("wake_engine", "auto"), model_path, self.sample_rate)
+                if spotter is None:
+                    print("[AUDICAO] Nenhum detector de wake word disponível; modo CHAMAR filtra a transcrição completa pelos gatilhos.")
+                    self._wake_gate = False
+                else:
+                    print(f"[AUDICAO] Detector de wake word: {spotter.nome}")
+                    self._wake_gate = WakeWordGate(
+                        spotter, status_manager.get_triggers,
+                        janela_conversa_s=float(config.get("wake_followup_s", 8.0))
+                    )
+        return self._wake_gate or None
+
+    def _aguardando_wake_word(self) -> bool:
+        """True se a fala atual ainda precisa passar pelo porteiro (sem parciais nesse caso)."""
+        porteiro = self._porteiro_wake_word()
+        if porteiro is None:
+            # Sem detector o gatilho só aparece na transcrição final
+            return self._chamar_sem_detector()
+        return not porteiro.aberto
+
+    def _chamar_sem_detector(self) -> bool:
+        """Modo CHAMAR sem Vosk/Whisper-tiny: o filtro é has_trigger no texto final."""
+        status_manager = self.core_context.get("status_manager")
+        return (self._wake_gate is False and status_manager is not None
+                and status_manager.is_chamar_mode())
+
+    def _passa_wake_word(self, raw_data: bytes, sample_width: int) -> bool:
+        """No modo CHAMAR, descarta falas sem gatilho antes da transcrição completa."""
+        porteiro = self._porteiro_wake_word()
+        if porteiro is None or sample_width != 2:
+            return True
+        if porteiro.deixa_passar(raw_data):
+            return True
+        print("[AUDICAO] Fala sem wake word descartada (modo CHAMAR)")
+        return False
+
+    def _calibrar(self):
+        """Calibração de ruído ambiente, uma vez antes do loop principal."""
+        try:
+            with sr.Microphone(device_index=self.mic_device_index, sample_rate=self.sample_rate) as source:
                 try:
                     self.recognizer.adjust_for_ambient_noise(source, duration=1.0)
                     # Cap no energy_threshold para evitar valores absurdos
@@ -150,10 +363,300 @@ class STTModule(AeonModule):
             # Falha ao abrir microfone para calibração; continuará sem calibrar
             pass
 
+    def _transcrever(self, audio, sample_width: int, fallback: bool) -> str:
+        """
+        Transcreve uma fala (Whisper se disponível, senão Google).
+        `audio` é uma Fala da captura contínua (view sobre o buffer, sem cópia)
+        ou bytes PCM16 mono do loop clássico.
+        """
+        gui = self.core_context.get("gui")
+        if isinstance(audio, (bytes, bytearray)):
+            raw_data = audio
+            audio_np = np.frombuffer(raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+            # Loop clássico não tem medidor contínuo: um nível por frase
+            try:
+                if audio_np.size and gui and hasattr(gui, 'set_mic_level'):
+                    rms = float(np.sqrt(np.dot(audio_np, audio_np) / audio_np.size))
+                    gui.set_mic_level(min(1.0, rms * 10.0))
+            except Exception:
+                pass
+        else:
+            raw_data = None
+            audio_np = audio.float32() if not fallback and self.model is not None else None
+
+        if not fallback and self.model is not None:
+            if audio_np.size >= self.sample_rate:
+                self._guardar_ultima_fala(audio_np)
+            segments, _ = self.model.transcribe(
+                audio_np, language="pt", beam_size=self._whisper_config()["beam_size"],
+                vad_filter=True, vad_parameters=dict(min_silence_duration_ms=500)
+            )
+            texto_final = " ".join([s.text for s in segments]).strip()
+            print(f"[AUDICAO] Transcrito (Whisper): {texto_final}")
+            return texto_final
+
+        # Fallback para Google Speech Recognition (requer internet) — mais leve
+        try:
+            print("[AUDICAO] Usando Google Speech Recognition...")
+            if raw_data is None:
+                raw_data = audio.tobytes()
+            audio = sr.AudioData(raw_data, self.sample_rate, sample_width)
+            texto_final = self.recognizer.recognize_google(audio, language="pt-BR")
+            print(f"[AUDICAO] Transcrito (Google): {texto_final}")
+            return texto_final
+        except sr.UnknownValueError:
+            print("[AUDICAO] Não consegui entender o áudio (UnknownValue)")
+        except sr.RequestError as e:
+            print(f"[AUDICAO] Erro na requisição (sem internet?): {e}")
+        except Exception as e:
+            print(f"[AUDICAO] Erro no reconhecimento fallback: {e}")
+        return ""
+
+    def _guardar_ultima_fala(self, audio_np):
+        """Copia a fala (amostra da calibração) para um buffer reaproveitado entre falas."""
+        n = audio_np.size
+        if self._ultima_buf is None or self._ultima_buf.size < n:
+            self._ultima_buf = np.empty(n, dtype=np.float32)
+        np.copyto(self._ultima_buf[:n], audio_np)
+        self._ultima_fala = self._ultima_buf[:n]
+
+    def _entregar_texto(self, texto_final: str):
+        """Envia o texto reconhecido para a lógica principal."""
+        gui = self.core_context.get("gui")
+        if texto_final and self._chamar_sem_detector():
+            if not self.core_context["status_manager"].has_trigger(texto_final):
+                print(f"[AUDICAO] Fala sem wake word descartada (modo CHAMAR): '{texto_final}'")
+                return
+        if texto_final:
+            print(f"[AUDICAO] Enviando para GUI: '{texto_final}'")
+            if gui: gui.logic_callback(texto_final)
+            
+            if any(x in texto_final.lower() for x in ["parar", "chega", "dormir"]):
+                self.listening = False
+        else:
+            print("[AUDICAO] Texto vazio após transcrição")
+
+    def _listen_loop(self, fallback=False):
+        gui = self.core_context.get("gui")
+        if gui: gui.set_status("OUVINDO...")
+        
+        print(f"[AUDICAO] Iniciando loop de escuta (fallback={fallback})")
+        self._calibrar()
+
+        if self._stt_config().get("capture_mode", "continuous") == "continuous":
+            try:
+                self._continuous_loop(fallback)
+                if gui: gui.set_status("ONLINE")
+                return
+            except Exception as e:
+                print(f"[AUDICAO] Captura contínua indisponível ({e}). Usando loop clássico.")
+
+        self._classic_loop(fallback)
+        print("[AUDICAO] Loop de escuta finalizado")
+        if gui: gui.set_status("ONLINE")
+
+    def _continuous_loop(self, fallback):
+        """
+        Mantém um único stream do microfone aberto. Os quadros passam pelo VAD
+        (ring buffer de pré-roll) e cada fala completa vai para a thread de
+        transcrição, então a captura nunca para enquanto o Whisper trabalha.
+        O áudio vai direto para buffers pré-alocados e o nível do microfone é
+        publicado a taxa fixa, com o RMS calculado uma vez por quadro.
+        """
+        config = self._stt_config()
+        segmenter = UtteranceSegmenter(
+            criar_vad(self.recognizer.energy_threshold),
+            sample_rate=self.sample_rate,
+            frame_ms=self.frame_ms,
+            max_utterance_s=float(config.get("max_utterance_s", 15.0)),
+        )
+        frame_samples = segmenter.frame_samples
+
+        gui = self.core_context.get("gui")
+        medidor = MicLevelMeter(intervalo_ms=int(config.get("mic_meter_interval_ms", 50)))
+        publicar_nivel = gui is not None and hasattr(gui, 'set_mic_level')
+
+        worker = threading.Thread(target=self._transcription_worker, args=(fallback,), daemon=True)
+        worker.start()
+
+        # Parciais só com Whisper local (no Google cada parcial seria uma requisição)
+        parciais = bool(config.get("partials", True)) and not fallback and self.model is not None
+        intervalo_ms = int(config.get("partial_interval_ms", 600))
+        proxima_parcial_ms = intervalo_ms
+        fala_atual = segmenter.utterance_id
+        with self._parciais_lock:
+            # Segmentador novo recomeça os ids de fala
+            self._entregue_cedo.clear()
+            self._finalizadas.clear()
+        if parciais:
+            self._buf_parcial = np.empty(segmenter.pool.samples, dtype=np.float32)
+            threading.Thread(target=self._partial_worker, daemon=True).start()
+        print(f"[AUDICAO] Captura contínua iniciada (stream único + VAD, parciais={parciais})")
+
+        relogio_ms = 0
+        try:
+            with sr.Microphone(device_index=self.mic_device_index, sample_rate=self.sample_rate,
+                               chunk_size=frame_samples) as source:
+                sample_width = source.SAMPLE_WIDTH
+                while self.listening:
+                    frame = source.stream.read(frame_samples)
+                    fala = segmenter.push(frame)
+                    relogio_ms += self.frame_ms
+                    if publicar_nivel:
+                        nivel = medidor.update(segmenter.last_rms, relogio_ms)
+                        if nivel is not None:
+                            gui.set_mic_level(nivel)
+                    if segmenter.utterance_id != fala_atual:
+                        # Começou uma fala nova: reinicia o relógio das parciais
+                        fala_atual = segmenter.utterance_id
+                        proxima_parcial_ms = intervalo_ms
+                    if fala:
+                        self._enfileirar_fala(fala, sample_width)
+                    elif parciais and segmenter.speech_ms >= proxima_parcial_ms and not self._aguardando_wake_word():
+                        self._pedir_parcial(segmenter.snapshot())
+                        proxima_parcial_ms = segmenter.speech_ms + intervalo_ms
+                fala = segmenter.flush()
+                if fala:
+                    self._enfileirar_fala(fala, sample_width)
+        finally:
+            self._fila_transcricao.put(None)
+            if parciais:
+                self._pedir_parcial(None)
+            worker.join(timeout=5)
+            if publicar_nivel:
+                gui.set_mic_level(0.0)
+            print("[AUDICAO] Captura contínua finalizada")
+
+    def _enfileirar_fala(self, fala, sample_width: int):
+        try:
+            self._fila_transcricao.put_nowait((fala, sample_width))
+        except queue.Full:
+            # Transcrição atrasada: descarta a fala mais antiga para não acumular latência
+            try:
+                antiga = self._fila_transcricao.get_nowait()
+                if antiga is not None:
+                    antiga[0].release()
+            except queue.Empty:
+                pass
+            self._fila_transcricao.put_nowait((fala, sample_width))
+
+    def _pedir_parcial(self, fala):
+        """Agenda uma transcrição parcial, substituindo um pedido ainda não atendido (None encerra)."""
+        while True:
+            try:
+                self._fila_parcial.put_nowait(fala)
+                return
+            except queue.Full:
+                try:
+                    antiga = self._fila_parcial.get_nowait()
+                    if antiga is not None:
+                        antiga.release()
+                except queue.Empty:
+                    pass
+
+    def _partial_worker(self):
+        """Transcreve parciais (greedy, sem VAD) e mostra o progresso na GUI."""
+        gui = self.core_context.get("gui")
+        # (utterance_id, texto normalizado) da parcial anterior: o comando só sai
+        # cedo se duas parciais seguidas da mesma fala concordarem
+        anterior = (None, None)
+        while True:
+            fala = self._fila_parcial.get()
+            if fala is None:
+                break
+            utterance_id = fala.utterance_id
+            try:
+                with self._parciais_lock:
+                    if utterance_id in self._entregue_cedo or utterance_id in self._finalizadas:
+                        continue
+                audio_np = fala.float32(out=self._buf_parcial)
+                segments, _ = self.model.transcribe(
+                    audio_np, language="pt", beam_size=1, vad_filter=False,
+                    condition_on_previous_text=False, without_timestamps=True
+                )
+                parcial = " ".join([s.text for s in segments]).strip()
+            except Exception as e:
+                print(f"[AUDICAO] Erro na transcrição parcial: {e}")
+                continue
+            finally:
+                fala.release()
+            if not parcial:
+                continue
+
+            print(f"[AUDICAO] Parcial: {parcial}")
+            if gui:
+                if hasattr(gui, 'set_caption'):
+                    gui.set_caption(f"{parcial}...", "VOCÊ")
+                else:
+                    gui.set_status(f"OUVINDO: {parcial[:24]}")
+
+            # Comando curto, inequívoco e estável (igual na parcial anterior): roteia já,
+            # sem esperar o fim da fala. "próxima" seguido de "música" não é estável.
+            # Com o porteiro fechado (modo CHAMAR) não: a fala completa passa pelo detector.
+            comando = _normalizar(parcial)
+            estavel = anterior == (utterance_id, comando)
+            anterior = (utterance_id, comando)
+            if estavel and comando in self._comandos_rapidos() and not self._aguardando_wake_word():
+                # Verifica e reivindica junto com a entrega: se a fala já foi para a
+                # transcrição final, quem entrega é ela
+                with self._parciais_lock:
+                    if utterance_id in self._finalizadas or utterance_id in self._entregue_cedo:
+                        continue
+                    print(f"[AUDICAO] Comando rápido pela parcial: '{parcial}'")
+                    self._entregue_cedo[utterance_id] = comando
+                    self._entregar_texto(parcial)
+
+    def _comandos_rapidos(self) -> set:
+        comandos = self._stt_config().get("quick_commands", COMANDOS_RAPIDOS)
+        return {_normalizar(c) for c in comandos}
+
+    def _transcription_worker(self, fallback):
+        gui = self.core_context.get("gui")
+        while True:
+            item = self._fila_transcricao.get()
+            if item is None:
+                break
+            fala, sample_width = item
+            utterance_id = fala.utterance_id
+            self._marcar_finalizada(utterance_id)
+            try:
+                if not self._passa_wake_word(fala.pcm, sample_width):
+                    continue
+                if gui: gui.set_status("PROCESSANDO...")
+                texto_final = self._transcrever(fala, sample_width, fallback)
+                # Lido só agora: uma parcial pode ter entregue o comando durante a transcrição
+                with self._parciais_lock:
+                    comando_cedo = self._entregue_cedo.pop(utterance_id, None)
+                if comando_cedo is not None:
+                    # O comando já foi roteado pela parcial. Um resto não vira outro comando
+                    # (partir a fala em duas ordens é pior que a latência economizada)
+                    if _normalizar(texto_final) != comando_cedo:
+                        print(f"[AUDICAO] Final '{texto_final}' descartada: comando '{comando_cedo}' já entregue")
+                    continue
+                self._entregar_texto(texto_final)
+            except Exception as e:
+                print(f"[AUDICAO] Erro na transcrição: {e}")
+            finally:
+                with self._parciais_lock:
+                    self._entregue_cedo.pop(utterance_id, None)
+                fala.release()
+                if gui and self.listening: gui.set_status("OUVINDO...")
+
+    def _marcar_finalizada(self, utterance_id):
+        """A partir daqui as parciais desta fala não entregam mais nada."""
+        with self._parciais_lock:
+            self._finalizadas.add(utterance_id)
+            if len(self._finalizadas) > 64:
+                # Ids são crescentes: só as falas recentes ainda podem ter parcial em voo
+                self._finalizadas = {i for i in self._finalizadas if i > utterance_id - 32}
+
+    def _classic_loop(self, fallback):
+        """Loop original: reabre o microfone e usa recognizer.listen a cada frase."""
+        gui = self.core_context.get("gui")
         while self.listening:
             try:
                 # Usa o microfone selecionado, ou o padrão se None
-                with sr.Microphone(device_index=self.mic_device_index, sample_rate=16000) as source:
+                with sr.Microphone(device_index=self.mic_device_index, sample_rate=self.sample_rate) as source:
                     # Não recalibrar a cada iteração para evitar flutuações constantes
                     try:
                         print("[AUDICAO] Aguardando áudio do microfone...")
@@ -163,67 +666,15 @@ class STTModule(AeonModule):
                         continue 
 
                     if not self.listening: break
+                    if not self._passa_wake_word(audio.get_raw_data(), audio.sample_width):
+                        continue
 
                     if gui: gui.set_status("PROCESSANDO...")
                     print("[AUDICAO] Áudio capturado, processando...")
                     
-                    if not fallback and self.model is not None:
-                        raw_data = audio.get_raw_data()
-                        audio_np = np.frombuffer(raw_data, dtype=np.int16).astype(np.float32) / 32768.0
-                        segments, _ = self.model.transcribe(
-                            audio_np, language="pt", beam_size=5,
-                            vad_filter=True, vad_parameters=dict(min_silence_duration_ms=500)
-                        )
-                        texto_final = " ".join([s.text for s in segments]).strip()
-                        print(f"[AUDICAO] Transcrito (Whisper): {texto_final}")
-                        # update mic level from audio
-                        try:
-                            audio_np = audio_np if 'audio_np' in locals() else np.frombuffer(audio.get_raw_data(), dtype=np.int16).astype(np.float32) / 32768.0
-                            rms = float(np.sqrt(np.mean(audio_np**2)))
-                            level = min(1.0, rms * 10.0)
-                            if gui and hasattr(gui, 'set_mic_level'):
-                                gui.set_mic_level(level)
-                        except Exception:
-                            pass
-                    else:
-                        # Fallback para Google Speech Recognition (requer internet) — mais leve
-                        try:
-                            print("[AUDICAO] Usando Google Speech Recognition...")
-                            texto_final = self.recognizer.recognize_google(audio, language="pt-BR")
-                            print(f"[AUDICAO] Transcrito (Google): {texto_final}")
-                        except sr.UnknownValueError:
-                            print("[AUDICAO] Não consegui entender o áudio (UnknownValue)")
-                            texto_final = ""
-                        except sr.RequestError as e:
-                            print(f"[AUDICAO] Erro na requisição (sem internet?): {e}")
-                            texto_final = ""
-                        except Exception as e:
-                            print(f"[AUDICAO] Erro no reconhecimento fallback: {e}")
-                            texto_final = ""
-
-                    # Update mic visual level in GUI for fallback path as well
-                    try:
-                        raw = audio.get_raw_data()
-                        audio_np2 = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
-                        rms2 = float(np.sqrt(np.mean(audio_np2**2)))
-                        level2 = min(1.0, rms2 * 10.0)
-                        if gui and hasattr(gui, 'set_mic_level'):
-                            gui.set_mic_level(level2)
-                    except Exception:
-                        pass
-                    
-                    if texto_final:
-                        print(f"[AUDICAO] Enviando para GUI: '{texto_final}'")
-                        if gui: gui.logic_callback(texto_final)
-                        
-                        if any(x in texto_final.lower() for x in ["parar", "chega", "dormir"]):
-                            self.listening = False
-                    else:
-                        print("[AUDICAO] Texto vazio após transcrição")
+                    texto_final = self._transcrever(audio.get_raw_data(), audio.sample_width, fallback)
+                    self._entregar_texto(texto_final)
             except Exception as e:
                 # Evita crashar se o microfone for desconectado, etc.
                 print(f"[AUDICAO] Erro no loop de escuta: {e}")
                 time.sleep(2)
-        
-        print("[AUDICAO] Loop de escuta finalizado")
-        if gui: gui.set_status("ONLINE")
\ No newline at end of file
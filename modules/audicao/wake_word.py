@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import unicodedata
+
+from core.trigger_index import tokenize, edit_distance
+
+# Reconhecedor com gramática restrita (kws de verdade, bem mais barato que o Whisper). Opcional.
+try:
+    import vosk
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize('NFD', texto or "")
+    return ''.join(ch for ch in texto if not unicodedata.combining(ch)).lower()
+
+
+def encontrar_gatilho(texto: str, gatilhos, max_edits: int = 1, min_len_edit: int = 4):
+    """
+    Retorna o gatilho presente no texto, ou None.
+    Aceita o gatilho como substring (como StatusManager.has_trigger) ou um token
+    a até `max_edits` edições dele (o reconhecedor leve erra a grafia: "eon" -> "aeon").
+    """
+    norm = _normalizar(texto)
+    if not norm:
+        return None
+    gatilhos = [_normalizar(g) for g in gatilhos if g]
+    for gatilho in gatilhos:
+        if gatilho in norm:
+            return gatilho
+    if max_edits <= 0:
+        return None
+    tokens = tokenize(norm)
+    for gatilho in gatilhos:
+        if len(gatilho) < min_len_edit or " " in gatilho:
+            continue
+        for token in tokens:
+            if edit_distance(token, gatilho, max_edits) <= max_edits:
+                return gatilho
+    return None
+
+
+class VoskSpotter:
+    """Keyword spotting com Vosk: a gramática contém só os gatilhos (o resto vira [unk])."""
+    nome = "vosk"
+
+    def __init__(self, model_path: str, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self._model = vosk.Model(model_path)
+        self._gramatica = None
+        self._gatilhos = None
+
+    def transcrever(self, pcm16: bytes, gatilhos) -> str:
+        gatilhos = tuple(_normalizar(g) for g in gatilhos)
+        if gatilhos != self._gatilhos:
+            self._gatilhos = gatilhos
+            self._gramatica = json.dumps(list(gatilhos) + ["[unk]"], ensure_ascii=False)
+        rec = vosk.KaldiRecognizer(self._model, self.sample_rate, self._gramatica)
+        rec.AcceptWaveform(pcm16 if isinstance(pcm16, (bytes, bytearray)) else pcm16.tobytes())
+        return json.loads(rec.FinalResult()).get("text", "")
+
+
+class WhisperTinySpotter:
+    """
+    Alternativa sem Vosk: Whisper "tiny" greedy só na janela inicial da fala,
+    com os gatilhos no prompt. Ainda é uma transcrição, mas bem mais barata que a completa.
+    """
+    nome = "whisper_tiny"
+
+    def __init__(self, sample_rate: int = 16000, janela_s: float = 2.5, compute_type: str = "int8"):
+        from faster_whisper import WhisperModel
+        import numpy as np
+        self._np = np
+        self.sample_rate = sample_rate
+        self.janela = int(janela_s * sample_rate)
+        self._model = WhisperModel("tiny", device="cpu", compute_type=compute_type, cpu_threads=1)
+
+    def transcrever(self, pcm16: bytes, gatilhos) -> str:
+        np = self._np
+        if isinstance(pcm16, (bytes, bytearray)):
+            pcm16 = np.frombuffer(pcm16, dtype=np.int16)
+        audio = pcm16[:self.janela].astype(np.float32) / 32768.0
+        segments, _ = self._model.transcribe(
+            audio, language="pt", beam_size=1, vad_filter=False,
+            condition_on_previous_text=False, without_timestamps=True,
+            initial_prompt=", ".join(gatilhos)
+        )
+        return " ".join(s.text for s in segments)
+
+
+def criar_spotter(engine: str = "auto", model_path: str = None, sample_rate: int = 16000):
+    """
+    Escolhe o detector de wake word. `engine`: "auto", "vosk", "whisper_tiny" ou "off".
+    Retorna None se nenhum estiver disponível (sem porteiro: tudo vai para o transcritor).
+    """
+    if engine == "off":
+        return None
+    if engine in ("auto", "vosk") and VOSK_AVAILABLE and model_path and os.path.isdir(model_path):
+        try:
+            return VoskSpotter(model_path, sample_rate)
+        except Exception as e:
+            print(f"[AUDICAO] Falha ao carregar modelo Vosk ({model_path}): {e}")
+    if engine in ("auto", "whisper_tiny"):
+        try:
+            return WhisperTinySpotter(sample_rate)
+        except Exception as e:
+            print(f"[AUDICAO] Wake word via Whisper tiny indisponível: {e}")
+    return None
+
+
+class WakeWordGate:
+    """
+    Porteiro do modo CHAMAR: só deixa a fala seguir para a transcrição completa se o
+    detector leve ouvir um gatilho. Depois de um gatilho, as falas dos próximos
+    `janela_conversa_s` segundos passam direto (ex: "Aeon." ... "abre o navegador").
+
+    Args:
+        spotter: Objeto com transcrever(pcm16, gatilhos) -> texto (pcm16: bytes ou array int16).
+        gatilhos: Função que retorna a lista atual de gatilhos (StatusManager.get_triggers).
+        janela_conversa_s: Segundos em que o porteiro fica aberto após um gatilho.
+        relogio: Função de tempo (injetável nos testes).
+    """
+    def __init__(self, spotter, gatilhos, janela_conversa_s: float = 8.0, relogio=None):
+        import time
+        self.spotter = spotter
+        self._gatilhos = gatilhos
+        self.janela_conversa_s = janela_conversa_s
+        self._relogio = relogio or time.monotonic
+        self._aberto_ate = 0.0
+        self._lock = threading.Lock()
+        self.aceitas = 0
+        self.descartadas = 0
+
+    @property
+    def aberto(self) -> bool:
+        return self._relogio() < self._aberto_ate
+
+    def abrir(self):
+        """Mantém o porteiro aberto por mais uma janela (chamado a cada fala aceita)."""
+        self._aberto_ate = self._relogio() + self.janela_conversa_s
+
+    def deixa_passar(self, pcm16: bytes) -> bool:
+        """Roda o detector (a menos que a janela de conversa esteja aberta) e decide."""
+        if self.aberto:
+            self.abrir()
+            return True
+        gatilhos = list(self._gatilhos())
+        with self._lock:
+            try:
+                texto = self.spotter.transcrever(pcm16, gatilhos)
+            except Exception as e:
+                print(f"[AUDICAO] Erro no detector de wake word: {e}")
+                return True
+        gatilho = encontrar_gatilho(texto, gatilhos)
+        if gatilho:
+            print(f"[AUDICAO] Wake word '{gatilho}' detectada ({self.spotter.nome})")
+            self.aceitas += 1
+            self.abrir()
+            return True
+        self.descartadas += 1
+        return False
+
+    def stats(self) -> dict:
+        return {"engine": self.spotter.nome, "aceitas": self.aceitas, "descartadas": self.descartadas}
@@ -0,0 +1,85 @@
+import os
+
+# Configuração padrão do Whisper (sobrescrita pela chave "stt" do system.json)
+WHISPER_PADRAO = {
+    "model_size": "small",
+    "compute_type": "int8",
+    "cpu_threads": 0,       # 0 = deixa o CTranslate2 decidir
+    "num_workers": 1,
+    "beam_size": 5,
+    "rtf_target": 0.5,      # tempo de transcrição / duração do áudio
+}
+
+MODELOS_VALIDOS = ["tiny", "base", "small", "medium", "large-v2", "large-v3"]
+COMPUTE_TYPES_VALIDOS = ["int8", "int8_float16", "int8_float32", "float16", "float32"]
+
+
+def config_whisper(stt_config: dict = None) -> dict:
+    """Mescla a config do usuário com os padrões, descartando valores inválidos."""
+    cfg = dict(WHISPER_PADRAO)
+    for chave, valor in (stt_config or {}).items():
+        if chave in cfg:
+            cfg[chave] = valor
+
+    if cfg["model_size"] not in MODELOS_VALIDOS:
+        print(f"[AUDICAO] model_size invalido '{cfg['model_size']}', usando '{WHISPER_PADRAO['model_size']}'.")
+        cfg["model_size"] = WHISPER_PADRAO["model_size"]
+    if cfg["compute_type"] not in COMPUTE_TYPES_VALIDOS:
+        print(f"[AUDICAO] compute_type invalido '{cfg['compute_type']}', usando '{WHISPER_PADRAO['compute_type']}'.")
+        cfg["compute_type"] = WHISPER_PADRAO["compute_type"]
+    for chave, minimo in (("cpu_threads", 0), ("num_workers", 1), ("beam_size", 1)):
+        try:
+            cfg[chave] = max(minimo, int(cfg[chave]))
+        except (TypeError, ValueError):
+            cfg[chave] = WHISPER_PADRAO[chave]
+    try:
+        cfg["rtf_target"] = float(cfg["rtf_target"])
+    except (TypeError, ValueError):
+        cfg["rtf_target"] = WHISPER_PADRAO["rtf_target"]
+    return cfg
+
+
+def gerar_candidatos(modelos=None, compute_types=None, threads=None, beams=None) -> list:
+    """
+    Grade de configurações para a calibração, agrupada por modelo (maior primeiro).
+    Cada item: dict com model_size, compute_type, cpu_threads, beam_size.
+    """
+    n_cpu = os.cpu_count() or 2
+    modelos = modelos or ["small", "base", "tiny"]
+    compute_types = compute_types or ["int8", "int8_float16", "float32"]
+    threads = threads or sorted({max(1, n_cpu // 2), n_cpu})
+    beams = beams or [1, 5]
+
+    candidatos = []
+    for modelo in modelos:
+        for compute_type in compute_types:
+            for n_threads in threads:
+                for beam in beams:
+                    candidatos.append({
+                        "model_size": modelo,
+                        "compute_type": compute_type,
+                        "cpu_threads": n_threads,
+                        "beam_size": beam,
+                    })
+    return candidatos
+
+
+def escolher_configuracao(resultados: list, rtf_alvo: float, ordem_modelos: list):
+    """
+    Escolhe a configuração a partir dos resultados da calibração.
+
+    `resultados` é uma lista de (candidato, rtf); rtf None indica que a configuração falhou.
+    Vale o maior modelo (na ordem dada) que tenha alguma configuração dentro do alvo,
+    e dentro dele a mais rápida. Se nada bater o alvo, retorna a mais rápida no geral.
+    Retorna (candidato, rtf) ou (None, None).
+    """
+    validos = [(c, rtf) for c, rtf in resultados if rtf is not None]
+    if not validos:
+        return (None, None)
+
+    for modelo in ordem_modelos:
+        dentro = [(c, rtf) for c, rtf in validos if c["model_size"] == modelo and rtf <= rtf_alvo]
+        if dentro:
+            return min(dentro, key=lambda item: item[1])
+
+    return min(validos, key=lambda item: item[1])
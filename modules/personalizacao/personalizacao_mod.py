@@ -118,7 +118,11 @@ class PersonalizacaoModule(AeonModule):
         """Busca as vozes em uma thread para nao bloquear a UI."""
         io_handler = self.core_context.get("io_handler")
         try:
-            voices = asyncio.run(edge_tts.list_voices())
+            # Reaproveita o loop asyncio do IOHandler quando disponível
+            if io_handler and hasattr(io_handler, "run_async"):
+                voices = io_handler.run_async(edge_tts.list_voices(), timeout=30)
+            else:
+                voices = asyncio.run(edge_tts.list_voices())
             pt_voices = [v['ShortName'] for v in voices if v['Locale'].startswith('pt-BR')]
             response = "As vozes em portugues encontradas sao: " + ", ".join(pt_voices)
         except Exception as e:
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.async_loop import AsyncLoopService
+
+
+class TestAsyncLoopService(unittest.TestCase):
+    """Testes para o loop asyncio persistente usado pelos motores de TTS"""
+
+    def setUp(self):
+        self.service = AsyncLoopService(max_concurrent=2)
+
+    def tearDown(self):
+        self.service.stop()
+
+    def test_run_returns_result(self):
+        """Executa corrotina e devolve o resultado"""
+        async def soma(a, b):
+            await asyncio.sleep(0)
+            return a + b
+        self.assertEqual(self.service.run(soma(2, 3), timeout=2), 5)
+
+    def test_loop_is_reused(self):
+        """Chamadas consecutivas usam o mesmo loop"""
+        async def loop_atual():
+            return asyncio.get_running_loop()
+        primeiro = self.service.run(loop_atual(), timeout=2)
+        segundo = self.service.run(loop_atual(), timeout=2)
+        self.assertIs(primeiro, segundo)
+
+    def test_concurrency_is_bounded(self):
+        """Nunca passa de max_concurrent corrotinas simultâneas"""
+        estado = {"ativas": 0, "pico": 0}
+
+        async def tarefa():
+            estado["ativas"] += 1
+            estado["pico"] = max(estado["pico"], estado["ativas"])
+            await asyncio.sleep(0.02)
+            estado["ativas"] -= 1
+
+        futures = [self.service.submit(tarefa()) for _ in range(6)]
+        for f in futures:
+            f.result(2)
+        self.assertEqual(estado["pico"], 2)
+
+    def test_exceptions_propagate(self):
+        """Erros da corrotina chegam ao chamador"""
+        async def falha():
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            self.service.run(falha(), timeout=2)
+
+    def test_stop_and_restart(self):
+        """Depois de parar, o serviço sobe de novo sob demanda"""
+        async def ok():
+            return "ok"
+        self.service.run(ok(), timeout=2)
+        self.service.stop()
+        self.assertFalse(self.service.running)
+        self.assertEqual(self.service.run(ok(), timeout=2), "ok")
+
+    def test_old_thread_does_not_clear_new_loop(self):
+        """A thread antiga, ainda finalizando, não apaga o loop de um start() novo"""
+        import threading
+        liberar = threading.Event()
+        iniciou = threading.Event()
+
+        async def presa():
+            iniciou.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                liberar.wait(2)  # segura a finalização da thread antiga
+                raise
+
+        async def ok():
+            return "ok"
+
+        self.service.submit(presa())
+        self.assertTrue(iniciou.wait(2))
+        thread_antiga = self.service._thread
+        self.service.stop(timeout=0.1)
+        self.assertTrue(thread_antiga.is_alive())
+
+        self.assertEqual(self.service.run(ok(), timeout=2), "ok")
+        liberar.set()
+        thread_antiga.join(2)
+
+        self.assertTrue(self.service.running)
+        self.assertEqual(self.service.run(ok(), timeout=2), "ok")
+
+
+if __name__ == '__main__':
+    unittest.main()
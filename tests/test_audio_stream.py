@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.audicao.audio_stream import EnergyVAD, MicLevelMeter, UtteranceSegmenter
+
+FRAME = 480  # 30 ms a 16 kHz
+
+
+def quadro(amplitude, valor_base=0):
+    return (np.full(FRAME, valor_base, dtype=np.int16) + np.int16(amplitude)).tobytes()
+
+
+class TestUtteranceSegmenter(unittest.TestCase):
+    """Testes para a segmentação de falas sobre buffers pré-alocados"""
+
+    def setUp(self):
+        self.seg = UtteranceSegmenter(EnergyVAD(300), pre_roll_ms=90, silence_ms=90, min_speech_ms=60)
+
+    def _falar(self, n_fala, valor=1000):
+        for i in range(3):
+            self.assertIsNone(self.seg.push(quadro(10, i)))
+        for _ in range(n_fala):
+            self.assertIsNone(self.seg.push(quadro(valor)))
+        fala = None
+        for _ in range(3):
+            fala = self.seg.push(quadro(0)) or fala
+        return fala
+
+    def test_utterance_includes_pre_roll_in_order(self):
+        """A fala começa pelo pré-roll (do mais antigo ao mais novo) e termina no silêncio"""
+        fala = self._falar(4)
+        self.assertIsNotNone(fala)
+        # Pré-roll de 3 quadros (o 1º quadro de fala entra nele) + 3 de fala + 3 de silêncio
+        self.assertEqual(len(fala), 9 * FRAME)
+        self.assertEqual([int(fala.pcm[k * FRAME]) for k in range(3)], [11, 12, 1000])
+        self.assertAlmostEqual(float(fala.float32()[2 * FRAME]), 1000 / 32768.0, places=6)
+        self.assertAlmostEqual(self.seg.last_rms, 0.0)
+        fala.release()
+
+    def test_buffers_are_reused(self):
+        """Buffers devolvidos voltam ao pool: sem alocação nova por fala"""
+        alocados = self.seg.pool.alocados
+        for _ in range(10):
+            self._falar(4).release()
+        self.assertEqual(self.seg.pool.alocados, alocados)
+
+    def test_snapshot_keeps_buffer_alive(self):
+        """O buffer da parcial só volta ao pool após todos os releases"""
+        for _ in range(3):
+            self.seg.push(quadro(0))
+        self.seg.push(quadro(1000))
+        parcial = self.seg.snapshot()
+        for _ in range(3):
+            self.seg.push(quadro(1000))
+        final = self.seg.flush()
+        final.release()
+        livres = len(self.seg.pool._livres)
+        parcial.release()
+        self.assertEqual(len(self.seg.pool._livres), livres + 1)
+
+    def test_short_noise_is_discarded(self):
+        """Estalo curto não vira fala e o buffer volta ao pool"""
+        livres = len(self.seg.pool._livres)
+        self.assertIsNone(self._falar(1))
+        self.assertEqual(len(self.seg.pool._livres), livres)
+
+
+class TestMicLevelMeter(unittest.TestCase):
+    """Testes para o medidor do microfone a taxa fixa"""
+
+    def test_publishes_at_fixed_rate_with_decay(self):
+        medidor = MicLevelMeter(intervalo_ms=60, ganho=10.0, decaimento=0.5)
+        self.assertEqual(medidor.update(3276.8, 0), 1.0)
+        self.assertIsNone(medidor.update(0.0, 30))
+        self.assertEqual(medidor.update(0.0, 60), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
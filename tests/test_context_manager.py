@@ -0,0 +1,242 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.context_manager import ContextManager
+from core.rw_lock import RWLock
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+class TestContextManagerTTL(unittest.TestCase):
+    """Testes para a expiração por heap do ContextManager"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.ctx = ContextManager(clock=self.clock)
+
+    def test_expired_key_dropped_on_get(self):
+        self.ctx.set("clipboard", "abc", ttl=5)
+        self.assertEqual(self.ctx.get("clipboard"), "abc")
+        self.clock.t += 5
+        self.assertIsNone(self.ctx.get("clipboard"))
+        self.assertEqual(self.ctx.get_stats()["expired_on_get"], 1)
+
+    def test_sweep_pops_only_due_keys(self):
+        self.ctx.set("curta", 1, ttl=1)
+        self.ctx.set("longa", 2, ttl=100)
+        self.ctx.set("fixa", 3)
+        self.clock.t += 10
+        self.assertEqual(self.ctx.cleanup(), 1)
+        self.assertEqual(self.ctx.get_all(), {"longa": 2, "fixa": 3})
+
+    def test_rewrite_invalidates_old_expiration(self):
+        """Regravar a chave (sem TTL ou com TTL maior) anula a expiração antiga"""
+        self.ctx.set("modo", "a", ttl=1)
+        self.ctx.set("modo", "b")
+        self.clock.t += 10
+        self.assertEqual(self.ctx.cleanup(), 0)
+        self.assertEqual(self.ctx.get("modo"), "b")
+
+    def test_stale_heap_entries_are_compacted(self):
+        for _ in range(500):
+            self.ctx.set("k", 1, ttl=60)
+        self.assertLessEqual(self.ctx.get_stats()["pending_expirations"], 65)
+
+
+class TestContextManagerSubscribe(unittest.TestCase):
+    """Testes para as notificações de mudança"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.ctx = ContextManager(clock=self.clock)
+        self.eventos = []
+
+    def test_exact_key_subscription(self):
+        self.ctx.subscribe("stealth_mode", self.eventos.append)
+        self.ctx.set("stealth_mode", True)
+        self.ctx.set("stealth_mode", True)  # sem mudança: sem evento
+        self.ctx.set("outra", 1)
+        self.ctx.wait_notifications()
+        self.assertEqual([(e.key, e.value, e.old, e.kind) for e in self.eventos],
+                         [("stealth_mode", True, None, "set")])
+
+    def test_prefix_subscription_and_expiration(self):
+        self.ctx.subscribe("library_*", self.eventos.append)
+        self.ctx.set("library_books", ["a"], ttl=1)
+        self.clock.t += 2
+        self.ctx.cleanup()
+        self.ctx.wait_notifications()
+        self.assertEqual([e.kind for e in self.eventos], ["set", "expired"])
+        self.assertEqual(self.eventos[1].old, ["a"])
+
+    def test_unsubscribe_and_failing_callback(self):
+        def falha(evento):
+            raise RuntimeError("boom")
+        self.ctx.subscribe("k", falha)
+        token = self.ctx.subscribe("k", self.eventos.append)
+        self.ctx.set("k", 1)
+        self.ctx.wait_notifications()
+        self.ctx.unsubscribe(token)
+        self.ctx.set("k", 2)
+        self.ctx.wait_notifications()
+        self.assertEqual([e.value for e in self.eventos], [1])
+
+
+class TestContextManagerConcurrency(unittest.TestCase):
+    """Testes para o RWLock e a cópia consistente do snapshot"""
+
+    def test_readers_share_writer_excludes(self):
+        lock = RWLock()
+        lock.acquire_read()
+        outro_leu = threading.Event()
+
+        def ler():
+            with lock.read():
+                outro_leu.set()
+
+        threading.Thread(target=ler, daemon=True).start()
+        self.assertTrue(outro_leu.wait(1.0))  # leitura não espera leitura
+
+        escreveu = threading.Event()
+
+        def escrever():
+            with lock.write():
+                escreveu.set()
+
+        threading.Thread(target=escrever, daemon=True).start()
+        self.assertFalse(escreveu.wait(0.1))  # escrita espera o leitor
+        lock.release_read()
+        self.assertTrue(escreveu.wait(1.0))
+
+    def test_snapshot_is_isolated_copy(self):
+        ctx = ContextManager()
+        livros = ["a"]
+        ctx.set("library_books", livros)
+        ctx.set("objeto", object())
+        with tempfile.TemporaryDirectory() as tmp:
+            caminho = os.path.join(tmp, "dump.json")
+            self.assertTrue(ctx.save_snapshot(caminho))
+            livros.append("b")
+            with open(caminho, encoding="utf-8") as f:
+                self.assertEqual(json.load(f), {"library_books": ["a"]})
+            outro = ContextManager()
+            self.assertTrue(outro.load_snapshot(caminho))
+            self.assertEqual(outro.get("library_books"), ["a"])
+
+    def test_concurrent_set_and_get(self):
+        ctx = ContextManager()
+        erros = []
+
+        def escritor(n):
+            for i in range(300):
+                ctx.set(f"k{n}", i, ttl=0.001 if i % 2 else None)
+
+        def leitor():
+            fim = time.time() + 0.2
+            while time.time() < fim:
+                try:
+                    ctx.get("k0")
+                    ctx.get_all()
+                except Exception as e:
+                    erros.append(e)
+
+        threads = [threading.Thread(target=escritor, args=(n,)) for n in range(3)]
+        threads += [threading.Thread(target=leitor) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(erros, [])
+
+
+class TestContextManagerIncrementalSnapshot(unittest.TestCase):
+    """Testes para o snapshot incremental com carga sob demanda"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pasta = os.path.join(self.tmp.name, "context")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _arquivos_de_valor(self):
+        pasta = os.path.join(self.pasta, "values")
+        return sorted(os.listdir(pasta)) if os.path.isdir(pasta) else []
+
+    def test_large_values_loaded_lazily(self):
+        ctx = ContextManager(large_value_bytes=100)
+        livros = [f"livro {i}" for i in range(50)]
+        ctx.set("library_books", livros)
+        ctx.set("stealth_mode", True)
+        self.assertTrue(ctx.save_snapshot(self.pasta))
+        self.assertEqual(len(self._arquivos_de_valor()), 1)
+
+        novo = ContextManager(large_value_bytes=100)
+        self.assertTrue(novo.load_snapshot(self.pasta))
+        self.assertIn("stealth_mode", novo.data)
+        self.assertNotIn("library_books", novo.data)  # ainda no disco
+        self.assertEqual(novo.get("library_books"), livros)
+
+    def test_only_dirty_keys_are_rewritten(self):
+        ctx = ContextManager(large_value_bytes=100)
+        ctx.set("grande", "x" * 500)
+        ctx.set("pequeno", 1)
+        ctx.save_snapshot(self.pasta)
+        arquivo = os.path.join(self.pasta, "values", self._arquivos_de_valor()[0])
+        mtime = os.stat(arquivo).st_mtime_ns
+
+        ctx.set("pequeno", 2)
+        ctx.save_snapshot(self.pasta)
+        self.assertEqual(os.stat(arquivo).st_mtime_ns, mtime)
+
+        novo = ContextManager(large_value_bytes=100)
+        novo.load_snapshot(self.pasta)
+        self.assertEqual(novo.get("pequeno"), 2)
+        self.assertEqual(novo.get("grande"), "x" * 500)
+
+    def test_unloaded_keys_survive_and_removed_keys_go_away(self):
+        ctx = ContextManager(large_value_bytes=100)
+        ctx.set("grande", "x" * 500)
+        ctx.set("temporario", "y" * 500, ttl=60)
+        ctx.save_snapshot(self.pasta)
+
+        novo = ContextManager(large_value_bytes=100)
+        novo.load_snapshot(self.pasta)
+        novo.set("temporario", "curto")  # vira valor pequeno: o arquivo antigo sai
+        novo.set("outro", 3)
+        novo.save_snapshot(self.pasta)
+        self.assertEqual(len(self._arquivos_de_valor()), 1)
+
+        terceiro = ContextManager(large_value_bytes=100)
+        terceiro.load_snapshot(self.pasta)
+        self.assertEqual(terceiro.get_all(), {"grande": "x" * 500, "temporario": "curto", "outro": 3})
+
+    def test_failed_save_keeps_keys_dirty(self):
+        """Erro de disco no save: as chaves continuam pendentes para o próximo"""
+        ctx = ContextManager()
+        ctx.set("modo", "foco")
+        with patch("core.context_manager.escrever_atomico", side_effect=OSError("disco cheio")):
+            self.assertFalse(ctx.save_snapshot(self.pasta))
+        self.assertTrue(ctx.save_snapshot(self.pasta))
+        novo = ContextManager()
+        novo.load_snapshot(self.pasta)
+        self.assertEqual(novo.get("modo"), "foco")
+
+
+if __name__ == "__main__":
+    unittest.main()
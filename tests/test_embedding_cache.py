@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.embedding_cache import EmbeddingCache
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.chamadas = []
+
+    def __call__(self, textos):
+        self.chamadas.append(list(textos))
+        return [[float(len(t)), 1.0] for t in textos]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Testes para o cache de embeddings da memória vetorial"""
+
+    def test_only_missing_texts_are_embedded_in_one_batch(self):
+        """Textos repetidos (após normalizar) não voltam ao modelo"""
+        fn = FakeEmbedder()
+        cache = EmbeddingCache(fn, maxsize=8)
+        cache.embed(["abre o navegador"])
+        vetores = cache.embed(["Abre  o navegador", "toca musica", "toca musica"])
+        self.assertEqual(fn.chamadas, [["abre o navegador"], ["toca musica"]])
+        self.assertEqual(vetores[0], [16.0, 1.0])
+        self.assertEqual(vetores[1], vetores[2])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_persistence(self):
+        """O cache sobrevive a uma nova instância quando persist_path é usado"""
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("numpy indisponível")
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, "embeddings.npz")
+            primeiro = EmbeddingCache(FakeEmbedder(), persist_path=caminho)
+            primeiro.embed(["que horas sao"])
+            primeiro.save()
+
+            fn = FakeEmbedder()
+            segundo = EmbeddingCache(fn, persist_path=caminho)
+            self.assertEqual(segundo.embed(["que horas sao"]), [[13.0, 1.0]])
+            self.assertEqual(fn.chamadas, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.flat_index import FlatVectorIndex, HashingEmbedder
+from core.memory_vector import VectorMemory
+
+
+class TestFlatVectorIndex(unittest.TestCase):
+    """Testes para o índice vetorial plano (sem ChromaDB/torch)"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embedder = HashingEmbedder(dim=256)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _docs(self):
+        return ["abrir o navegador chrome", "tocar musica no spotify", "previsao do tempo amanha"]
+
+    def test_query_ranks_by_cosine(self):
+        """A interação com as mesmas palavras vem primeiro"""
+        index = FlatVectorIndex(self.tmp.name, 256)
+        docs = self._docs()
+        index.add(self.embedder(docs), docs, ["a", "b", "c"])
+        resultados = index.query(self.embedder(["tocar uma musica"])[0], n_results=2)
+        self.assertEqual(resultados[0][1], "tocar musica no spotify")
+        self.assertEqual(len(resultados), 2)
+        self.assertGreaterEqual(resultados[0][0], resultados[1][0])
+
+    def test_reopen_and_recover_truncated_write(self):
+        """Reabrir lê do disco; metadado sem vetor (queda no meio) é descartado"""
+        docs = self._docs()
+        index = FlatVectorIndex(self.tmp.name, 256)
+        index.add(self.embedder(docs), docs, ["a", "b", "c"])
+        with open(os.path.join(self.tmp.name, "meta.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"id": "orfao", "document": "sem vetor"}\n')
+
+        reaberto = FlatVectorIndex(self.tmp.name, 256)
+        self.assertEqual(len(reaberto), 3)
+        self.assertEqual(reaberto.query(self.embedder(["previsao do tempo"])[0], 1)[0][1], docs[2])
+
+    def test_compact_with_concurrent_queries(self):
+        """Compactar com buscas em paralelo: nenhum mmap escapa do lock e o índice é remapeado"""
+        import threading
+        import numpy as np
+        docs = self._docs()
+        index = FlatVectorIndex(self.tmp.name, 256)
+        index.add(self.embedder(docs), docs, ["a", "b", "c"])
+        _, matriz, _, _ = index.entries()
+        self.assertNotIsInstance(matriz, np.memmap)
+
+        q = self.embedder(["previsao do tempo"])[0]
+        parar = threading.Event()
+        erros = []
+
+        def buscar():
+            while not parar.is_set():
+                try:
+                    index.query(q, 1)
+                except Exception as e:
+                    erros.append(e)
+
+        threads = [threading.Thread(target=buscar) for _ in range(3)]
+        for t in threads:
+            t.start()
+        try:
+            self.assertGreater(index.compact({"b"}), 0)
+        finally:
+            parar.set()
+            for t in threads:
+                t.join(2)
+        self.assertEqual(erros, [])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.query(q, 1)[0][1], docs[2])
+
+    def test_vector_memory_flat_backend(self):
+        """VectorMemory no backend plano: grava em lote e recupera"""
+        mem = VectorMemory(self.tmp.name, backend="flat", flush_interval_s=0.01)
+        self.assertTrue(mem.available)
+        self.assertEqual(mem.backend, "flat")
+        mem.store_interaction("qual a capital da franca", "Paris")
+        mem.store_interaction("toca rock", "Tocando rock")
+        self.assertTrue(mem.flush(timeout=2))
+        self.assertIn("Paris", mem.retrieve_relevant("capital da franca", n_results=1))
+        mem.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
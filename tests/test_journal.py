@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.journal import JournaledStore
+from core.config_manager import ConfigManager
+
+
+def _apply(state, rec):
+    if rec["op"] == "append":
+        state.append(rec["item"])
+    return state
+
+
+class TestJournaledStore(unittest.TestCase):
+    """Testes para o journal append-only (snapshot + JSONL)"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = os.path.join(self.tmp.name, "dados")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_replay_after_reopen(self):
+        """Registros do journal são reaplicados sobre o snapshot"""
+        store = JournaledStore(self.base, list, _apply, compact_every=100)
+        store.append("append", item=1)
+        store.append("append", item=2)
+        # Simula queda: não chama close()
+        store._journal.flush()
+        reaberto = JournaledStore(self.base, list, _apply)
+        self.assertEqual(reaberto.state, [1, 2])
+        self.assertEqual(reaberto.seq, 2)
+
+    def test_truncated_record_is_discarded(self):
+        """Linha incompleta no fim do journal é ignorada e removida"""
+        store = JournaledStore(self.base, list, _apply)
+        store.append("append", item="ok")
+        store._journal.write('{"seq": 2, "op": "app')
+        store._journal.flush()
+        reaberto = JournaledStore(self.base, list, _apply)
+        self.assertEqual(reaberto.state, ["ok"])
+        reaberto.append("append", item="depois")
+        self.assertEqual(JournaledStore(self.base, list, _apply).state, ["ok", "depois"])
+
+    def test_crash_between_snapshot_and_truncate(self):
+        """Registros já contidos no snapshot não são reaplicados"""
+        store = JournaledStore(self.base, list, _apply, compact_every=100)
+        store.append("append", item="a")
+        store._journal.flush()
+        with open(store.journal_path, "r", encoding="utf-8") as f:
+            journal_antigo = f.read()
+        store.compact()
+        # Queda logo após o snapshot, antes de zerar o journal
+        with open(store.journal_path, "w", encoding="utf-8") as f:
+            f.write(journal_antigo)
+        self.assertEqual(JournaledStore(self.base, list, _apply).state, ["a"])
+
+    def test_config_manager_migrates_legacy_json(self):
+        """O historico.json antigo é importado e as novas interações vão para o journal"""
+        with open(os.path.join(self.tmp.name, "historico.json"), "w", encoding="utf-8") as f:
+            json.dump({"conversations": [{"user": "oi", "aeon": "ola"}], "last_context": "x"}, f)
+        cm = ConfigManager(self.tmp.name)
+        cm.add_to_history("que horas sao", "dez horas")
+        cm.add_task({"id": 1, "texto": "beber agua"})
+        cm.close()
+
+        cm2 = ConfigManager(self.tmp.name)
+        self.assertEqual([c["user"] for c in cm2.get_history()], ["oi", "que horas sao"])
+        self.assertEqual(cm2.get_last_context(), "x")
+        cm2.get_tasks()[0]["done"] = True
+        cm2.save_tasks()
+        cm2.close()
+        self.assertTrue(ConfigManager(self.tmp.name).get_tasks()[0]["done"])
+
+
+if __name__ == "__main__":
+    unittest.main()
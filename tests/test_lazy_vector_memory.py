@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import threading
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.memory_vector import LazyVectorMemory
+from core.status_manager import StatusManager
+
+
+class FakeMemory:
+    available = True
+
+    def __init__(self):
+        self.gravadas = []
+
+    def store_interaction(self, user_input, aeon_response):
+        self.gravadas.append((user_input, aeon_response))
+
+    def retrieve_relevant(self, query, n_results=3):
+        return "lembranca"
+
+    def close(self, timeout=10.0):
+        return True
+
+
+class TestLazyVectorMemory(unittest.TestCase):
+    """Testes para a inicialização em background da memória vetorial"""
+
+    def test_buffers_until_ready_and_reports_status(self):
+        """Gravações antes do carregamento vão para o buffer e são repassadas depois"""
+        liberar = threading.Event()
+        real = FakeMemory()
+        status = StatusManager()
+
+        def factory():
+            liberar.wait(2)
+            return real
+
+        lazy = LazyVectorMemory(factory, on_status=status.update_memory_status)
+        lazy.start()
+        self.assertEqual(status.memory_status, "loading")
+        self.assertTrue(lazy.available)
+        lazy.store_interaction("oi", "ola")
+        self.assertEqual(lazy.retrieve_relevant("oi"), "")
+
+        liberar.set()
+        self.assertTrue(lazy.wait_ready(2))
+        self.assertEqual(real.gravadas, [("oi", "ola")])
+        self.assertEqual(lazy.retrieve_relevant("oi"), "lembranca")
+        self.assertTrue(status.is_memory_ready())
+
+    def test_failed_init_disables(self):
+        """Se a fábrica falhar, a memória fica indisponível e o status vai para off"""
+        status = StatusManager()
+
+        def factory():
+            raise RuntimeError("torch quebrado")
+
+        lazy = LazyVectorMemory(factory, on_status=status.update_memory_status)
+        self.assertTrue(lazy.wait_ready(2))
+        self.assertFalse(lazy.available)
+        self.assertEqual(status.get_status()["memory"], "off")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """Testes para o cache LRU limitado"""
+
+    def test_eviction_order(self):
+        """O item menos usado é descartado primeiro"""
+        cache = LRUCache(maxsize=2)
+        cache.put("parar", 1)
+        cache.put("proxima", 2)
+        cache.get("parar")
+        cache.put("modo esfera", 3)
+        self.assertIn("parar", cache)
+        self.assertNotIn("proxima", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_hit_miss_counters(self):
+        """Contadores de diagnóstico"""
+        cache = LRUCache(maxsize=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertAlmostEqual(stats["hit_rate"], 0.5)
+
+    def test_clear(self):
+        """clear() esvazia mas mantém os contadores"""
+        cache = LRUCache(maxsize=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(cache.get("a", "vazio"), "vazio")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_ttl_expiration(self):
+        """Com ttl, o item vencido conta como miss e some"""
+        agora = [0.0]
+        cache = LRUCache(maxsize=4, ttl=10, clock=lambda: agora[0])
+        cache.put("a", 1)
+        agora[0] = 9.9
+        self.assertEqual(cache.get("a"), 1)
+        agora[0] = 10.0
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
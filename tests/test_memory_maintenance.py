@@ -0,0 +1,177 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+import numpy as np
+from unittest.mock import Mock
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.memory_maintenance import planejar_compactacao, politica_retencao, MaintenanceScheduler
+from core.memory_vector import VectorMemory
+from core.module_manager import ModuleManager
+
+DIA = 86400.0
+AGORA = 1000 * DIA
+
+
+def _vetor(*valores):
+    v = np.asarray(valores, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+class TestMemoryMaintenance(unittest.TestCase):
+    """Testes para a compactação e retenção da memória vetorial"""
+
+    def test_dedup_keeps_most_recent(self):
+        """Quase-duplicadas: fica só a mais recente"""
+        ids = ["velha", "nova", "outra"]
+        matriz = np.stack([_vetor(1, 0, 0), _vetor(1, 0.01, 0), _vetor(0, 1, 0)])
+        docs = ["x" * 200] * 3
+        remover, motivos = planejar_compactacao(ids, matriz, [AGORA - 10, AGORA - 5, AGORA], docs,
+                                                politica_retencao(), agora=AGORA, bloco=2)
+        self.assertEqual(remover, {"velha"})
+        self.assertEqual(motivos["duplicates"], 1)
+
+    def test_retention_policy(self):
+        """Curtas e antigas saem; limite de quantidade descarta as mais antigas"""
+        ids = ["curta_velha", "curta_nova", "longa_velha", "longa_nova"]
+        matriz = np.eye(4, dtype=np.float32)
+        ts = [AGORA - 60 * DIA, AGORA - DIA, AGORA - 60 * DIA, AGORA]
+        docs = ["ok", "ok", "x" * 200, "x" * 200]
+        politica = politica_retencao({"max_entries": 2, "low_value_days": 30})
+        remover, motivos = planejar_compactacao(ids, matriz, ts, docs, politica, agora=AGORA)
+        self.assertEqual(remover, {"curta_velha", "longa_velha"})
+        self.assertEqual((motivos["low_value"], motivos["over_limit"]), (1, 1))
+
+    def test_low_value_rule_is_opt_in(self):
+        """Sem configuração, interações curtas antigas não são apagadas"""
+        remover, motivos = planejar_compactacao(["fato"], np.eye(1, dtype=np.float32), [AGORA - 400 * DIA],
+                                                ["Usuário: meu aniversário é 3/5 | Aeon: anotado"],
+                                                politica_retencao(), agora=AGORA)
+        self.assertEqual(remover, set())
+        self.assertEqual(motivos["low_value"], 0)
+
+    def test_flat_backend_compaction_reclaims_bytes(self):
+        """Compactação no índice plano remove duplicadas e libera espaço"""
+        with tempfile.TemporaryDirectory() as pasta:
+            mem = VectorMemory(pasta, backend="flat", flush_interval_s=0.01)
+            for _ in range(3):
+                mem.store_interaction("que horas sao agora", "Agora são dez horas da manhã em ponto, mestre.")
+            mem.store_interaction("toca rock classico", "Tocando uma playlist de rock clássico no Spotify agora.")
+            stats = mem.compact()
+            self.assertEqual(stats["entries_before"], 4)
+            self.assertEqual(stats["duplicates"], 2)
+            self.assertEqual(len(mem.index), 2)
+            self.assertGreater(stats["bytes_reclaimed"], 0)
+            self.assertIn("rock", mem.retrieve_relevant("rock classico", 1))
+            mem.close()
+
+    def test_chroma_backend_compaction(self):
+        """No ChromaDB: snapshot por collection.get, delete e reconstrução em coleção nova"""
+        class ColecaoFalsa:
+            def __init__(self, nome, dados=None):
+                self.name = nome
+                self.dados = dados or {"ids": [], "embeddings": [], "metadatas": [], "documents": []}
+                self.removidos = []
+
+            def get(self, include=None):
+                return self.dados
+
+            def delete(self, ids):
+                self.removidos.extend(ids)
+                manter = [i for i, x in enumerate(self.dados["ids"]) if x not in ids]
+                self.dados = {k: [v[i] for i in manter] for k, v in self.dados.items()}
+
+            def add(self, ids, embeddings, metadatas, documents):
+                for chave, valores in zip(("ids", "embeddings", "metadatas", "documents"),
+                                          (ids, embeddings, metadatas, documents)):
+                    self.dados[chave].extend(valores)
+
+            def modify(self, name):
+                self.name = name
+
+        class ClienteFalso:
+            def __init__(self, colecao):
+                self.colecoes = {colecao.name: colecao}
+
+            def create_collection(self, name, embedding_function=None):
+                self.colecoes[name] = ColecaoFalsa(name)
+                return self.colecoes[name]
+
+            def delete_collection(self, name):
+                if name not in self.colecoes:
+                    raise ValueError(name)
+                del self.colecoes[name]
+
+        original = ColecaoFalsa("aeon_long_term_memory", {
+            "ids": ["a", "b", "c"],
+            "embeddings": [[1.0, 0.0], [2.0, 0.0], [0.0, 3.0]],
+            "metadatas": [{"timestamp": AGORA - 10}, {"timestamp": AGORA}, {"timestamp": AGORA}],
+            "documents": ["x" * 200] * 3,
+        })
+        with tempfile.TemporaryDirectory() as pasta:
+            mem = VectorMemory(pasta, backend="flat")
+            mem.backend = "chroma"
+            mem.collection = original
+            mem.client = ClienteFalso(original)
+            stats = mem.compact()
+            self.assertEqual(original.removidos, ["a"])
+            self.assertEqual((stats["entries_before"], stats["duplicates"]), (3, 1))
+            # Coleção reconstruída só com as sobreviventes, já com o nome original
+            self.assertIsNot(mem.collection, original)
+            self.assertEqual(mem.collection.name, "aeon_long_term_memory")
+            self.assertEqual(mem.collection.dados["ids"], ["b", "c"])
+            self.assertEqual([c.name for c in mem.client.colecoes.values()], ["aeon_long_term_memory"])
+            mem.close()
+
+    def test_voice_command_routes_to_compaction(self):
+        """'compactar a memória' chega à compactação pelo route_command"""
+        mm = ModuleManager({"brain": Mock()})
+        mm.vector_memory = Mock()
+        mm.vector_memory.compact.return_value = {
+            "removed": 2, "entries_before": 10, "duplicates": 2, "bytes_reclaimed": 4096,
+        }
+        resposta = mm.route_command("Aeon, compactar a memória por favor")
+        self.assertIn("2 de 10", resposta)
+        mm.vector_memory.compact.side_effect = RuntimeError("disco cheio")
+        self.assertIn("disco cheio", mm.route_command("otimizar memória"))
+
+    def test_scheduler_waits_for_idle(self):
+        """Só roda com o sistema ocioso e após o intervalo"""
+        ultima = [AGORA - 60]
+        agendador = MaintenanceScheduler(lambda: {}, lambda: ultima[0], idle_minutes=10,
+                                         interval_hours=24, last_run=AGORA - 2 * DIA)
+        self.assertFalse(agendador.due(AGORA))
+        ultima[0] = AGORA - 3600
+        self.assertTrue(agendador.due(AGORA))
+        agendador.last_run = AGORA - 3600
+        self.assertFalse(agendador.due(AGORA))
+
+    def test_scheduler_counts_only_completed_runs(self):
+        """Execução sem efeito ({}) ou com erro não gasta o intervalo"""
+        resultados = [{}, RuntimeError("falhou"), {"removed": 1}]
+        feitos = []
+
+        def job():
+            r = resultados.pop(0)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        agendador = MaintenanceScheduler(job, lambda: 0.0, idle_minutes=0, interval_hours=24,
+                                         check_every_s=0.01, on_done=feitos.append)
+        agendador.start()
+        for _ in range(200):
+            if feitos:
+                break
+            time.sleep(0.01)
+        agendador.stop()
+        self.assertEqual(feitos, [{"removed": 1}])
+        self.assertGreater(agendador.last_run, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
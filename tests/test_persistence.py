@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.persistence import DebouncedWriter
+from core.config_manager import ConfigManager
+
+
+class TestDebouncedWriter(unittest.TestCase):
+    """Testes para a persistência com debounce em background"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dados.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_burst_coalesces_into_one_write(self):
+        """Várias marcações seguidas geram uma única gravação com o estado final"""
+        estado = {"n": 0}
+        chamadas = []
+
+        def serializar():
+            chamadas.append(1)
+            return json.dumps(estado)
+
+        writer = DebouncedWriter(debounce_s=0.05)
+        for i in range(10):
+            estado["n"] = i
+            writer.schedule(self.path, serializar)
+        time.sleep(0.3)
+        writer.close()
+        self.assertEqual(len(chamadas), 1)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), {"n": 9})
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_close_flushes_synchronously(self):
+        """close() grava o pendente mesmo antes do debounce vencer"""
+        writer = DebouncedWriter(debounce_s=60)
+        writer.schedule(self.path, lambda: "{}")
+        writer.close()
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(writer.stats()["written"], 1)
+
+
+class TestConfigManagerPersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_set_system_data_persists_on_close(self):
+        cm = ConfigManager(self.tmp.name)
+        cm.set_system_data("VOICE", "pt-BR-FranciscaNeural")
+        cm.set_system_data("current_theme", "azul")
+        cm.close()
+        cm2 = ConfigManager(self.tmp.name)
+        self.assertEqual(cm2.get_system_data("VOICE"), "pt-BR-FranciscaNeural")
+        self.assertEqual(cm2.get_system_data("current_theme"), "azul")
+        cm2.close()
+
+    def test_corrupt_system_json_is_kept_aside(self):
+        with open(os.path.join(self.tmp.name, "system.json"), "w", encoding="utf-8") as f:
+            f.write('{"apps": {')
+        cm = ConfigManager(self.tmp.name)
+        self.assertEqual(cm.get_system_data("apps"), {})
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "system.json.corrupt")))
+        cm.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
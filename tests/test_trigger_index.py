@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.trigger_index import TriggerAutomaton, FuzzyTokenIndex, edit_distance
+
+
+class TestTriggerAutomaton(unittest.TestCase):
+    """Testes para o autômato de gatilhos (Aho-Corasick)"""
+
+    def test_longest_first(self):
+        """Gatilhos mais longos vêm antes dos mais curtos"""
+        automaton = TriggerAutomaton(["tocar", "tocar musica", "musica"])
+        self.assertEqual(
+            automaton.find_all("aeon tocar musica agora"),
+            ["tocar musica", "musica", "tocar"]
+        )
+
+    def test_same_length_keeps_registration_order(self):
+        """Empates de tamanho respeitam a ordem de registro"""
+        automaton = TriggerAutomaton(["abrir", "tocar"])
+        self.assertEqual(automaton.find_all("tocar e abrir"), ["abrir", "tocar"])
+
+    def test_matches_substrings_like_in_operator(self):
+        """Mesmo comportamento do antigo `trigger in comando`"""
+        triggers = ["he", "she", "his", "hers", "parar", "ar"]
+        automaton = TriggerAutomaton(triggers)
+        text = "ushers vao parar"
+        expected = sorted((t for t in triggers if t in text), key=len, reverse=True)
+        self.assertEqual(sorted(automaton.find_all(text)), sorted(expected))
+        self.assertEqual([len(t) for t in automaton.find_all(text)], [len(t) for t in expected])
+
+    def test_no_match_and_empty(self):
+        """Sem gatilhos ou sem texto, retorna lista vazia"""
+        self.assertEqual(TriggerAutomaton([]).find_all("qualquer coisa"), [])
+        self.assertEqual(TriggerAutomaton(["parar"]).find_all(""), [])
+        self.assertEqual(TriggerAutomaton(["parar"]).find_all("continuar"), [])
+
+
+
+class TestFuzzyTokenIndex(unittest.TestCase):
+    """Testes para o índice invertido do matching difuso"""
+
+    def test_overlap_ratio(self):
+        """Mesma pontuação do scan antigo: tokens em comum / tokens do gatilho"""
+        index = FuzzyTokenIndex(["modo esfera", "abrir navegador agora", "tocar"])
+        self.assertEqual(index.best_match("quero o modo esfera", 0.7), ("modo esfera", 1.0))
+        trigger, ratio = index.best_match("abrir o navegador", 0.5)
+        self.assertEqual(trigger, "abrir navegador agora")
+        self.assertAlmostEqual(ratio, 2 / 3)
+
+    def test_below_min_ratio(self):
+        """Abaixo do mínimo não há match"""
+        index = FuzzyTokenIndex(["abrir navegador agora"])
+        self.assertEqual(index.best_match("abrir algo", 0.7), (None, 0.0))
+
+    def test_typo_tolerance(self):
+        """Tolerância de edição aceita erros de STT como 'aion' -> 'aeon'"""
+        strict = FuzzyTokenIndex(["aeon status"])
+        tolerant = FuzzyTokenIndex(["aeon status"], max_edits=1)
+        self.assertEqual(strict.best_match("aion status", 0.9), (None, 0.0))
+        self.assertEqual(tolerant.best_match("aion status", 0.9), ("aeon status", 1.0))
+
+    def test_custom_scorer(self):
+        """Scorer plugável substitui o padrão"""
+        index = FuzzyTokenIndex(["abrir navegador"], scorer=lambda hits, count: 1.0 if hits else 0.0)
+        self.assertEqual(index.best_match("abrir", 0.9), ("abrir navegador", 1.0))
+
+    def test_edit_distance(self):
+        """Levenshtein com corte"""
+        self.assertEqual(edit_distance("aion", "aeon", 2), 1)
+        self.assertEqual(edit_distance("abc", "abc", 1), 0)
+        self.assertGreater(edit_distance("parar", "tocar", 1), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.tts_cache import TTSCache
+
+
+class TestTTSCache(unittest.TestCase):
+    """Testes para o cache persistente de frases do TTS"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_roundtrip_and_normalization(self):
+        """Caixa e espaços extras caem na mesma chave"""
+        cache = TTSCache(self.tmp, min_vistas=0)
+        cache.put("kokoro", "bm_lewis", 1.0, "Estou pronto.", b"RIFF1234", "wav")
+        self.assertEqual(cache.get("kokoro", "bm_lewis", 1.0, "  estou   PRONTO. "), (b"RIFF1234", "wav"))
+        self.assertIsNone(cache.get("edge", "bm_lewis", 1.0, "Estou pronto."))
+        self.assertIsNone(cache.get("kokoro", "bm_lewis", 1.2, "Estou pronto."))
+
+    def test_persists_between_instances(self):
+        """O index e os áudios sobrevivem a um reboot"""
+        primeiro = TTSCache(self.tmp, fixas=["Ok."])
+        primeiro.put("edge", "pt-BR-AntonioNeural", 1.0, "Ok.", b"ID3mp3", "mp3")
+        primeiro.flush()
+        cache = TTSCache(self.tmp, min_vistas=0)
+        self.assertEqual(cache.get("edge", "pt-BR-AntonioNeural", 1.0, "Ok."), (b"ID3mp3", "mp3"))
+
+    def test_get_first_preference_order(self):
+        """Procura os motores na ordem e conta um único acerto"""
+        cache = TTSCache(self.tmp, min_vistas=0)
+        cache.put("edge", "v", 1.0, "Próxima.", b"edge", "mp3")
+        achado = cache.get_first([("kokoro", "k", 1.0), ("edge", "v", 1.0)], "Próxima.")
+        self.assertEqual(achado, (b"edge", "mp3"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_lru_eviction_by_bytes(self):
+        """Passando do limite, o menos usado sai primeiro"""
+        cache = TTSCache(self.tmp, max_bytes=10, min_vistas=0)
+        cache.put("edge", "v", 1.0, "um", b"12345", "mp3")
+        cache.put("edge", "v", 1.0, "dois", b"12345", "mp3")
+        cache.get("edge", "v", 1.0, "um")
+        cache.put("edge", "v", 1.0, "tres", b"12345", "mp3")
+        self.assertIsNotNone(cache.get("edge", "v", 1.0, "um"))
+        self.assertIsNone(cache.get("edge", "v", 1.0, "dois"))
+        self.assertLessEqual(cache.stats()["bytes"], 10)
+
+    def test_long_text_not_cached(self):
+        """Respostas longas (únicas) não entram no cache"""
+        cache = TTSCache(self.tmp, max_text_len=10, min_vistas=0)
+        cache.put("edge", "v", 1.0, "uma frase bem longa demais", b"x", "mp3")
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+    def test_admits_only_fixed_or_repeated_phrases(self):
+        """Resposta única não entra; frase fixa entra; frase comum entra na segunda vez"""
+        cache = TTSCache(self.tmp, fixas=["Estou pronto."], flush_interval_s=None)
+        cache.put("edge", "v", 1.0, "Estou pronto.", b"a", "mp3")
+        self.assertEqual(cache.stats()["entries"], 1)
+
+        for tentativa in range(2):
+            self.assertIsNone(cache.get("edge", "v", 1.0, "Bom dia, mestre."))
+            cache.put("edge", "v", 1.0, "Bom dia, mestre.", b"b", "mp3")
+            self.assertEqual(cache.stats()["entries"], 1 + tentativa)
+
+    def test_index_written_on_flush_not_on_put(self):
+        """put não regrava o index.json; o flush (timer/saída) grava"""
+        cache = TTSCache(self.tmp, min_vistas=0, flush_interval_s=None)
+        cache.put("edge", "v", 1.0, "um", b"12345", "mp3")
+        indice = os.path.join(self.tmp, "index.json")
+        self.assertFalse(os.path.exists(indice))
+        cache.flush()
+        self.assertTrue(os.path.exists(indice))
+        self.assertEqual(TTSCache(self.tmp).stats()["bytes"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
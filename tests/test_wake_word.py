@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.audicao.wake_word import WakeWordGate, encontrar_gatilho
+
+GATILHOS = ["aeon", "aion", "computador"]
+
+
+class FakeSpotter:
+    nome = "fake"
+
+    def __init__(self, textos):
+        self.textos = list(textos)
+        self.chamadas = 0
+
+    def transcrever(self, pcm16, gatilhos):
+        self.chamadas += 1
+        return self.textos.pop(0)
+
+
+class TestWakeWord(unittest.TestCase):
+    """Testes para o porteiro de wake word do modo CHAMAR"""
+
+    def test_encontrar_gatilho(self):
+        """Substring, tolerância a uma edição e rejeição de conversa sem gatilho"""
+        self.assertEqual(encontrar_gatilho("Aeon, abre o navegador", GATILHOS), "aeon")
+        self.assertEqual(encontrar_gatilho("ei computadôr", GATILHOS), "computador")
+        self.assertEqual(encontrar_gatilho("eon toca musica", GATILHOS), "aeon")
+        self.assertIsNone(encontrar_gatilho("vamos almoçar agora", GATILHOS))
+        self.assertIsNone(encontrar_gatilho("[unk]", GATILHOS))
+
+    def test_gate_discards_and_opens_window(self):
+        """Sem gatilho descarta; com gatilho abre a janela de conversa"""
+        agora = [0.0]
+        spotter = FakeSpotter(["conversa qualquer", "aeon", "outra conversa"])
+        gate = WakeWordGate(spotter, lambda: GATILHOS, janela_conversa_s=5.0, relogio=lambda: agora[0])
+
+        self.assertFalse(gate.deixa_passar(b"\x00\x00"))
+        self.assertTrue(gate.deixa_passar(b"\x00\x00"))
+
+        # Dentro da janela: passa sem rodar o detector
+        agora[0] = 3.0
+        self.assertTrue(gate.deixa_passar(b"\x00\x00"))
+        self.assertEqual(spotter.chamadas, 2)
+
+        # Janela expirada: volta a exigir o gatilho
+        agora[0] = 20.0
+        self.assertFalse(gate.deixa_passar(b"\x00\x00"))
+        self.assertEqual(gate.stats(), {"engine": "fake", "aceitas": 1, "descartadas": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from modules.audicao.whisper_tuning import (
+    WHISPER_PADRAO, config_whisper, gerar_candidatos, escolher_configuracao
+)
+
+
+def _cand(modelo, compute="int8", threads=4, beam=1):
+    return {"model_size": modelo, "compute_type": compute, "cpu_threads": threads, "beam_size": beam}
+
+
+class TestWhisperTuning(unittest.TestCase):
+    """Testes para a configuração e calibração do Whisper"""
+
+    def test_config_defaults_and_overrides(self):
+        """Mescla a config do usuário com os padrões e ignora chaves desconhecidas"""
+        self.assertEqual(config_whisper(None), WHISPER_PADRAO)
+        cfg = config_whisper({"model_size": "base", "beam_size": "2", "capture_mode": "classic"})
+        self.assertEqual(cfg["model_size"], "base")
+        self.assertEqual(cfg["beam_size"], 2)
+        self.assertNotIn("capture_mode", cfg)
+
+    def test_config_rejects_invalid_values(self):
+        """Valores inválidos voltam ao padrão"""
+        cfg = config_whisper({"model_size": "gigante", "compute_type": "int3", "cpu_threads": "x", "beam_size": 0})
+        self.assertEqual(cfg["model_size"], WHISPER_PADRAO["model_size"])
+        self.assertEqual(cfg["compute_type"], WHISPER_PADRAO["compute_type"])
+        self.assertEqual(cfg["cpu_threads"], WHISPER_PADRAO["cpu_threads"])
+        self.assertEqual(cfg["beam_size"], 1)
+
+    def test_candidates_grid(self):
+        """A grade cobre todas as combinações, agrupada por modelo"""
+        cands = gerar_candidatos(modelos=["small", "tiny"], compute_types=["int8"], threads=[2, 4], beams=[1, 5])
+        self.assertEqual(len(cands), 8)
+        self.assertEqual([c["model_size"] for c in cands[:4]], ["small"] * 4)
+
+    def test_prefers_largest_model_within_target(self):
+        """Escolhe o maior modelo que bate o alvo, na sua configuração mais rápida"""
+        resultados = [
+            (_cand("small", beam=5), 0.9),
+            (_cand("small", beam=1), 0.4),
+            (_cand("small", compute="float32"), None),
+            (_cand("base"), 0.2),
+            (_cand("tiny"), 0.1),
+        ]
+        escolhido, rtf = escolher_configuracao(resultados, 0.5, ["small", "base", "tiny"])
+        self.assertEqual(escolhido, _cand("small", beam=1))
+        self.assertEqual(rtf, 0.4)
+
+    def test_falls_back_to_fastest(self):
+        """Sem nada dentro do alvo, fica com a mais rápida; sem resultados, None"""
+        resultados = [(_cand("small"), 2.0), (_cand("tiny"), 0.8)]
+        escolhido, rtf = escolher_configuracao(resultados, 0.5, ["small", "tiny"])
+        self.assertEqual(escolhido["model_size"], "tiny")
+        self.assertEqual(escolher_configuracao([(_cand("small"), None)], 0.5, ["small"]), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Adiciona caminho ao projeto
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.write_behind import WriteBehindQueue
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Testes para a fila write-behind da memória vetorial"""
+
+    def setUp(self):
+        self.lotes = []
+        self.fila = WriteBehindQueue(self.lotes.append, max_batch=3, max_delay_s=5.0)
+
+    def tearDown(self):
+        self.fila.stop(timeout=2)
+
+    def test_full_batch_is_written_without_waiting_delay(self):
+        """Lote cheio é gravado de uma vez, sem esperar o prazo"""
+        for i in range(3):
+            self.fila.put(i)
+        limite = time.monotonic() + 2
+        while not self.lotes and time.monotonic() < limite:
+            time.sleep(0.01)
+        self.assertEqual(self.lotes, [[0, 1, 2]])
+
+    def test_put_does_not_block_on_slow_writer(self):
+        """put retorna na hora mesmo com a gravação lenta"""
+        liberar = threading.Event()
+        fila = WriteBehindQueue(lambda lote: liberar.wait(2), max_batch=1, max_delay_s=0.0)
+        inicio = time.monotonic()
+        for i in range(5):
+            fila.put(i)
+        self.assertLess(time.monotonic() - inicio, 0.5)
+        liberar.set()
+        self.assertTrue(fila.stop(timeout=2))
+        self.assertEqual(fila.stats()["written"], 5)
+
+    def test_flush_writes_partial_batch(self):
+        """flush grava o lote incompleto sem esperar max_delay_s"""
+        self.fila.put("a")
+        self.fila.put("b")
+        self.assertTrue(self.fila.flush(timeout=2))
+        self.assertEqual(self.lotes, [["a", "b"]])
+        self.assertEqual(self.fila.stats()["pending"], 0)
+
+    def test_errors_are_counted(self):
+        """Falha na gravação não derruba a thread"""
+        chamadas = []
+
+        def gravar(lote):
+            chamadas.append(lote)
+            if len(chamadas) == 1:
+                raise RuntimeError("disco cheio")
+
+        fila = WriteBehindQueue(gravar, max_batch=1, max_delay_s=0.0)
+        fila.put(1)
+        fila.put(2)
+        self.assertTrue(fila.stop(timeout=2))
+        stats = fila.stats()
+        self.assertEqual((stats["errors"], stats["written"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()